@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# config.py
+# Scan configuration for KAST: bundled defaults overridden by a user configuration file
+
+import argparse
+import copy
+import os
+from typing import Any, Dict, Optional
+
+import yaml
+
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "default_config.yml")
+USER_CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".config", "kast", "config.yml")
+
+
+def merge_config(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge two configurations, recursing into mappings.
+
+    Args:
+        base: Configuration to start from; not modified
+        override: Configuration whose values take precedence
+
+    Returns:
+        Merged configuration
+    """
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class ConfigManager:
+    """
+    Builds the scan configuration.
+
+    The defaults in default_config.yml are overridden by the file given
+    with --config, or by ~/.config/kast/config.yml if it exists. Command
+    line options that map onto configuration keys are applied on top by
+    main.
+    """
+
+    def __init__(self, args: Optional[argparse.Namespace] = None, default_path: str = DEFAULT_CONFIG_PATH):
+        """
+        Initialize the configuration manager.
+
+        Args:
+            args: Parsed command line arguments, if any
+            default_path: Bundled defaults file
+        """
+        self.args = args
+        self.default_path = default_path
+
+    @property
+    def user_path(self) -> Optional[str]:
+        """Return the user configuration file to read, or None if there is none."""
+        path = getattr(self.args, "config", None)
+        if path:
+            return path
+        return USER_CONFIG_PATH if os.path.exists(USER_CONFIG_PATH) else None
+
+    @staticmethod
+    def _load(path: str) -> Dict[str, Any]:
+        with open(path, "r") as f:
+            data = yaml.safe_load(f)
+        if data is None:
+            return {}
+        if not isinstance(data, dict):
+            raise ValueError(f"Configuration file {path} is not a mapping")
+        return data
+
+    def get_config(self) -> Dict[str, Any]:
+        """
+        Return the scan configuration.
+
+        Returns:
+            Configuration mapping; a fresh copy on every call
+
+        Raises:
+            OSError: If the user configuration file cannot be read
+            ValueError: If a configuration file is not a YAML mapping
+        """
+        try:
+            config = self._load(self.default_path)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid configuration file {self.default_path}: {e}")
+
+        path = self.user_path
+        if path:
+            try:
+                config = merge_config(config, self._load(path))
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid configuration file {path}: {e}")
+        return config
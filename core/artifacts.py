@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# artifacts.py
+# Compressed storage of raw tool output outside the results documents
+
+import gzip
+import hashlib
+import io
+import os
+from typing import IO, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class CorruptArtifact(ValueError):
+    """Raised when an artifact cannot be read back or does not match its record."""
+
+
+class _VerifiedReader(io.RawIOBase):
+    """Decompressed artifact stream that checks size and sha256 once read to the end."""
+
+    def __init__(self, binary, record: Dict, path: str):
+        self._binary = binary
+        self._record = record
+        self._path = path
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._checked = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        try:
+            count = self._binary.readinto(buffer)
+        except Exception as e:
+            # gzip raises OSError or EOFError, zstandard its own ZstdError
+            raise CorruptArtifact(f"cannot decompress {self._path}: {e}") from e
+        if count:
+            self._digest.update(memoryview(buffer)[:count])
+            self._size += count
+        elif not self._checked:
+            self._checked = True
+            if self._size != self._record.get("size", self._size):
+                raise CorruptArtifact(f"{self._path} holds {self._size} bytes, expected {self._record['size']}")
+            if self._digest.hexdigest() != self._record.get("sha256", self._digest.hexdigest()):
+                raise CorruptArtifact(f"{self._path} does not match its sha256")
+        return count
+
+    def close(self):
+        if not self.closed:
+            self._binary.close()
+        super().close()
+
+
+def store_raw_output(source_path: str, output_dir: str, name: str) -> Dict:
+    """
+    Compress a raw output file into an artifact next to the results.
+
+    The source is streamed in chunks, so memory use does not depend on the
+    size of the output. zstd is used when the zstandard package is
+    installed, gzip otherwise.
+
+    Args:
+        source_path: File holding the tool's raw output
+        output_dir: Directory the artifact is written to
+        name: Base file name of the artifact, without extension
+
+    Returns:
+        Artifact record for the results document. The path is relative to
+        output_dir so result directories can be moved or merged.
+    """
+    encoding = "zstd" if zstandard else "gzip"
+    artifact_name = f"{name}.{'zst' if zstandard else 'gz'}"
+    artifact_path = os.path.join(output_dir, artifact_name)
+    digest = hashlib.sha256()
+    size = 0
+
+    with open(source_path, "rb") as source, open(artifact_path, "wb") as raw_artifact:
+        if zstandard:
+            artifact = zstandard.ZstdCompressor().stream_writer(raw_artifact, closefd=False)
+        else:
+            artifact = gzip.GzipFile(fileobj=raw_artifact, mode="wb")
+        with artifact:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+                artifact.write(chunk)
+
+    return {
+        "path": artifact_name,
+        "encoding": encoding,
+        "size": size,
+        "compressed_size": os.path.getsize(artifact_path),
+        "sha256": digest.hexdigest(),
+    }
+
+
+def result_artifacts(result: Dict) -> List[Dict]:
+    """
+    Return the artifact records a results document references.
+
+    Args:
+        result: Results document
+
+    Returns:
+        Records of the raw output and the tool's logs, where present
+    """
+    artifacts = [result["raw_output"]] if result.get("raw_output") else []
+    return artifacts + list((result.get("logs") or {}).values())
+
+
+def open_raw_output(record: Optional[Dict], results_dir: str) -> IO[str]:
+    """
+    Open a raw output artifact for reading as text.
+
+    Nothing is decompressed until the returned stream is read. Reading
+    it to the end checks the output against the record's size and
+    sha256.
+
+    Args:
+        record: Artifact record from a results document's raw_output field
+        results_dir: Directory containing the results document
+
+    Returns:
+        Text stream over the raw output (empty if there is none)
+
+    Raises:
+        RuntimeError: If the artifact is zstd-compressed and zstandard is not installed
+        CorruptArtifact: While reading, if the artifact cannot be
+            decompressed or does not match its record
+    """
+    if not record:
+        return io.StringIO("")
+
+    path = os.path.join(results_dir, record["path"])
+    if record["encoding"] == "zstd":
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        binary = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    else:
+        binary = gzip.open(path, "rb")
+    reader = io.BufferedReader(_VerifiedReader(binary, record, path), CHUNK_SIZE)
+    return io.TextIOWrapper(reader, errors="replace")
+
+
+def verify_artifacts(result: Dict, results_dir: str):
+    """
+    Read every artifact of a results document back and check it against its record.
+
+    Args:
+        result: Results document
+        results_dir: Directory containing the results document
+
+    Raises:
+        CorruptArtifact: If an artifact is missing, unreadable or does not
+            match its record
+    """
+    for record in result_artifacts(result):
+        try:
+            with open_raw_output(record, results_dir) as stream:
+                while stream.read(CHUNK_SIZE):
+                    pass
+        except (OSError, RuntimeError) as e:
+            raise CorruptArtifact(f"cannot read {record['path']}: {e}") from e
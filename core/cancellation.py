@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# cancellation.py
+# Scan-wide deadline and cooperative cancellation
+
+import threading
+import time
+from typing import Optional
+
+
+class ScanCancelled(Exception):
+    """Raised inside a plugin whose scan was cancelled or ran past its deadline."""
+
+
+class CancellationToken:
+    """
+    Shared flag telling a scan to stop, set explicitly or by a deadline.
+
+    The orchestrator stops starting plugins once the token is cancelled,
+    and running plugins terminate their tool's process group. The token
+    is thread-safe and can be cancelled from a signal handler.
+    """
+
+    def __init__(self, timeout: float = None):
+        """
+        Initialize the token.
+
+        Args:
+            timeout: Seconds from now after which the token counts as
+                cancelled (None for no deadline)
+        """
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.expires_at = None if timeout is None else time.time() + timeout  # Wall clock, for other processes
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+
+    @classmethod
+    def until(cls, timestamp: float) -> "CancellationToken":
+        """Return a token whose deadline is a wall-clock time, e.g. another process's expires_at."""
+        return cls(timeout=max(0.0, timestamp - time.time()))
+
+    def cancel(self, reason: str = "Scan cancelled"):
+        """
+        Cancel the scan.
+
+        Args:
+            reason: Why the scan is cancelled, recorded in unfinished results
+        """
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Return True once cancel() was called or the deadline has passed."""
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("Scan deadline reached")
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """
+        Return seconds left before the token is cancelled.
+
+        Returns:
+            0 if already cancelled, None if there is no deadline
+        """
+        if self.cancelled:
+            return 0.0
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Sleep until the token is cancelled or timeout expires.
+
+        Args:
+            timeout: Longest time to wait in seconds (None to wait for cancellation)
+
+        Returns:
+            True if the token is cancelled
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        self._event.wait(timeout)
+        return self.cancelled
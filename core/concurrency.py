@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# concurrency.py
+# AIMD controller for the number of plugins run at once
+
+import collections
+import logging
+import math
+import os
+import time
+from typing import Dict, Optional
+
+
+def memory_available_fraction() -> Optional[float]:
+    """
+    Return the fraction of memory available to new processes.
+
+    Returns:
+        MemAvailable / MemTotal from /proc/meminfo, or None where unavailable
+    """
+    try:
+        with open("/proc/meminfo", "r") as f:
+            fields = dict(line.split(":", 1) for line in f)
+        total = int(fields["MemTotal"].split()[0])
+        available = int(fields["MemAvailable"].split()[0])
+    except (OSError, KeyError, ValueError):
+        return None
+    return available / total if total else None
+
+
+def load_per_cpu() -> Optional[float]:
+    """Return the one-minute load average divided by the number of CPUs, or None where unavailable."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except OSError:
+        return None
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase/multiplicative-decrease limit on in-flight plugins.
+
+    While the host load average, memory headroom and the recent plugin
+    failure/timeout rate all look healthy and the limit is actually
+    reached, the limit grows by one per interval. When any signal turns
+    bad it is halved, down to minimum. With minimum == maximum the limit
+    is fixed and no signals are sampled.
+    """
+
+    def __init__(self, initial: int = 3, minimum: int = 1, maximum: int = None,
+                 interval: float = 5.0, load_high: float = 1.0, memory_low: float = 0.1,
+                 error_rate_high: float = 0.25, window: int = 20):
+        """
+        Initialize the controller.
+
+        Args:
+            initial: Starting limit
+            minimum: Lowest limit to back off to
+            maximum: Highest limit to grow to (defaults to 4 per CPU)
+            interval: Seconds between adjustments
+            load_high: One-minute load average per CPU considered overloaded
+            memory_low: Available memory fraction considered too low
+            error_rate_high: Failure/timeout rate of recent plugins considered too high
+            window: Number of recent plugin results the error rate is taken over
+        """
+        self.maximum = maximum or 4 * (os.cpu_count() or 1)
+        self.minimum = min(minimum, self.maximum)
+        self.limit = max(self.minimum, min(initial, self.maximum))
+        self.interval = interval
+        self.load_high = load_high
+        self.memory_low = memory_low
+        self.error_rate_high = error_rate_high
+        self.logger = logging.getLogger("kast.concurrency")
+        self._outcomes = collections.deque(maxlen=window)
+        self._last_adjusted = time.monotonic()
+
+    @classmethod
+    def fixed(cls, limit: int) -> "AdaptiveConcurrency":
+        """Return a controller that keeps a constant limit."""
+        return cls(initial=limit, minimum=limit, maximum=limit)
+
+    @classmethod
+    def from_setting(cls, setting, maximum: int = None) -> "AdaptiveConcurrency":
+        """
+        Build a controller from a max_concurrent setting.
+
+        Args:
+            setting: A fixed limit, or "auto" for an adaptive one
+            maximum: Ceiling for the adaptive limit
+
+        Returns:
+            Configured controller
+
+        Raises:
+            ValueError: If the setting is neither "auto" nor a positive integer
+        """
+        if setting == "auto":
+            return cls(maximum=maximum)
+        limit = int(setting)
+        if limit < 1:
+            raise ValueError(f"concurrency limit must be at least 1, got {limit}")
+        return cls.fixed(limit)
+
+    @property
+    def adaptive(self) -> bool:
+        return self.minimum < self.maximum
+
+    def record(self, result: Dict):
+        """
+        Count the outcome of a finished plugin towards the error rate.
+
+        Args:
+            result: Result returned by the plugin
+        """
+        status = str(result.get("status", "")).lower()
+        if status in ("skipped", "not run", "cancelled") or result.get("cached") or result.get("resumed"):
+            return
+        self._outcomes.append(status in ("failed", "timeout"))
+
+    def _problem(self) -> Optional[str]:
+        load = load_per_cpu()
+        if load is not None and load > self.load_high:
+            return f"load average {load:.2f} per CPU"
+        memory = memory_available_fraction()
+        if memory is not None and memory < self.memory_low:
+            return f"only {memory:.0%} of memory available"
+        if len(self._outcomes) >= 4:
+            error_rate = sum(self._outcomes) / len(self._outcomes)
+            if error_rate > self.error_rate_high:
+                return f"{error_rate:.0%} of recent plugins failed or timed out"
+        return None
+
+    def update(self, saturated: bool) -> int:
+        """
+        Adjust the limit if an interval has passed since the last change.
+
+        Args:
+            saturated: Whether as many plugins as the limit allows are
+                running, i.e. a higher limit would be used
+
+        Returns:
+            Current limit
+        """
+        now = time.monotonic()
+        if not self.adaptive or now - self._last_adjusted < self.interval:
+            return self.limit
+
+        problem = self._problem()
+        if problem:
+            limit = max(self.minimum, math.floor(self.limit / 2))
+            if limit != self.limit:
+                self.logger.info(f"Reducing concurrency to {limit}: {problem}")
+            self.limit = limit
+            # Judge the new limit on fresh outcomes
+            self._outcomes.clear()
+        elif saturated and self.limit < self.maximum:
+            self.limit += 1
+            self.logger.debug(f"Raising concurrency to {self.limit}")
+        self._last_adjusted = now
+        return self.limit
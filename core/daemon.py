@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# daemon.py
+# Long-running KAST daemon accepting scan jobs over a local Unix socket
+
+import itertools
+import json
+import logging
+import os
+import queue
+import select
+import socket
+import socketserver
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+# Events a job may have waiting for its client; a slow client holds the job back
+EVENT_QUEUE_SIZE = 256
+
+from core.cancellation import CancellationToken
+from core.concurrency import AdaptiveConcurrency
+from core.history import RuntimeHistory
+from core.journal import open_run_journal
+from core.liveness import LivenessChecker
+from core.registry import PluginManifest
+from core.result_cache import ResultCache
+from core.scanner import ScanOrchestrator
+from core.utils import parse_shard, read_targets, shard_targets
+
+
+def default_socket_path() -> str:
+    """
+    Return the socket path used when none is given.
+
+    Honours $KAST_SOCKET, then $XDG_RUNTIME_DIR, and falls back to a
+    per-user socket in the temporary directory.
+    """
+    if os.environ.get("KAST_SOCKET"):
+        return os.environ["KAST_SOCKET"]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "kast.sock")
+    return os.path.join(tempfile.gettempdir(), f"kast-{os.getuid()}.sock")
+
+
+def _send(stream, message: Dict):
+    stream.write((json.dumps(message, default=str) + "\n").encode())
+    stream.flush()
+
+
+class _ScanJob:
+    """A queued scan request and the events streamed back to its client."""
+
+    def __init__(self, job_id: int, request: Dict):
+        self.id = job_id
+        self.request = request
+        self.events: "queue.Queue[Dict]" = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.state = "queued"
+        self.cancel_token: Optional[CancellationToken] = None
+        self.cancel_reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> CancellationToken:
+        """
+        Create the job's cancellation token as it starts running.
+
+        The request's deadline counts from here, not from submission. A
+        job cancelled while queued gets an already cancelled token.
+        """
+        with self._lock:
+            self.cancel_token = CancellationToken(timeout=self.request.get("deadline"))
+            if self.cancel_reason:
+                self.cancel_token.cancel(self.cancel_reason)
+            return self.cancel_token
+
+    def cancel(self, reason: str):
+        """Cancel the job, whether it is queued or running."""
+        with self._lock:
+            if self.cancel_reason is None:
+                self.cancel_reason = reason
+            if self.cancel_token is not None:
+                self.cancel_token.cancel(reason)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Serves one client connection: a single newline-delimited JSON request."""
+
+    def handle(self):
+        daemon: KASTDaemon = self.server.kast_daemon
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+        except ValueError:
+            _send(self.wfile, {"event": "error", "error": "request is not valid JSON"})
+            return
+
+        op = request.get("op")
+        if op == "ping":
+            _send(self.wfile, {"event": "pong", "pid": os.getpid()})
+        elif op == "status":
+            _send(self.wfile, {"event": "status", **daemon.status()})
+        elif op == "scan":
+            self._stream_scan(daemon, request)
+        elif op == "cancel":
+            if daemon.cancel(request.get("job")):
+                _send(self.wfile, {"event": "cancelled", "job": request.get("job")})
+            else:
+                _send(self.wfile, {"event": "error", "error": f"no queued or running job {request.get('job')!r}"})
+        else:
+            _send(self.wfile, {"event": "error", "error": f"unknown op {op!r}"})
+
+    def _stream_scan(self, daemon: "KASTDaemon", request: Dict):
+        job = daemon.submit(request)
+        threading.Thread(target=self._watch_client, args=(job,), name=f"kast-watch-{job.id}", daemon=True).start()
+        connected = True
+        while True:
+            event = job.events.get()
+            if connected:
+                try:
+                    _send(self.wfile, event)
+                except OSError:
+                    daemon.logger.warning(f"Client of job {job.id} disconnected, cancelling it")
+                    job.cancel("Client disconnected")
+                    connected = False
+            # Keep draining after a disconnect so the job is never blocked
+            # on a full event queue while it winds down
+            if event["event"] in ("done", "error"):
+                return
+
+    def _watch_client(self, job: _ScanJob):
+        """Cancel the job if its client closes the connection before it finishes."""
+        while job.state != "finished":
+            try:
+                readable, _, _ = select.select([self.connection], [], [], 0.5)
+                if readable and not self.connection.recv(4096):
+                    break
+            except (OSError, ValueError):
+                break
+        else:
+            return
+        if job.state != "finished":
+            job.cancel("Client disconnected")
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class KASTDaemon:
+    """
+    Keeps plugins, probe results and a worker pool warm between scans.
+
+    Clients connect to a Unix socket and send one JSON request per
+    connection. Scan requests are queued and run by a fixed number of
+    runner threads, all sharing one plugin executor; per-plugin results
+    are streamed back as newline-delimited JSON events:
+
+        queued: the job was accepted (with its id and queue position)
+        result: one plugin finished against one target
+        done: the job finished
+        error: the request could not be run
+
+    A job is cancelled by a cancel request naming its id, or when its
+    client disconnects; its unfinished plugins are then reported as
+    cancelled, as in a local scan.
+    """
+
+    def __init__(self, plugins: List[PluginManifest], socket_path: str = None,
+                 max_concurrent: int = 8, workers: int = 2, history: RuntimeHistory = None):
+        """
+        Initialize the daemon.
+
+        Args:
+            plugins: Manifests of the plugins scans may use. Plugin modules
+                stay imported once a scan has scheduled them.
+            socket_path: Unix socket to listen on (see default_socket_path)
+            max_concurrent: Size of the plugin worker pool shared by all jobs
+            workers: Number of scan jobs run at once
+            history: Runtime history shared by all jobs, if any
+        """
+        self.plugins = plugins
+        self.socket_path = socket_path or default_socket_path()
+        self.max_concurrent = max_concurrent
+        self.workers = workers
+        self.history = history
+        self.logger = logging.getLogger("kast.daemon")
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="kast-plugin")
+        self._jobs: "queue.Queue[Optional[_ScanJob]]" = queue.Queue()
+        self._job_ids = itertools.count(1)
+        self._active: Dict[int, _ScanJob] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[_UnixServer] = None
+
+    def submit(self, request: Dict) -> _ScanJob:
+        """
+        Queue a scan request.
+
+        Args:
+            request: Scan request as sent by submit_scan
+
+        Returns:
+            Queued job
+        """
+        job = _ScanJob(next(self._job_ids), request)
+        with self._lock:
+            self._active[job.id] = job
+            position = sum(1 for active in self._active.values() if active.state == "queued")
+        job.events.put({"event": "queued", "job": job.id, "position": position})
+        self._jobs.put(job)
+        return job
+
+    def cancel(self, job_id: int, reason: str = "Cancelled by client") -> bool:
+        """
+        Cancel a queued or running job.
+
+        Args:
+            job_id: Id of the job, as sent in its queued event
+            reason: Why the job is cancelled, recorded in unfinished results
+
+        Returns:
+            False if there is no such job
+        """
+        with self._lock:
+            job = self._active.get(job_id)
+        if job is None:
+            return False
+        self.logger.info(f"Cancelling job {job_id}: {reason}")
+        job.cancel(reason)
+        return True
+
+    def status(self) -> Dict:
+        """Return the ids of queued and running jobs."""
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "queued": [job.id for job in self._active.values() if job.state == "queued"],
+                "running": [job.id for job in self._active.values() if job.state == "running"],
+            }
+
+    def _run_job(self, job: _ScanJob):
+        request = job.request
+        config = request.get("config") or {}
+        output_dir = request["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+
+        targets = None
+        if request.get("targets_file"):
+            targets = read_targets(request["targets_file"])
+        elif request.get("targets") is not None:
+            targets = request["targets"]
+        if targets is not None and request.get("shard"):
+            targets = shard_targets(targets, *parse_shard(request["shard"]))
+
+        result_cache = None if request.get("no_cache") else ResultCache.from_config(config, output_dir)
+
+        journal = open_run_journal(output_dir)
+        orchestrator = ScanOrchestrator(
+            target=request.get("target"),
+            output_dir=output_dir,
+            plugins=self.plugins,
+            config=config,
+            targets=targets,
+            journal=journal,
+            result_cache=result_cache,
+            history=None if request.get("no_history") else self.history,
+            cancel_token=job.start(),
+            liveness=LivenessChecker.from_config(config),
+            metadata={
+                "targets_file": request.get("targets_file"),
+                "shard": request.get("shard"),
+                "daemon_job": job.id
+            }
+        )
+        count = 0
+        try:
+            for result in orchestrator.iter_scans(
+                per_target_limit=request.get("per_target_limit"),
+                executor=self.executor,
+                concurrency=AdaptiveConcurrency.from_setting(
+                    request.get("max_concurrent", 3), maximum=self.max_concurrent
+                )
+            ):
+                job.events.put({"event": "result", "job": job.id, "result": result})
+                count += 1
+        finally:
+            journal.close()
+        return count
+
+    def _runner(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            job.state = "running"
+            self.logger.info(f"Starting job {job.id} against {job.request.get('target') or 'batch targets'}")
+            try:
+                count = self._run_job(job)
+                job.events.put({"event": "done", "job": job.id, "results": count})
+            except Exception as e:
+                self.logger.error(f"Job {job.id} failed: {e}")
+                job.events.put({"event": "error", "job": job.id, "error": str(e)})
+            finally:
+                job.state = "finished"
+                with self._lock:
+                    del self._active[job.id]
+
+    def _claim_socket(self):
+        """Remove a stale socket, refusing to replace one a daemon still listens on."""
+        if not os.path.exists(self.socket_path):
+            return
+        if daemon_available(self.socket_path):
+            raise RuntimeError(f"a KAST daemon is already listening on {self.socket_path}")
+        os.unlink(self.socket_path)
+
+    def serve_forever(self):
+        """Listen for jobs until shutdown() is called."""
+        self._claim_socket()
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+
+        # Only the owning user may submit scans
+        old_umask = os.umask(0o177)
+        try:
+            self._server = _UnixServer(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        self._server.kast_daemon = self
+
+        runners = [
+            threading.Thread(target=self._runner, name=f"kast-job-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for runner in runners:
+            runner.start()
+
+        self.logger.info(f"KAST daemon listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            for _ in runners:
+                self._jobs.put(None)
+            self.executor.shutdown(wait=False)
+
+    def shutdown(self):
+        """Stop accepting connections; serve_forever() then returns."""
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def _connect(socket_path: str, timeout: Optional[float]) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def daemon_available(socket_path: str = None, timeout: float = 1.0) -> bool:
+    """
+    Check whether a daemon answers on a socket.
+
+    Args:
+        socket_path: Socket to check (see default_socket_path)
+        timeout: Seconds to wait for the answer
+
+    Returns:
+        True if a daemon replied to a ping
+    """
+    socket_path = socket_path or default_socket_path()
+    try:
+        with _connect(socket_path, timeout) as sock, sock.makefile("rwb") as stream:
+            _send(stream, {"op": "ping"})
+            return json.loads(stream.readline()).get("event") == "pong"
+    except (OSError, ValueError):
+        return False
+
+
+def cancel_scan(job_id: int, socket_path: str = None, timeout: float = 5.0) -> bool:
+    """
+    Ask a running daemon to cancel a job.
+
+    The job's client keeps receiving its events; the unfinished plugins
+    arrive as cancelled results, followed by the done event.
+
+    Args:
+        job_id: Id of the job, as sent in its queued event
+        socket_path: Daemon socket (see default_socket_path)
+        timeout: Seconds to wait for the answer
+
+    Returns:
+        True if the daemon cancelled the job, False if it had no such job
+    """
+    socket_path = socket_path or default_socket_path()
+    with _connect(socket_path, timeout) as sock, sock.makefile("rwb") as stream:
+        _send(stream, {"op": "cancel", "job": job_id})
+        return json.loads(stream.readline()).get("event") == "cancelled"
+
+
+def submit_scan(request: Dict, socket_path: str = None) -> Iterator[Dict]:
+    """
+    Submit a scan to a running daemon and stream its events.
+
+    Args:
+        request: Scan request with output_dir (absolute), target, targets
+            or targets_file, config, max_concurrent (a number or "auto"),
+            per_target_limit, no_cache, no_history, shard and deadline
+            (seconds) keys
+        socket_path: Daemon socket (see default_socket_path)
+
+    Yields:
+        Events sent by the daemon, ending with a done or error event
+
+    Raises:
+        ConnectionError: If the daemon closes the connection early
+    """
+    socket_path = socket_path or default_socket_path()
+    with _connect(socket_path, None) as sock, sock.makefile("rwb") as stream:
+        _send(stream, {"op": "scan", **request})
+        for line in stream:
+            event = json.loads(line)
+            yield event
+            if event["event"] in ("done", "error"):
+                return
+    raise ConnectionError(f"KAST daemon on {socket_path} closed the connection")
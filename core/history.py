@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# history.py
+# Local store of plugin runtimes, used to order work and estimate ETAs
+
+import ipaddress
+import logging
+import math
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from core.utils import target_host
+
+DEFAULT_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "kast", "history.db")
+SAMPLES = 50  # Runtimes kept per plugin and target class
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runtimes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    plugin TEXT NOT NULL,
+    target_class TEXT NOT NULL,
+    duration REAL NOT NULL,
+    status TEXT NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runtimes_key ON runtimes (plugin, target_class, id);
+"""
+
+
+def target_class(target: str) -> str:
+    """
+    Classify a target for runtime statistics.
+
+    Runtimes of the same plugin vary mostly with the kind of target, so
+    history is kept per scheme and host type, e.g. "https:domain" or
+    "bare:ip".
+
+    Args:
+        target: Target URL or domain
+
+    Returns:
+        Target class name
+    """
+    scheme = urlsplit(target.strip()).scheme.lower() if "://" in target else "bare"
+    try:
+        ipaddress.ip_address(target_host(target))
+        host_type = "ip"
+    except ValueError:
+        host_type = "domain"
+    return f"{scheme}:{host_type}"
+
+
+class RuntimeHistory:
+    """
+    SQLite store of how long plugins took against each target class.
+
+    Only the most recent SAMPLES runtimes per plugin and target class
+    are kept. Estimates are the median of those runtimes, falling back
+    to the plugin's runtimes against any target class.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Initialize the store, creating the database if needed.
+
+        Args:
+            path: Database file (defaults to ~/.cache/kast/history.db)
+        """
+        self.path = path or DEFAULT_HISTORY_PATH
+        self.logger = logging.getLogger("kast.history")
+        self._local = threading.local()
+        self._estimates: Dict[Tuple[str, str], Optional[float]] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def record(self, plugin: str, target: str, duration: float, status: str):
+        """
+        Store the runtime of a finished plugin.
+
+        Args:
+            plugin: Plugin name
+            target: Target the plugin ran against
+            duration: Runtime in seconds
+            status: Final plugin status
+        """
+        klass = target_class(target)
+        try:
+            connection = self._connection()
+            connection.execute(
+                "INSERT INTO runtimes (plugin, target_class, duration, status, recorded_at) VALUES (?, ?, ?, ?, ?)",
+                (plugin, klass, duration, status, time.time())
+            )
+            connection.execute(
+                "DELETE FROM runtimes WHERE plugin = ? AND target_class = ? AND id NOT IN "
+                "(SELECT id FROM runtimes WHERE plugin = ? AND target_class = ? ORDER BY id DESC LIMIT ?)",
+                (plugin, klass, plugin, klass, SAMPLES)
+            )
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not record runtime of {plugin}: {e}")
+            return
+        with self._lock:
+            self._estimates.pop((plugin, klass), None)
+
+    def durations(self, plugin: str, target: str = None, statuses: Tuple[str, ...] = None) -> List[float]:
+        """
+        Return recorded runtimes of a plugin, newest first.
+
+        Args:
+            plugin: Plugin name
+            target: Only runtimes against this target's class, if given
+            statuses: Only runs that ended with one of these statuses, if given
+
+        Returns:
+            Runtimes in seconds
+        """
+        query = "SELECT duration FROM runtimes WHERE plugin = ?"
+        params: list = [plugin]
+        if target is not None:
+            query += " AND target_class = ?"
+            params.append(target_class(target))
+        if statuses:
+            query += f" AND status IN ({','.join('?' * len(statuses))})"
+            params.extend(statuses)
+        query += " ORDER BY id DESC"
+        try:
+            return [row[0] for row in self._connection().execute(query, params)]
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not read runtime history of {plugin}: {e}")
+            return []
+
+    def learned_timeout(self, plugin: str, target: str, factor: float = 3.0, minimum: float = 30,
+                        maximum: float = 3600, min_samples: int = 5) -> Optional[Dict]:
+        """
+        Derive a timeout from a plugin's completed runtimes against a target class.
+
+        The timeout is the 95th percentile runtime times factor, clamped
+        to [minimum, maximum].
+
+        Args:
+            plugin: Plugin name
+            target: Target to scan
+            factor: Multiplier applied to the 95th percentile
+            minimum: Shortest timeout to return
+            maximum: Longest timeout to return
+            min_samples: Completed runs needed before a timeout is learned
+
+        Returns:
+            Dict with the timeout in seconds, the p95, factor and sample
+            count, or None without enough history
+        """
+        durations = sorted(self.durations(plugin, target, statuses=("completed",)))
+        if len(durations) < min_samples:
+            return None
+        p95 = durations[math.ceil(0.95 * len(durations)) - 1]
+        return {
+            "seconds": round(max(minimum, min(maximum, p95 * factor)), 1),
+            "p95_seconds": p95,
+            "factor": factor,
+            "samples": len(durations),
+        }
+
+    def expected(self, plugin: str, target: str) -> Optional[float]:
+        """
+        Estimate how long a plugin will take against a target.
+
+        Args:
+            plugin: Plugin name
+            target: Target to scan
+
+        Returns:
+            Median past runtime in seconds, or None without history
+        """
+        key = (plugin, target_class(target))
+        with self._lock:
+            if key in self._estimates:
+                return self._estimates[key]
+
+        durations = self.durations(plugin, target) or self.durations(plugin)
+        estimate = statistics.median(durations) if durations else None
+        with self._lock:
+            self._estimates[key] = estimate
+        return estimate
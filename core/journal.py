@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# journal.py
+# Append-only scan journal used to resume interrupted runs
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from core.plugin_base import PluginStatus
+
+JOURNAL_NAME = "journal.jsonl"
+
+
+class JournalState:
+    """What a journal says about an earlier run."""
+
+    def __init__(self):
+        self.plan: Dict = {}
+        self.targets: List[str] = []
+        # Targets whose latest liveness probe failed
+        self.unreachable = set()
+        # target -> plugin -> {"status": ..., "results_file": ...}
+        self.finished: Dict[str, Dict[str, Dict]] = {}
+        self.running = set()
+
+
+class ScanJournal:
+    """
+    Append-only JSON Lines journal of a scan run.
+
+    Records the plan, liveness probes, every target as it is admitted,
+    and each plugin's transitions to running and to a final status with
+    the location of its results. Every event is flushed and fsynced, and a torn last line is
+    ignored on load, so the journal survives crashes at any point.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the journal.
+
+        Args:
+            path: Journal file, created on first write
+        """
+        self.path = path
+        self.logger = logging.getLogger("kast.journal")
+        self._lock = threading.Lock()
+        self._handle = None
+
+    def record(self, event: str, **fields):
+        """
+        Append an event to the journal.
+
+        Args:
+            event: Event type (plan, liveness, target, running or finished)
+            **fields: Event data
+        """
+        entry = {"event": event, "time": datetime.utcnow().isoformat(), **fields}
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if self._handle is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._handle = open(self.path, "a")
+            self._handle.write(line)
+            self._handle.flush()
+            os.fsync(self._handle.fileno())
+
+    def close(self):
+        """Close the journal file."""
+        with self._lock:
+            if self._handle is not None:
+                self._handle.close()
+                self._handle = None
+
+    def load(self) -> JournalState:
+        """
+        Replay the journal.
+
+        Returns:
+            State of the run as far as it was recorded
+        """
+        state = JournalState()
+        if not os.path.exists(self.path):
+            return state
+
+        seen_targets = set()
+        with open(self.path, "r") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    self.logger.warning(f"Ignoring unreadable journal line {line_number} in {self.path}")
+                    continue
+
+                event = entry.get("event")
+                if event == "plan":
+                    state.plan = entry
+                elif event == "liveness":
+                    if entry.get("alive"):
+                        state.unreachable.discard(entry["target"])
+                    else:
+                        state.unreachable.add(entry["target"])
+                elif event == "target" and entry["target"] not in seen_targets:
+                    seen_targets.add(entry["target"])
+                    state.targets.append(entry["target"])
+                elif event == "running":
+                    state.running.add((entry["target"], entry["plugin"]))
+                elif event == "finished":
+                    state.running.discard((entry["target"], entry["plugin"]))
+                    if entry["status"] == PluginStatus.CANCELLED.value:
+                        # Cut short by a deadline or interrupt; rerun on resume
+                        state.finished.get(entry["target"], {}).pop(entry["plugin"], None)
+                        continue
+                    state.finished.setdefault(entry["target"], {})[entry["plugin"]] = {
+                        "status": entry["status"],
+                        "results_file": entry.get("results_file"),
+                    }
+        return state
+
+
+def open_run_journal(output_dir: str, resume: bool = False) -> ScanJournal:
+    """
+    Return the journal of the run in an output directory.
+
+    A fresh run starts a new journal; an existing one is moved aside so
+    it is not resumed by accident.
+
+    Args:
+        output_dir: Output directory of the run
+        resume: Whether the run resumes the existing journal
+
+    Returns:
+        Journal at <output_dir>/journal.jsonl
+    """
+    journal_path = os.path.join(output_dir, JOURNAL_NAME)
+    if not resume and os.path.exists(journal_path):
+        os.replace(journal_path, f"{journal_path}.{int(time.time())}")
+    return ScanJournal(journal_path)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# liveness.py
+# Concurrent reachability probes run before any plugin is started
+
+import asyncio
+import itertools
+import logging
+import queue
+import ssl
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from core.utils import DEFAULT_PORTS, target_host
+
+MODES = ("skip", "passive")
+
+
+class LivenessChecker:
+    """
+    Checks which targets answer at all, thousands at a time.
+
+    Each target gets a TCP connect to its port (from the URL, or 443 and
+    80 for bare hosts) with a short timeout, optionally followed by an
+    HTTP HEAD request. Targets are probed in batches on an event loop in
+    a background thread, ahead of the scan consuming them, so target
+    streams stay streamed and probing overlaps with scanning.
+
+    mode decides what happens to unreachable targets: "skip" drops them,
+    "passive" runs only their passive plugins.
+    """
+
+    def __init__(self, mode: str = "skip", timeout: float = 2.0, ports: List[int] = None,
+                 http: bool = False, concurrency: int = 500, batch_size: int = 1000):
+        """
+        Initialize the checker.
+
+        Args:
+            mode: "skip" or "passive" (see class docstring)
+            timeout: Seconds allowed per connect and per HTTP response
+            ports: Ports tried for targets without a scheme or port
+                (default 443 and 80)
+            http: Also require an answer to HEAD on an open port
+            concurrency: Probes in flight at once
+            batch_size: Targets read ahead and probed together
+
+        Raises:
+            ValueError: If mode is unknown
+        """
+        if mode not in MODES:
+            raise ValueError(f"liveness mode must be one of {', '.join(MODES)}, got {mode!r}")
+        self.mode = mode
+        self.timeout = timeout
+        self.ports = ports or [443, 80]
+        self.http = http
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.logger = logging.getLogger("kast.liveness")
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["LivenessChecker"]:
+        """
+        Build the checker described by the liveness configuration key.
+
+        Args:
+            config: Scan configuration; liveness is a mapping with mode,
+                timeout, ports, http, concurrency and batch_size keys
+
+        Returns:
+            Configured checker, or None if liveness checks are off
+        """
+        settings = config.get("liveness")
+        if not settings or settings.get("mode", "skip") == "off":
+            return None
+        return cls(
+            mode=settings.get("mode", "skip"),
+            timeout=settings.get("timeout", 2.0),
+            ports=settings.get("ports"),
+            http=settings.get("http", False),
+            concurrency=settings.get("concurrency", 500),
+            batch_size=settings.get("batch_size", 1000),
+        )
+
+    def describe(self) -> Dict:
+        """Return the settings, for the run metadata."""
+        return {"mode": self.mode, "timeout": self.timeout, "ports": self.ports, "http": self.http}
+
+    def _endpoints(self, target: str) -> Tuple[str, List[Tuple[int, bool]], str]:
+        """Return the host, the (port, use TLS) pairs to try and the HEAD path for a target."""
+        host = target_host(target)
+        if "://" in target:
+            parts = urlsplit(target.strip())
+            scheme = parts.scheme.lower()
+            port = parts.port or DEFAULT_PORTS.get(scheme, 80)
+            return host, [(port, scheme == "https")], parts.path or "/"
+        return host, [(port, port == 443) for port in self.ports], "/"
+
+    async def _head(self, host: str, port: int, tls: bool, path: str) -> Optional[int]:
+        """Send HEAD and return the response status, or None if there is no HTTP answer."""
+        context = None
+        if tls:
+            # Reachability only; certificates are the plugins' business
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context, server_hostname=host if tls else None),
+            self.timeout
+        )
+        try:
+            writer.write(f"HEAD {path} HTTP/1.0\r\nHost: {host}\r\nUser-Agent: kast\r\n\r\n".encode())
+            await writer.drain()
+            status_line = await asyncio.wait_for(reader.readline(), self.timeout)
+        finally:
+            writer.close()
+        parts = status_line.split()
+        if len(parts) >= 2 and parts[0].startswith(b"HTTP/") and parts[1].isdigit():
+            return int(parts[1])
+        return None
+
+    async def _try_port(self, host: str, port: int, tls: bool, path: str) -> Dict:
+        started = time.monotonic()
+        try:
+            if self.http:
+                status = await self._head(host, port, tls, path)
+                if status is None:
+                    return {"port": port, "error": "No HTTP response"}
+                return {"port": port, "http_status": status,
+                        "latency_ms": round((time.monotonic() - started) * 1000, 1)}
+            _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+            writer.close()
+            return {"port": port, "latency_ms": round((time.monotonic() - started) * 1000, 1)}
+        except asyncio.TimeoutError:
+            return {"port": port, "error": "Timed out"}
+        except (OSError, ssl.SSLError, UnicodeError) as e:
+            return {"port": port, "error": str(e) or type(e).__name__}
+
+    async def probe(self, target: str) -> Dict:
+        """
+        Check whether one target is reachable.
+
+        Args:
+            target: Target URL or domain
+
+        Returns:
+            Dict with alive, and the port, latency_ms and http_status of
+            the first answering port, or the error of each port tried
+        """
+        host, endpoints, path = self._endpoints(target)
+        if not host:
+            return {"alive": False, "errors": {"-": "No host in target"}}
+        attempts = await asyncio.gather(*(self._try_port(host, port, tls, path) for port, tls in endpoints))
+        for attempt in attempts:
+            if "error" not in attempt:
+                return {"alive": True, **attempt}
+        return {"alive": False, "errors": {str(attempt["port"]): attempt["error"] for attempt in attempts}}
+
+    async def probe_many(self, targets: List[str]) -> List[Dict]:
+        """Probe targets concurrently, at most `concurrency` at a time, returning results in order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(target: str) -> Dict:
+            async with semaphore:
+                return await self.probe(target)
+
+        return await asyncio.gather(*(bounded(target) for target in targets))
+
+    def check_stream(self, targets: Iterable[str]) -> Iterator[Tuple[str, Dict]]:
+        """
+        Probe a stream of targets ahead of the consumer.
+
+        Args:
+            targets: Targets to probe; consumed by a background thread
+
+        Yields:
+            (target, probe result) tuples, in target order
+        """
+        batches: "queue.Queue" = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def producer():
+            try:
+                iterator = iter(targets)
+                while True:
+                    batch = list(itertools.islice(iterator, self.batch_size))
+                    if not batch:
+                        break
+                    # A fresh loop per batch, isolated from any loop the scan runs on
+                    results = asyncio.run(self.probe_many(batch))
+                    if not put(list(zip(batch, results))):
+                        return
+            except Exception as e:
+                put(e)
+                return
+            put(None)
+
+        thread = threading.Thread(target=producer, name="kast-liveness", daemon=True)
+        thread.start()
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    return
+                if isinstance(batch, Exception):
+                    raise batch
+                yield from batch
+        finally:
+            stop.set()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# merge.py
+# Combine the output directories of sharded runs into one result set
+
+import json
+import logging
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, List, TextIO
+
+from core.artifacts import CorruptArtifact, verify_artifacts
+from core.journal import JOURNAL_NAME
+from core.utils import safe_target_name
+
+logger = logging.getLogger("kast.merge")
+
+
+def _read_plan(run_dir: str) -> Dict:
+    """Return the first plan event of a run's journal, or an empty dict."""
+    path = os.path.join(run_dir, JOURNAL_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("event") == "plan":
+                return entry
+    return {}
+
+
+def _place_file(source: str, destination: str, copy: bool, stats: Dict):
+    if os.path.exists(destination):
+        if os.path.getmtime(destination) >= os.path.getmtime(source):
+            logger.warning(f"Keeping newer {destination} over {source}")
+            stats["conflicts"] += 1
+            return
+        logger.warning(f"Replacing {destination} with newer {source}")
+        stats["conflicts"] += 1
+        os.unlink(destination)
+
+    if not copy:
+        try:
+            os.link(source, destination)
+            stats["files"] += 1
+            return
+        except OSError:
+            # Different filesystem or no hard link support
+            pass
+    shutil.copy2(source, destination)
+    stats["files"] += 1
+
+
+def _check_artifacts(results_path: str, stats: Dict):
+    """Read back the artifacts a results document references, counting damaged ones."""
+    try:
+        with open(results_path, "r") as f:
+            result = json.load(f)
+        verify_artifacts(result, os.path.dirname(results_path))
+    except ValueError as e:
+        # CorruptArtifact, or a results document that is not JSON
+        logger.warning(f"{results_path}: {e}")
+        stats["corrupt"] += 1
+
+
+def _merge_directory(source_dir: str, destination_dir: str, copy: bool, stats: Dict, skip=(), verify: bool = True):
+    os.makedirs(destination_dir, exist_ok=True)
+    with os.scandir(source_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and not entry.name.startswith(skip):
+                if verify and entry.name.endswith("_results.json"):
+                    _check_artifacts(entry.path, stats)
+                _place_file(entry.path, os.path.join(destination_dir, entry.name), copy, stats)
+
+
+def _merge_journal(run_dir: str, output_dir: str, journal: TextIO, stats: Dict):
+    path = os.path.join(run_dir, JOURNAL_NAME)
+    if not os.path.exists(path):
+        logger.warning(f"{run_dir} has no journal; only its result files are merged")
+        return
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("event") == "plan":
+                continue
+            if entry.get("event") == "finished" and entry.get("results_file"):
+                # Point at the merged copy of the results file
+                entry["results_file"] = os.path.join(
+                    output_dir, safe_target_name(entry["target"]), f"{entry['plugin']}_results.json"
+                )
+            journal.write(json.dumps(entry) + "\n")
+            stats["journal_events"] += 1
+
+
+def merge_runs(run_dirs: List[str], output_dir: str, copy: bool = False, verify: bool = True) -> Dict:
+    """
+    Merge the output directories of several runs, e.g. the shards of a scan.
+
+    The merged directory has the layout of a batch run: one subdirectory
+    per target holding its <plugin>_results.json files and raw output
+    artifacts, and a journal combining the runs' journals. Files are hard
+    linked where possible and everything is streamed, so the number of
+    result files does not affect memory use. If two runs hold the same
+    file, the newer one is kept.
+
+    Raw output artifacts are read back and checked against the sha256 in
+    their results document; damaged ones are logged and counted, and
+    still merged.
+
+    Args:
+        run_dirs: Output directories of the runs to merge
+        output_dir: Directory to write the merged result set to
+        copy: Copy files instead of hard linking them
+        verify: Check the artifacts
+
+    Returns:
+        Counts of merged runs, targets, files, conflicts, corrupt
+        artifacts and journal events
+    """
+    output_dir = os.path.abspath(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    stats = {"runs": 0, "targets": 0, "files": 0, "conflicts": 0, "corrupt": 0, "journal_events": 0}
+
+    plans = [_read_plan(run_dir) for run_dir in run_dirs]
+    plugins = []
+    for plan in plans:
+        plugins.extend(name for name in plan.get("plugins", []) if name not in plugins)
+
+    journal_path = os.path.join(output_dir, JOURNAL_NAME)
+    tmp_path = f"{journal_path}.merging"
+    with open(tmp_path, "w") as journal:
+        journal.write(json.dumps({
+            "event": "plan",
+            "time": datetime.utcnow().isoformat(),
+            "plugins": plugins,
+            "target": None,
+            "batch": True,
+            "merged_from": [os.path.abspath(run_dir) for run_dir in run_dirs],
+        }) + "\n")
+
+        for run_dir, plan in zip(run_dirs, plans):
+            if plan and not plan.get("batch"):
+                # A single-target run keeps its results at the top level
+                if plan.get("target"):
+                    _merge_directory(run_dir, os.path.join(output_dir, safe_target_name(plan["target"])),
+                                     copy, stats, skip=(JOURNAL_NAME, "queue.db"), verify=verify)
+                    stats["targets"] += 1
+            else:
+                with os.scandir(run_dir) as entries:
+                    for entry in entries:
+                        # Dot directories, e.g. the result cache, are not targets
+                        if entry.is_dir() and not entry.name.startswith("."):
+                            _merge_directory(entry.path, os.path.join(output_dir, entry.name), copy, stats,
+                                             verify=verify)
+                            stats["targets"] += 1
+            _merge_journal(run_dir, output_dir, journal, stats)
+            stats["runs"] += 1
+
+    os.replace(tmp_path, journal_path)
+    return stats
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# planner.py
+# Choose the plugins that fit a time budget
+
+import logging
+import statistics
+from typing import Dict, List, Optional
+
+from core.history import RuntimeHistory
+from core.scheduler import DependencyGraph
+
+logger = logging.getLogger("kast.planner")
+
+MAX_SEARCH_NODES = 200000  # Branches explored before settling for the best plan found
+
+
+def expected_durations(names: List[str], history: Optional[RuntimeHistory], target: str = None,
+                       default: float = 300) -> Dict[str, float]:
+    """
+    Estimate plugin runtimes from the runtime history.
+
+    Args:
+        names: Plugins to estimate
+        history: Runtime history, or None
+        target: Target whose class the estimates are for; without one,
+            runtimes against any target are used
+        default: Estimate when no plugin has any history, e.g. the timeout
+
+    Returns:
+        Mapping of plugin name to expected seconds. Plugins without history
+        get the median of the known estimates.
+    """
+    expected = {}
+    for name in names:
+        if history is None:
+            expected[name] = None
+        elif target is not None:
+            expected[name] = history.expected(name, target)
+        else:
+            durations = history.durations(name)
+            expected[name] = statistics.median(durations) if durations else None
+    known = [seconds for seconds in expected.values() if seconds is not None]
+    fallback = statistics.median(known) if known else default
+    return {name: fallback if seconds is None else seconds for name, seconds in expected.items()}
+
+
+def estimate_makespan(graph: DependencyGraph, durations: Dict[str, float], selected: List[str],
+                      slots: int = 1, targets: int = 1) -> float:
+    """
+    Estimate how long running a subset of the plugins takes.
+
+    The estimate is the larger of the longest dependency chain and the
+    total work spread over the worker slots, the usual lower bound for
+    list scheduling; the scheduler's longest-first order stays close to it.
+
+    Args:
+        graph: Dependency graph of all plugins
+        durations: Expected seconds per plugin
+        selected: Plugins to run (closed under dependencies)
+        slots: Plugins run at once
+        targets: Targets every plugin runs against
+
+    Returns:
+        Estimated seconds
+    """
+    chosen = set(selected)
+    finish: Dict[str, float] = {}
+    for name in graph.order:
+        if name in chosen:
+            finish[name] = durations[name] + max((finish[dep] for dep in graph.dependencies[name]), default=0.0)
+    chain = max(finish.values(), default=0.0)
+    work = targets * sum(durations[name] for name in chosen)
+    return max(chain, work / max(1, slots))
+
+
+class BudgetPlan:
+    """Plugins chosen to run within a time budget, in start order."""
+
+    def __init__(self, budget: Optional[float], selected: List[str], dropped: Dict[str, str],
+                 durations: Dict[str, float], values: Dict[str, float], estimated_seconds: float,
+                 optimal: bool = True):
+        self.budget = budget
+        self.selected = selected
+        self.dropped = dropped  # Plugin name -> why it was left out
+        self.durations = durations
+        self.values = values
+        self.estimated_seconds = estimated_seconds
+        self.optimal = optimal
+
+    @property
+    def value(self) -> float:
+        return sum(self.values[name] for name in self.selected)
+
+    @property
+    def coverage(self) -> float:
+        """Return the share of the total plugin value the plan covers."""
+        total = sum(self.values.values())
+        return self.value / total if total else 1.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "budget_seconds": self.budget,
+            "selected": self.selected,
+            "dropped": self.dropped,
+            "expected_seconds": self.durations,
+            "values": self.values,
+            "estimated_seconds": self.estimated_seconds,
+            "coverage": self.coverage,
+            "optimal": self.optimal,
+        }
+
+
+def plan_for_budget(graph: DependencyGraph, durations: Dict[str, float], values: Dict[str, float],
+                    budget: Optional[float], slots: int = 1, targets: int = 1) -> BudgetPlan:
+    """
+    Choose the plugins worth the most that are expected to finish within a budget.
+
+    A knapsack over the dependency graph: a plugin can only be chosen
+    with all of its dependencies, and the cost of a set of plugins is its
+    estimate_makespan. The search is a branch and bound over the plugins
+    in topological order, seeded with a greedy plan; if it explores more
+    than MAX_SEARCH_NODES branches the best plan found so far is used.
+    Ties in value go to the faster plan.
+
+    Args:
+        graph: Dependency graph of all plugins
+        durations: Expected seconds per plugin
+        values: Worth of each plugin's findings
+        budget: Seconds available, or None to run everything
+        slots: Plugins run at once
+        targets: Targets every plugin runs against
+
+    Returns:
+        The chosen plan, with plugins ordered longest critical path first
+    """
+    order = graph.order
+    if budget is None:
+        chosen = set(order)
+        optimal = True
+    else:
+        chosen, optimal = _search(graph, durations, values, budget, slots, targets)
+
+    # Start order: what the scheduler would do with these weights
+    weighted = DependencyGraph(
+        {name: graph.dependencies[name] for name in order if name in chosen},
+        {name: durations[name] for name in chosen}
+    )
+    selected = sorted(weighted.order, key=lambda name: (-weighted.priorities[name], order.index(name)))
+
+    dropped = {}
+    for name in order:
+        if name in chosen:
+            continue
+        missing = [dep for dep in graph.dependencies[name] if dep not in chosen]
+        dropped[name] = f"Depends on dropped plugin {missing[0]}" if missing else "Does not fit the time budget"
+
+    return BudgetPlan(
+        budget, selected, dropped, durations, values,
+        estimate_makespan(graph, durations, list(chosen), slots, targets), optimal
+    )
+
+
+def _search(graph: DependencyGraph, durations: Dict[str, float], values: Dict[str, float],
+            budget: float, slots: int, targets: int):
+    order = graph.order
+    slots = max(1, slots)
+    # Value still obtainable from position i onwards, for the bound
+    suffix = [0.0] * (len(order) + 1)
+    for i in range(len(order) - 1, -1, -1):
+        suffix[i] = suffix[i + 1] + max(0.0, values[order[i]])
+
+    best = _greedy(graph, durations, values, budget, slots, targets)
+    best_value = sum(values[name] for name in best)
+    best_cost = estimate_makespan(graph, durations, list(best), slots, targets)
+    nodes = 0
+    chosen: List[str] = []
+    finish: Dict[str, float] = {}
+
+    def visit(i: int, value: float, work: float, chain: float) -> bool:
+        nonlocal best, best_value, best_cost, nodes
+        nodes += 1
+        if nodes > MAX_SEARCH_NODES:
+            return False
+        cost = max(chain, targets * work / slots)
+        if value > best_value or (value == best_value and cost < best_cost):
+            best, best_value, best_cost = set(chosen), value, cost
+        if i == len(order) or value + suffix[i] < best_value:
+            return True
+
+        name = order[i]
+        if all(dep in finish for dep in graph.dependencies[name]):
+            end = durations[name] + max((finish[dep] for dep in graph.dependencies[name]), default=0.0)
+            new_work = work + durations[name]
+            # Costs only grow as plugins are added, so over-budget branches end here
+            if max(chain, end, targets * new_work / slots) <= budget:
+                chosen.append(name)
+                finish[name] = end
+                complete = visit(i + 1, value + values[name], new_work, max(chain, end))
+                chosen.pop()
+                del finish[name]
+                if not complete:
+                    return False
+        return visit(i + 1, value, work, chain)
+
+    optimal = visit(0, 0.0, 0.0, 0.0)
+    if not optimal:
+        logger.info(f"Budget planning stopped after {MAX_SEARCH_NODES} branches; the plan may not be optimal")
+    return best, optimal
+
+
+def _greedy(graph: DependencyGraph, durations: Dict[str, float], values: Dict[str, float],
+            budget: float, slots: int, targets: int) -> set:
+    """Add plugins (with their missing dependencies) by value per second while they fit."""
+    chosen: set = set()
+
+    def closure(name: str) -> set:
+        needed, pending = set(), [name]
+        while pending:
+            current = pending.pop()
+            if current not in chosen and current not in needed:
+                needed.add(current)
+                pending.extend(graph.dependencies[current])
+        return needed
+
+    while True:
+        candidates = []
+        for name in graph.order:
+            if name in chosen:
+                continue
+            needed = closure(name)
+            if estimate_makespan(graph, durations, list(chosen | needed), slots, targets) > budget:
+                continue
+            seconds = sum(durations[other] for other in needed)
+            value = sum(values[other] for other in needed)
+            candidates.append((value / seconds if seconds else float("inf"), value, name, needed))
+        if not candidates:
+            return chosen
+        _, value, _, needed = max(candidates, key=lambda candidate: candidate[:2])
+        if value <= 0:
+            return chosen
+        chosen |= needed
@@ -3,14 +3,33 @@
 # plugin_base.py
 
 import abc
+import asyncio
+import io
 import json
 import logging
 import os
+import shutil
 import subprocess
 import tempfile
+from contextlib import contextmanager
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List, Optional, Union, Any
+from typing import IO, Dict, List, Optional, Tuple, Union, Any
+
+from core.artifacts import result_artifacts, store_raw_output
+from core.cancellation import CancellationToken, ScanCancelled
+from core.probe_cache import DEFAULT_PROBE_TTL, get_probe_cache
+from core.process import (
+    ProcessGroupSampler,
+    apply_limits,
+    ionice_command,
+    limit_command,
+    terminate_process_group,
+    terminate_process_group_async,
+    wait_sampling_async,
+    wait_with_rusage,
+)
+from core.utils import read_tail
 
 class ScanType(Enum):
     """Enum defining the types of scans a plugin can perform."""
@@ -29,6 +48,8 @@ class PluginStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
     TIMEOUT = "timeout"
+    SKIPPED = "skipped"
+    CANCELLED = "cancelled"  # Stopped or never started because the scan was cancelled
 
 class PluginBase(abc.ABC):
     """Base class for all KAST scanner plugins.
@@ -47,18 +68,23 @@ class PluginBase(abc.ABC):
         """
         self.target = target
         self.output_dir = output_dir
-        self.config = config or {}
+        config = config or {}
+        # Settings under plugins.<name> override the global ones for this plugin
+        self.plugin_settings: Dict = config.get("plugins", {}).get(self.name, {})
+        self.config = {**config, **self.plugin_settings}
         self.logger = logging.getLogger(f"kast.plugins.{self.name}")
         self.status = PluginStatus.NOT_STARTED
         self.start_time = None
         self.end_time = None
-        self.raw_output = None
+        self.raw_output = None  # Capped tail of the output, for logging
+        self.raw_output_artifact = None
+        self.log_artifacts: Dict[str, Dict] = {}
+        self.termination = None
+        self.resources = None
         self.results = None
         self.dependencies: List[str] = []  # List of plugin names that must run first
-        self.concurrency_allowed: bool = True  # Default to allowing concurrency
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(output_dir, exist_ok=True)
+        self.concurrency_allowed: bool = True  # False makes the plugin run with no other plugin
+        self.cancel_token: Optional[CancellationToken] = None  # Set by the orchestrator
         
     @property
     @abc.abstractmethod
@@ -84,21 +110,108 @@ class PluginBase(abc.ABC):
         """Return how this plugin captures output."""
         pass
     
+    @property
+    def tool_binary(self) -> Optional[str]:
+        """Return the executable of the underlying tool, used to probe its version."""
+        return None
+    
     @property
     def version(self) -> str:
         """Return the version of the underlying tool."""
+        if self.tool_binary:
+            return self.probe_tool(self.tool_binary)["version"] or "unknown"
         return "unknown"
     
     @property
-    def timeout(self) -> int:
-        """Return the timeout in seconds for this plugin."""
+    def timeout(self) -> float:
+        """Return the timeout in seconds for this plugin.
+        
+        A timeout learned from the plugin's runtime history, passed in
+        as config["learned_timeout"], takes precedence.
+        """
+        if self.learned_timeout:
+            return self.learned_timeout["seconds"]
         return self.config.get("timeout", 300)  # Default 5 minutes
     
+    @property
+    def learned_timeout(self) -> Optional[Dict]:
+        """Return the timeout derived from runtime history, if one was applied."""
+        return self.config.get("learned_timeout")
+    
+    @property
+    def cache_ttl(self) -> float:
+        """Return how long, in seconds, cached results of this plugin may be reused (0 disables caching)."""
+        return self.config.get("cache_ttl", 0)
+    
+    @property
+    def kill_grace_period(self) -> float:
+        """Return how long to wait after SIGTERM before killing the tool's process group."""
+        return self.config.get("kill_grace_period", 5)
+    
+    @property
+    def output_tail_bytes(self) -> int:
+        """Return how much of the tool's output to keep in memory for logging."""
+        return self.config.get("output_tail_bytes", 8192)
+    
     @property
     def niceness(self) -> int:
         """Return the niceness value for this plugin."""
         return self.config.get("niceness", 10)  # Default niceness
     
+    @property
+    def io_class(self) -> Optional[str]:
+        """Return the I/O scheduling class (realtime, best-effort or idle) for this plugin."""
+        return self.config.get("io_class")
+    
+    @property
+    def io_priority(self) -> Optional[int]:
+        """Return the priority (0-7) within the plugin's I/O scheduling class."""
+        return self.config.get("io_priority")
+    
+    @property
+    def rlimits(self) -> Dict[str, int]:
+        """Return soft resource limits (cpu, address_space, open_files) for the tool."""
+        return self.config.get("rlimits", {})
+    
+    @property
+    def resource_claims(self) -> Dict[str, Any]:
+        """Return the resources the plugin occupies while running.
+        
+        Maps resource names such as cpu or network_heavy to amounts, and
+        exclusive to True for plugins that must run alone. The scheduler
+        only starts the plugin when the claimed capacity is free.
+        """
+        return self.config.get("resource_claims", {})
+    
+    @property
+    def value(self) -> float:
+        """Return the relative worth of the plugin's findings, used to plan under a time budget."""
+        return float(self.config.get("value", 1.0))
+    
+    @property
+    def request_rate(self) -> Optional[float]:
+        """Return the requests per second the tool should stay under, if limited."""
+        return self.config.get("request_rate")
+    
+    def probe_tool(self, binary: str, version_args: List[str] = None) -> Dict:
+        """Look up whether a tool is installed and its version.
+        
+        Results are shared by every plugin instance through an on-disk
+        cache, so the tool is only spawned once per host and TTL.
+        
+        Args:
+            binary: Name or path of the tool's executable
+            version_args: Arguments that make the tool print its version
+            
+        Returns:
+            Dict: Probe record with "available" and "version" keys
+        """
+        cache = get_probe_cache(
+            self.config.get("probe_cache_path"),
+            self.config.get("probe_cache_ttl", DEFAULT_PROBE_TTL)
+        )
+        return cache.probe(binary, version_args)
+    
     @abc.abstractmethod
     def check_dependencies(self) -> bool:
         """Check if all dependencies for this plugin are installed.
@@ -117,12 +230,30 @@ class PluginBase(abc.ABC):
         """
         pass
     
+    def rate_limit_args(self, rate: float) -> List[str]:
+        """Return the tool's arguments for limiting its request rate.
+        
+        Plugins whose tool has a rate flag override this; by default the
+        rate hint is ignored.
+        
+        Args:
+            rate: Requests per second to stay under
+            
+        Returns:
+            List[str]: Arguments appended to the command
+        """
+        return []
+    
     @abc.abstractmethod
-    def parse_output(self, raw_output: Union[str, bytes]) -> Dict:
+    def parse_output(self, raw_output: IO[str]) -> Dict:
         """Parse the raw output from the tool into a structured format.
         
+        The output is streamed to disk while the tool runs, so parsers get
+        a text file handle and should iterate over it rather than read it
+        whole where the format allows.
+        
         Args:
-            raw_output: The raw output from the tool execution
+            raw_output: Text file handle positioned at the start of the raw output
             
         Returns:
             Dict: Structured results
@@ -146,91 +277,349 @@ class PluginBase(abc.ABC):
         Returns:
             bool: True if plugin should run, False otherwise
         """
-        if not self.run_if():
-            self.status = PluginStatus.NOT_STARTED
-        return self._format_results(error="Run conditions not met")
         return True
 
+    def skip(self, reason: str) -> Dict:
+        """Record that the plugin was not run, e.g. because a dependency failed.
+        
+        Args:
+            reason: Why the plugin was skipped
+            
+        Returns:
+            Dict: Scan results
+        """
+        self.status = PluginStatus.SKIPPED
+        self.logger.warning(f"Skipping {self.name}: {reason}")
+        return self._format_results(error=reason)
+
+    def cancel(self, reason: str) -> Dict:
+        """Record that the plugin was not run because the scan was cancelled.
+        
+        Args:
+            reason: Why the scan was cancelled
+            
+        Returns:
+            Dict: Scan results
+        """
+        self.status = PluginStatus.CANCELLED
+        self.logger.warning(f"Not running {self.name}: {reason}")
+        return self._format_results(error=reason)
+
+    def _cancelled(self, error: ScanCancelled) -> Dict:
+        """Log a tool terminated because the scan was cancelled and return empty findings."""
+        self.logger.warning(
+            f"Plugin {self.name} cancelled: {error}, "
+            f"terminated {self.termination['processes_signalled']} processes "
+            f"({self.termination['processes_killed']} needed SIGKILL)"
+        )
+        self.status = PluginStatus.CANCELLED
+        return {}
+
     def run(self) -> Dict:
         """Execute the plugin and return results.
         
         Returns:
             Dict: Scan results in a standardized format
         """
+        if self.cancel_token and self.cancel_token.cancelled:
+            return self.cancel(self.cancel_token.reason)
         if not self.check_dependencies():
-            self.status = PluginStatus.FAILED
-            self.logger.error(f"Dependencies not met for {self.name}")
-            return self._format_results(error="Dependencies not met")
-        
-        self.status = PluginStatus.RUNNING
-        self.start_time = datetime.utcnow()
+            return self._dependencies_not_met()
         
+        self._start_run()
+        output_file = None
         try:
-            cmd = self.build_command()
+            cmd, output_file = self._prepare_command()
             self.logger.info(f"Executing: {' '.join(cmd)}")
             
-            # Handle different output methods
-            if self.output_method == OutputMethod.STDOUT:
-                # Capture output from stdout
-                process = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=self.timeout,
-                    check=False
-                )
-                self.raw_output = process.stdout
-                stderr_output = process.stderr
-                return_code = process.returncode
-                
-            elif self.output_method == OutputMethod.FILE:
-                # Tool writes to file directly, create a temp file path
-                output_file = os.path.join(self.output_dir, f"{self.name}_raw_output.json")
-                
-                # Add output file to command if needed
-                if "{output_file}" in cmd:
-                    cmd = [arg.replace("{output_file}", output_file) for arg in cmd]
-                
-                # Run the process
-                process = subprocess.run(
+            with self._spool_files() as (stdout_file, stderr_file):
+                # Own session so helpers forked by the tool can be killed with it
+                process = subprocess.Popen(
                     cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=self.timeout,
-                    check=False
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    start_new_session=True
                 )
-                
-                stderr_output = process.stderr
-                return_code = process.returncode
-                
-                # Read the output file if it exists
-                if os.path.exists(output_file):
-                    with open(output_file, 'r') as f:
-                        self.raw_output = f.read()
-                else:
-                    self.raw_output = ""
-            
-            # Check for errors
-            if return_code != 0:
-                self.logger.warning(f"Process returned non-zero exit code: {return_code}")
-                self.logger.warning(f"stderr: {stderr_output}")
+                apply_limits(process.pid, self.niceness, self.rlimits)
+                try:
+                    self.resources = wait_with_rusage(process, self.timeout, cancel=self.cancel_token)
+                except BaseException:
+                    self.termination = terminate_process_group(process.pid, self.kill_grace_period)
+                    self.resources = wait_with_rusage(process)
+                    raise
+            parsed_results = self._handle_output(process.returncode, output_file)
+        except Exception as e:
+            parsed_results = self._run_failed(e)
+        
+        return self._finish_run(output_file, parsed_results)
+    
+    async def run_async(self) -> Dict:
+        """Execute the plugin on the running event loop and return results.
+        
+        The tool is started with asyncio.create_subprocess_exec, so no
+        thread is held while it runs. Blocking steps (the dependency
+        check, archiving the output and probing the tool version for the
+        results) run on the loop's default executor.
+        
+        Returns:
+            Dict: Scan results in a standardized format
+        """
+        loop = asyncio.get_running_loop()
+        if self.cancel_token and self.cancel_token.cancelled:
+            return await loop.run_in_executor(None, self.cancel, self.cancel_token.reason)
+        if not await loop.run_in_executor(None, self.check_dependencies):
+            return await loop.run_in_executor(None, self._dependencies_not_met)
+        
+        self._start_run()
+        output_file = None
+        try:
+            cmd, output_file = self._prepare_command()
+            self.logger.info(f"Executing: {' '.join(cmd)}")
             
-            # Parse the output
-            parsed_results = self.parse_output(self.raw_output)
-            self.status = PluginStatus.COMPLETED
+            with self._spool_files() as (stdout_file, stderr_file):
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    start_new_session=True
+                )
+                apply_limits(process.pid, self.niceness, self.rlimits)
+                # The event loop reaps the tool, so usage is sampled from /proc
+                sampler = ProcessGroupSampler(process.pid)
+                try:
+                    await asyncio.wait_for(
+                        wait_sampling_async(process, sampler, cancel=self.cancel_token), timeout=self.timeout
+                    )
+                except (asyncio.TimeoutError, asyncio.CancelledError, ScanCancelled):
+                    # Shield cleanup so a cancelled scan still reaps the tool
+                    self.termination = await asyncio.shield(
+                        terminate_process_group_async(process.pid, self.kill_grace_period)
+                    )
+                    await asyncio.shield(process.wait())
+                    raise
+                finally:
+                    self.resources = sampler.usage()
+            parsed_results = self._handle_output(process.returncode, output_file)
+        except Exception as e:
+            parsed_results = self._run_failed(e)
+        
+        return await loop.run_in_executor(None, self._finish_run, output_file, parsed_results)
+    
+    def _dependencies_not_met(self) -> Dict:
+        """Record that the tool is missing and return the failed results."""
+        self.status = PluginStatus.FAILED
+        self.logger.error(f"Dependencies not met for {self.name}")
+        return self._format_results(error="Dependencies not met")
+    
+    def _start_run(self):
+        """Mark the plugin as running and create its output directory."""
+        self.status = PluginStatus.RUNNING
+        self.start_time = datetime.utcnow()
+        # Created only when something runs, so planning leaves the output tree alone
+        os.makedirs(self.output_dir, exist_ok=True)
+    
+    @contextmanager
+    def _spool_files(self):
+        """Open the files the tool's stdout and stderr are streamed to.
+        
+        Yields:
+            Tuple: stdout and stderr spool files, opened for binary writing
+        """
+        stdout_path, stderr_path = self._spool_paths()
+        with open(stdout_path, 'wb') as stdout_file, open(stderr_path, 'wb') as stderr_file:
+            yield stdout_file, stderr_file
+    
+    def _run_failed(self, error: Exception) -> Dict:
+        """Record why running the tool did not produce parsed results.
+        
+        Called from the except clause around the run, so unexpected
+        errors are logged with their traceback.
+        
+        Args:
+            error: Timeout, cancellation or unexpected error
             
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"Plugin {self.name} timed out after {self.timeout} seconds")
+        Returns:
+            Dict: Empty findings
+        """
+        if isinstance(error, (subprocess.TimeoutExpired, asyncio.TimeoutError)):
+            self.logger.error(
+                f"Plugin {self.name} timed out after {self.timeout} seconds, "
+                f"terminated {self.termination['processes_signalled']} processes "
+                f"({self.termination['processes_killed']} needed SIGKILL)"
+            )
             self.status = PluginStatus.TIMEOUT
-            parsed_results = {}
-        except Exception as e:
-            self.logger.exception(f"Error running plugin {self.name}: {str(e)}")
-            self.status = PluginStatus.FAILED
-            parsed_results = {}
+            return {}
+        if isinstance(error, ScanCancelled):
+            return self._cancelled(error)
+        self.logger.exception(f"Error running plugin {self.name}: {str(error)}")
+        self.status = PluginStatus.FAILED
+        return {}
+    
+    def _finish_run(self, output_file: Optional[str], parsed_results: Dict) -> Dict:
+        """Archive the tool's output and write the results.
         
+        Args:
+            output_file: Output file written by file-based plugins
+            parsed_results: Findings, empty if the run failed
+            
+        Returns:
+            Dict: Scan results in a standardized format
+        """
+        self._archive_raw_output(output_file)
         self.end_time = datetime.utcnow()
         return self._format_results(parsed_results=parsed_results)
     
+    def _prepare_command(self) -> Tuple[List[str], Optional[str]]:
+        """Build the command line and resolve the tool's output file.
+        
+        Returns:
+            Tuple: Command and arguments, and the output file path for
+            file-based plugins (None for stdout-based plugins)
+        """
+        cmd = self.build_command()
+        if self.request_rate:
+            cmd = cmd + self.rate_limit_args(self.request_rate)
+        output_file = None
+        
+        if self.output_method == OutputMethod.FILE:
+            # Tool writes to file directly, create a temp file path
+            output_file = os.path.join(self.output_dir, f"{self.name}_raw_output.json")
+            
+            # Add output file to command if needed
+            if "{output_file}" in cmd:
+                cmd = [arg.replace("{output_file}", output_file) for arg in cmd]
+        
+        cmd = limit_command(cmd, self.niceness, self.rlimits)
+        return ionice_command(cmd, self.io_class, self.io_priority), output_file
+    
+    def cache_settings(self) -> Dict:
+        """Return the settings that change what the tool reports, hashed into result cache keys.
+        
+        These are the tool's command line, with the target and output
+        directory left out, and this plugin's own plugins.<name> settings.
+        Scan-wide settings such as limits, timeouts and the cache TTL do not
+        change findings, so changing them keeps cached results valid.
+        Plugins whose findings depend on anything else override this.
+        
+        Returns:
+            Dict: JSON-serialisable settings
+        """
+        command = [
+            arg.replace(self.output_dir, "{output_dir}").replace(self.target, "{target}")
+            for arg in self.build_command()
+        ]
+        settings = {key: value for key, value in self.plugin_settings.items() if key != "cache_ttl"}
+        return {"command": command, "settings": settings}
+    
+    def planned_command(self) -> List[str]:
+        """Return the command run() would execute, without executing it.
+        
+        Returns:
+            List[str]: Command and arguments
+        """
+        return self._prepare_command()[0]
+    
+    def _spool_paths(self) -> Tuple[str, str]:
+        """Return the files the tool's stdout and stderr are streamed to.
+        
+        Returns:
+            Tuple: stdout spool path and stderr spool path
+        """
+        return (
+            os.path.join(self.output_dir, f"{self.name}_stdout.log"),
+            os.path.join(self.output_dir, f"{self.name}_stderr.log"),
+        )
+    
+    def _handle_output(self, return_code: int, output_file: Optional[str]) -> Dict:
+        """Parse the tool's spooled output.
+        
+        Only a capped tail of the output is kept in memory; the parser
+        reads the full output from disk.
+        
+        Args:
+            return_code: Exit code of the tool
+            output_file: Output file written by file-based plugins
+            
+        Returns:
+            Dict: Parsed results
+        """
+        _, stderr_path = self._spool_paths()
+        raw_output_path = self._raw_output_source(output_file)
+        self.raw_output = read_tail(raw_output_path, self.output_tail_bytes)[0] if raw_output_path else ""
+        
+        # Check for errors
+        if return_code != 0:
+            stderr_tail, _ = read_tail(stderr_path, self.output_tail_bytes)
+            self.logger.warning(f"Process returned non-zero exit code: {return_code}")
+            self.logger.warning(f"stderr: {stderr_tail}")
+        
+        # Parse the output
+        if raw_output_path:
+            with open(raw_output_path, 'r', errors='replace') as raw_output:
+                parsed_results = self.parse_output(raw_output)
+        else:
+            parsed_results = self.parse_output(io.StringIO(""))
+        self.status = PluginStatus.COMPLETED
+        return parsed_results
+    
+    def _raw_output_source(self, output_file: Optional[str]) -> Optional[str]:
+        """Return the file holding the tool's raw output, if it exists.
+        
+        Args:
+            output_file: Output file written by file-based plugins
+            
+        Returns:
+            Optional[str]: Path of the raw output, or None
+        """
+        if self.output_method == OutputMethod.STDOUT:
+            path = self._spool_paths()[0]
+        else:
+            path = output_file
+        return path if path and os.path.exists(path) else None
+    
+    def _archive_raw_output(self, output_file: Optional[str]):
+        """Move the raw output and the remaining spool files into compressed artifacts.
+        
+        The results document then only references the artifacts, so it
+        stays small and cheap to load, and no uncompressed copy of the
+        tool's output is left in the output directory. Empty spools are
+        removed.
+        
+        Args:
+            output_file: Output file written by file-based plugins
+        """
+        source = self._raw_output_source(output_file)
+        if source:
+            self.raw_output_artifact = self._store_artifact(source, f"{self.name}_raw_output")
+        
+        for stream, path in zip(("stdout", "stderr"), self._spool_paths()):
+            if path == source or not os.path.exists(path):
+                continue
+            if os.path.getsize(path):
+                artifact = self._store_artifact(path, f"{self.name}_{stream}")
+                if artifact:
+                    self.log_artifacts[stream] = artifact
+            else:
+                os.remove(path)
+    
+    def _store_artifact(self, source: str, name: str) -> Optional[Dict]:
+        """Compress a file into an artifact and remove it.
+        
+        Args:
+            source: File to compress
+            name: Base file name of the artifact, without extension
+            
+        Returns:
+            Optional[Dict]: Artifact record, or None if it could not be written
+        """
+        try:
+            artifact = store_raw_output(source, self.output_dir, name)
+            os.remove(source)
+            return artifact
+        except OSError as e:
+            self.logger.error(f"Could not store {os.path.basename(source)} of {self.name}: {e}")
+            return None
+    
     def _format_results(self, parsed_results: Dict = None, error: str = None) -> Dict:
         """Format the results into a standardized structure.
         
@@ -251,18 +640,55 @@ class PluginBase(abc.ABC):
             "timestamp_end": self.end_time.isoformat() if self.end_time else None,
             "duration_seconds": (self.end_time - self.start_time).total_seconds() if self.start_time and self.end_time else None,
             "status": self.status.value,
-            "raw_output": self.raw_output,
+            "raw_output": self.raw_output_artifact,
             "findings": parsed_results or {},
         }
         
+        if self.log_artifacts:
+            self.results["logs"] = self.log_artifacts
+        
+        if self.resources:
+            self.results["resources"] = self.resources
+        
+        if self.termination:
+            self.results["termination"] = self.termination
+        
+        if self.learned_timeout:
+            self.results["learned_timeout"] = self.learned_timeout
+        
         if error:
             self.results["error"] = error
             
-        # Save results to file
+        self._save_results()
+        return self.results
+    
+    def _save_results(self):
+        """Write the results document to <name>_results.json."""
+        os.makedirs(self.output_dir, exist_ok=True)
         results_file = os.path.join(self.output_dir, f"{self.name}_results.json")
         with open(results_file, 'w') as f:
             json.dump(self.results, f, indent=2)
+    
+    def use_cached_results(self, cached: Dict) -> Dict:
+        """Adopt a result from the result cache instead of running the tool.
+        
+        Args:
+            cached: Results document returned by ResultCache.get
             
+        Returns:
+            Dict: Scan results, marked as cached
+        """
+        cache_dir = cached.pop("cache_dir")
+        os.makedirs(self.output_dir, exist_ok=True)
+        for artifact in result_artifacts(cached):
+            shutil.copyfile(
+                os.path.join(cache_dir, artifact["path"]),
+                os.path.join(self.output_dir, artifact["path"])
+            )
+        
+        self.status = PluginStatus.COMPLETED
+        self.results = {**cached, "target": self.target, "cached": True}
+        self._save_results()
         return self.results
     
     def can_resume(self) -> bool:
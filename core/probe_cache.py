@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# probe_cache.py
+# Shared on-disk cache of tool availability and version probes
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+DEFAULT_PROBE_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "kast", "probes.json")
+DEFAULT_PROBE_TTL = 24 * 60 * 60  # One day
+VERSION_PATTERN = r"v?(\d+(?:\.\d+)+)"
+
+_caches: Dict[str, "ProbeCache"] = {}
+_caches_lock = threading.Lock()
+
+
+def get_probe_cache(path: str = None, ttl: float = DEFAULT_PROBE_TTL) -> "ProbeCache":
+    """
+    Return the process-wide probe cache stored at a path.
+
+    Args:
+        path: Cache file (defaults to ~/.cache/kast/probes.json)
+        ttl: Seconds a probe stays valid
+
+    Returns:
+        Shared ProbeCache instance
+    """
+    path = path or DEFAULT_PROBE_CACHE_PATH
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = ProbeCache(path, ttl)
+        return _caches[path]
+
+
+class ProbeCache:
+    """
+    Caches whether a tool is installed and which version it is.
+
+    Entries are keyed by the resolved binary path, its mtime and PATH, so
+    upgrading or reinstalling a tool, or changing PATH, invalidates them.
+    Each tool is probed once per host and TTL; concurrent plugins asking
+    for the same tool wait for a single probe.
+    """
+
+    def __init__(self, path: str, ttl: float = DEFAULT_PROBE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Cache file
+            ttl: Seconds a probe stays valid
+        """
+        self.path = path
+        self.ttl = ttl
+        self.logger = logging.getLogger("kast.probe_cache")
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._entries = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        """Merge our entries into the cache file and replace it atomically."""
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        entries = self._load()
+        entries.update(self._entries)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".probes-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _key(binary: str, resolved: Optional[str]) -> str:
+        mtime = os.stat(resolved).st_mtime if resolved else None
+        raw = f"{resolved or binary}|{mtime}|{os.environ.get('PATH', '')}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def probe(self, binary: str, version_args: List[str] = None,
+              version_pattern: str = VERSION_PATTERN, timeout: float = 30) -> Dict:
+        """
+        Return availability and version of a tool, probing it if needed.
+
+        Args:
+            binary: Name or path of the tool's executable
+            version_args: Arguments that make the tool print its version
+            version_pattern: Regex whose first group is the version
+            timeout: Seconds to allow the version command
+
+        Returns:
+            Probe record with available, path, version and checked_at keys
+        """
+        resolved = shutil.which(binary)
+        key = self._key(binary, resolved)
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry["checked_at"] < self.ttl:
+                return entry
+
+            entry = self._run_probe(binary, resolved, version_args or ["--version"], version_pattern, timeout)
+            with self._lock:
+                self._entries[key] = entry
+                try:
+                    self._save()
+                except OSError as e:
+                    self.logger.warning(f"Could not write probe cache {self.path}: {e}")
+            return entry
+
+    def _run_probe(self, binary: str, resolved: Optional[str], version_args: List[str],
+                   version_pattern: str, timeout: float) -> Dict:
+        entry = {"binary": binary, "path": resolved, "available": False, "version": None,
+                 "checked_at": time.time()}
+        if not resolved:
+            return entry
+
+        try:
+            process = subprocess.run(
+                [resolved] + version_args,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                check=False
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.logger.warning(f"Probing {binary} failed: {e}")
+            return entry
+
+        entry["available"] = process.returncode == 0
+        match = re.search(version_pattern, process.stdout + process.stderr)
+        if match:
+            entry["version"] = match.group(1)
+        return entry
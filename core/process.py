@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# process.py
+# Process priority, limits and process group handling for tools spawned by KAST plugins
+
+import asyncio
+import os
+import resource
+import select
+import shutil
+import signal
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+from core.cancellation import CancellationToken, ScanCancelled
+
+# Resource limits that can be configured per plugin, by config key
+# with the matching prlimit option
+RLIMITS = {
+    "cpu": (resource.RLIMIT_CPU, "cpu"),                # CPU seconds
+    "address_space": (resource.RLIMIT_AS, "as"),        # Bytes of virtual memory
+    "open_files": (resource.RLIMIT_NOFILE, "nofile"),   # File descriptors
+}
+
+# Seconds between checks of a cancellation token while waiting for a tool
+CANCEL_POLL_INTERVAL = 0.5
+
+# Whether /proc/<pid>/task/<tid>/children exists (CONFIG_PROC_CHILDREN)
+_CHILDREN_LISTS = os.path.exists(f"/proc/{os.getpid()}/task/{os.getpid()}/children")
+
+# I/O scheduling classes understood by ionice
+IO_CLASSES = {
+    "realtime": 1,
+    "best-effort": 2,
+    "idle": 3,
+}
+
+
+def _limit_settings(niceness: Optional[int], rlimits: Optional[Dict[str, int]]) -> tuple:
+    """
+    Validate limits and resolve them against this process.
+
+    Args:
+        niceness: Scheduling priority to lower the tool to
+        rlimits: Soft resource limits keyed by names in RLIMITS
+
+    Returns:
+        Niceness increment (None if the tool already runs at or below the
+        priority) and a list of (key, soft, hard) limits clamped to the
+        current hard limits
+
+    Raises:
+        ValueError: If an unknown resource limit is configured
+    """
+    limits = []
+    for key, value in (rlimits or {}).items():
+        if key not in RLIMITS:
+            raise ValueError(f"Unknown resource limit {key}, expected one of {', '.join(RLIMITS)}")
+        _, hard = resource.getrlimit(RLIMITS[key][0])
+        if hard != resource.RLIM_INFINITY:
+            value = min(value, hard)
+        limits.append((key, value, hard))
+
+    # Only ever lower the priority; raising it needs privileges
+    increment = None
+    if niceness is not None and niceness > os.getpriority(os.PRIO_PROCESS, 0):
+        increment = niceness - os.getpriority(os.PRIO_PROCESS, 0)
+    return increment, limits
+
+
+def limit_command(cmd: List[str], niceness: Optional[int] = None,
+                  rlimits: Optional[Dict[str, int]] = None) -> List[str]:
+    """
+    Prefix a command with nice and prlimit to lower its priority and limit it.
+
+    The limits are applied by the prefixes between fork and exec, so the
+    tool can be spawned without a preexec_fn. Limits whose helper is not
+    installed are left to apply_limits.
+
+    Args:
+        cmd: Command and arguments
+        niceness: Scheduling priority to lower the tool to
+        rlimits: Soft resource limits keyed by names in RLIMITS
+
+    Returns:
+        Command wrapped in nice and/or prlimit as needed
+
+    Raises:
+        ValueError: If an unknown resource limit is configured
+    """
+    increment, limits = _limit_settings(niceness, rlimits)
+    prefix = []
+    if increment is not None and shutil.which("nice"):
+        prefix.extend(["nice", "-n", str(increment)])
+    if limits and shutil.which("prlimit"):
+        prefix.append("prlimit")
+        for key, soft, hard in limits:
+            values = ["unlimited" if value == resource.RLIM_INFINITY else str(value) for value in (soft, hard)]
+            prefix.append(f"--{RLIMITS[key][1]}={':'.join(values)}")
+    return prefix + cmd
+
+
+def apply_limits(pid: int, niceness: Optional[int] = None, rlimits: Optional[Dict[str, int]] = None):
+    """
+    Apply the limits limit_command could not prefix to a spawned tool.
+
+    Only used where nice or prlimit is not installed; the tool runs
+    unlimited for the moment between its spawn and this call.
+
+    Args:
+        pid: Process ID of the tool
+        niceness: Scheduling priority to lower the tool to
+        rlimits: Soft resource limits keyed by names in RLIMITS
+    """
+    increment, limits = _limit_settings(niceness, rlimits)
+    try:
+        if increment is not None and not shutil.which("nice"):
+            os.setpriority(os.PRIO_PROCESS, pid, niceness)
+        if limits and not shutil.which("prlimit"):
+            for key, soft, hard in limits:
+                resource.prlimit(pid, RLIMITS[key][0], (soft, hard))
+    except ProcessLookupError:
+        # The tool already exited
+        pass
+
+
+def ionice_command(cmd: List[str], io_class: Optional[str], io_priority: Optional[int] = None) -> List[str]:
+    """
+    Prefix a command with ionice to set its I/O scheduling class.
+
+    Args:
+        cmd: Command and arguments
+        io_class: Name of an I/O class in IO_CLASSES, or None to leave it unchanged
+        io_priority: Optional priority (0-7) within the class
+
+    Returns:
+        Command wrapped in ionice, or unchanged if no class is set or
+        ionice is not installed
+
+    Raises:
+        ValueError: If an unknown I/O class is configured
+    """
+    if not io_class:
+        return cmd
+    if io_class not in IO_CLASSES:
+        raise ValueError(f"Unknown I/O class {io_class}, expected one of {', '.join(IO_CLASSES)}")
+    if not shutil.which("ionice"):
+        return cmd
+
+    prefix = ["ionice", "-c", str(IO_CLASSES[io_class])]
+    if io_priority is not None and io_class != "idle":
+        prefix.extend(["-n", str(io_priority)])
+    return prefix + cmd
+
+
+def process_group_members(pgid: int) -> List[int]:
+    """
+    List the live (non-zombie) processes in a process group.
+
+    Uses /proc where available and falls back to probing the group with
+    signal 0, in which case only the group leader is reported.
+
+    Args:
+        pgid: Process group ID
+
+    Returns:
+        PIDs of processes in the group
+    """
+    if not os.path.isdir("/proc"):
+        try:
+            os.killpg(pgid, 0)
+            return [pgid]
+        except (ProcessLookupError, PermissionError):
+            return []
+
+    members = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        fields = _proc_stat(int(entry))
+        if fields and fields[0] != "Z" and int(fields[2]) == pgid:
+            members.append(int(entry))
+    return members
+
+
+def process_tree(pid: int) -> List[int]:
+    """
+    List a process and its descendants from /proc/<pid>/task/<tid>/children.
+
+    Only the tree is read, so the cost does not grow with the number of
+    processes on the host. Descendants reparented away from the tree
+    (e.g. after their parent exited) are not found.
+
+    Args:
+        pid: Root of the tree
+
+    Returns:
+        PIDs of the process and its descendants, root first; empty if the
+        kernel does not expose children lists
+    """
+    if not _CHILDREN_LISTS:
+        return []
+    tree, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        tree.append(current)
+        try:
+            threads = os.listdir(f"/proc/{current}/task")
+        except OSError:
+            continue
+        for thread in threads:
+            try:
+                with open(f"/proc/{current}/task/{thread}/children", "r") as f:
+                    pending.extend(int(child) for child in f.read().split())
+            except (OSError, ValueError):
+                continue
+    return tree
+
+
+def _proc_stat(pid: int) -> Optional[List[str]]:
+    """
+    Read /proc/<pid>/stat.
+
+    Returns:
+        Fields from the state field (field 3 in proc(5)) onwards, or None
+        if the process is gone
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name may contain spaces, so split after its closing paren
+    return stat[stat.rfind(")") + 2:].split()
+
+
+def _proc_io(pid: int) -> Dict[str, int]:
+    """Read the storage I/O counters from /proc/<pid>/io."""
+    counters = {}
+    try:
+        with open(f"/proc/{pid}/io", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                counters[key] = int(value)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+
+def wait_with_rusage(process: subprocess.Popen, timeout: Optional[float] = None,
+                     cancel: CancellationToken = None) -> Dict:
+    """
+    Wait for a tool to exit and collect its resource usage with wait4.
+
+    The usage covers the tool and every descendant it waited for. The
+    exit code is stored on process.returncode as Popen.wait would.
+
+    Args:
+        process: Running tool
+        timeout: Seconds to wait, or None to wait indefinitely
+        cancel: Optional token that stops the wait once cancelled
+
+    Returns:
+        Resource usage of the tool's process tree
+
+    Raises:
+        subprocess.TimeoutExpired: If the tool is still running after timeout
+        ScanCancelled: If the token is cancelled while the tool is running
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except OSError:
+            pidfd = None
+
+    try:
+        delay = 0.01
+        while True:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(status)
+                return {
+                    "cpu_user_seconds": rusage.ru_utime,
+                    "cpu_system_seconds": rusage.ru_stime,
+                    "max_rss_kb": rusage.ru_maxrss,
+                    "block_read_bytes": rusage.ru_inblock * 512,
+                    "block_write_bytes": rusage.ru_oublock * 512,
+                    "source": "wait4",
+                }
+
+            if cancel is not None and cancel.cancelled:
+                raise ScanCancelled(cancel.reason)
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            if cancel is not None:
+                remaining = CANCEL_POLL_INTERVAL if remaining is None else min(remaining, CANCEL_POLL_INTERVAL)
+
+            if pidfd is not None:
+                # Sleep until the tool exits rather than polling
+                select.select([pidfd], [], [], remaining)
+            else:
+                time.sleep(delay if remaining is None else min(delay, remaining))
+                delay = min(delay * 2, 0.1)
+    finally:
+        if pidfd is not None:
+            os.close(pidfd)
+
+
+class ProcessGroupSampler:
+    """
+    Accumulates the resource usage of a process group from /proc.
+
+    Used where the tool cannot be reaped with wait4, e.g. under asyncio
+    whose child watcher reaps it. Each sample reads only the tool's
+    process tree (see process_tree), plus processes sampled earlier that
+    are still in the group, so sampling many tools stays cheap. Without
+    children lists the whole of /proc is scanned for the group.
+
+    CPU time is the latest sample of each process, plus the time of
+    children it waited for that were never sampled themselves; children
+    that were sampled are counted once, under their own pid. Peak RSS is
+    the largest sum over the group seen in any sample, so usage after the
+    last sample is not counted.
+    """
+
+    def __init__(self, pgid: int):
+        """
+        Initialize the sampler.
+
+        Args:
+            pgid: Process group ID of the tool
+        """
+        self.pgid = pgid
+        self.max_rss_kb = 0
+        # pid -> (ppid, user, system, children user, children system) in clock ticks
+        self._cpu: Dict[int, tuple] = {}
+        self._live = set()  # Processes found by the latest sample
+        self._io: Dict[int, tuple] = {}
+        self._ticks = os.sysconf("SC_CLK_TCK")
+        self._page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+
+    def _members(self) -> List[int]:
+        if not _CHILDREN_LISTS:
+            return process_group_members(self.pgid)
+        members = process_tree(self.pgid)
+        # Processes reparented out of the tree are still followed by pid
+        members.extend(pid for pid in self._live if pid not in members)
+        return members
+
+    def sample(self):
+        """Take one sample of every live process in the group."""
+        rss_kb = 0
+        live = set()
+        for pid in self._members():
+            fields = _proc_stat(pid)
+            if not fields or int(fields[2]) != self.pgid:
+                continue
+            live.add(pid)
+            utime, stime, cutime, cstime = (int(value) for value in fields[11:15])
+            self._cpu[pid] = (int(fields[1]), utime, stime, cutime, cstime)
+            rss_kb += int(fields[21]) * self._page_kb
+
+            counters = _proc_io(pid)
+            if counters:
+                self._io[pid] = (counters.get("read_bytes", 0), counters.get("write_bytes", 0))
+        self._live = live
+        self.max_rss_kb = max(self.max_rss_kb, rss_kb)
+
+    def _cpu_seconds(self) -> tuple:
+        # Sampled processes that are gone were reaped by their parent, whose
+        # children times now include them; count that part only once
+        reaped: Dict[int, list] = {}
+        for pid, (ppid, utime, stime, cutime, cstime) in self._cpu.items():
+            if pid not in self._live:
+                totals = reaped.setdefault(ppid, [0, 0])
+                totals[0] += utime + cutime
+                totals[1] += stime + cstime
+
+        user = system = 0
+        for pid, (_, utime, stime, cutime, cstime) in self._cpu.items():
+            reaped_user, reaped_system = reaped.get(pid, (0, 0))
+            user += utime + max(0, cutime - reaped_user)
+            system += stime + max(0, cstime - reaped_system)
+        return user / self._ticks, system / self._ticks
+
+    def usage(self) -> Dict:
+        """
+        Return the usage accumulated so far.
+
+        Returns:
+            Resource usage in the same shape as wait_with_rusage
+        """
+        user, system = self._cpu_seconds()
+        return {
+            "cpu_user_seconds": user,
+            "cpu_system_seconds": system,
+            "max_rss_kb": self.max_rss_kb,
+            "block_read_bytes": sum(read for read, _ in self._io.values()),
+            "block_write_bytes": sum(write for _, write in self._io.values()),
+            "source": "proc",
+        }
+
+
+async def wait_sampling_async(process: asyncio.subprocess.Process, sampler: ProcessGroupSampler,
+                              interval: float = 0.5, cancel: CancellationToken = None) -> int:
+    """
+    Wait for a tool to exit, sampling its process group meanwhile.
+
+    Args:
+        process: Running tool
+        sampler: Sampler for the tool's process group
+        interval: Seconds between samples
+        cancel: Optional token that stops the wait once cancelled
+
+    Returns:
+        Exit code of the tool
+
+    Raises:
+        ScanCancelled: If the token is cancelled while the tool is running
+    """
+    wait_task = asyncio.ensure_future(process.wait())
+    try:
+        while True:
+            sampler.sample()
+            done, _ = await asyncio.wait({wait_task}, timeout=interval)
+            if done:
+                return wait_task.result()
+            if cancel is not None and cancel.cancelled:
+                raise ScanCancelled(cancel.reason)
+    finally:
+        if not wait_task.done():
+            wait_task.cancel()
+
+
+def _signal_group(pgid: int, sig: int):
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _live_members(pgid: int, known: List[int]) -> List[int]:
+    """
+    List the live processes of a group among the known ones and the leader's tree.
+
+    Args:
+        pgid: Process group ID
+        known: PIDs found earlier, followed even after leaving the tree
+
+    Returns:
+        PIDs of live (non-zombie) processes still in the group
+    """
+    if not _CHILDREN_LISTS:
+        return process_group_members(pgid)
+    candidates = list(known)
+    candidates.extend(pid for pid in process_tree(pgid) if pid not in candidates)
+    members = []
+    for pid in candidates:
+        fields = _proc_stat(pid)
+        if fields and fields[0] != "Z" and int(fields[2]) == pgid:
+            members.append(pid)
+    return members
+
+
+def _escalate(pgid: int, grace_period: float):
+    """
+    Terminate a process group, escalating from SIGTERM to SIGKILL.
+
+    A generator yielding the seconds to sleep between checks, so the
+    blocking and event loop versions share it; it returns the summary.
+    /proc is scanned once for the group, after which only those
+    processes and the leader's descendants are checked.
+    """
+    members = process_group_members(pgid)
+    signalled = len(members)
+    _signal_group(pgid, signal.SIGTERM)
+
+    deadline = time.monotonic() + grace_period
+    remaining = _live_members(pgid, members)
+    while remaining and time.monotonic() < deadline:
+        yield 0.1
+        remaining = _live_members(pgid, remaining)
+
+    if remaining:
+        _signal_group(pgid, signal.SIGKILL)
+
+    return {
+        "processes_signalled": signalled,
+        "processes_killed": len(remaining),
+        "grace_period": grace_period,
+    }
+
+
+def terminate_process_group(pgid: int, grace_period: float) -> Dict:
+    """
+    Terminate every process in a group, escalating from SIGTERM to SIGKILL.
+
+    The caller is still responsible for reaping its direct child.
+
+    Args:
+        pgid: Process group ID, normally the PID of the session leader
+        grace_period: Seconds to wait after SIGTERM before sending SIGKILL
+
+    Returns:
+        Summary of how many processes were signalled and killed
+    """
+    escalation = _escalate(pgid, grace_period)
+    try:
+        while True:
+            time.sleep(next(escalation))
+    except StopIteration as done:
+        return done.value
+
+
+async def terminate_process_group_async(pgid: int, grace_period: float) -> Dict:
+    """
+    Event loop friendly version of terminate_process_group.
+
+    Args:
+        pgid: Process group ID, normally the PID of the session leader
+        grace_period: Seconds to wait after SIGTERM before sending SIGKILL
+
+    Returns:
+        Summary of how many processes were signalled and killed
+    """
+    escalation = _escalate(pgid, grace_period)
+    try:
+        while True:
+            await asyncio.sleep(next(escalation))
+    except StopIteration as done:
+        return done.value
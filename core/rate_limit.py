@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# rate_limit.py
+# Per-host limits on active plugins, so scans do not trip WAF bans
+
+import threading
+import time
+from typing import Dict, Optional
+
+from core.utils import target_host
+
+
+class TokenBucket:
+    """Classic token bucket: holds up to burst tokens, refilled at rate per second."""
+
+    def __init__(self, rate: float, burst: float = 1):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        """Take a token if one is available."""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        """Return seconds until the next token is available."""
+        self._refill(time.monotonic())
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    @property
+    def full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class HostLimiter:
+    """
+    Limits how hard active plugins hit each host.
+
+    Targets are grouped by host, so different URLs on one server share a
+    limit. Each host allows at most max_active active plugins at once, and
+    if start_rate is set, starting one takes a token from the host's token
+    bucket, spacing out bursts of plugin starts. Passive plugins are not
+    passed through the limiter.
+
+    request_rate is a requests-per-second budget per host; each active
+    plugin is offered an equal share as a hint for tools with rate flags.
+    """
+
+    def __init__(self, max_active: Optional[int] = 1, start_rate: float = None, start_burst: float = 1,
+                 request_rate: float = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_active: Maximum active plugins running against one host
+                (None for no limit)
+            start_rate: Active plugin starts allowed per second per host
+                (None for no limit)
+            start_burst: Starts allowed back to back before start_rate applies
+            request_rate: Requests per second per host shared by active plugins
+        """
+        self.max_active = max_active
+        self.start_rate = start_rate
+        self.start_burst = start_burst
+        self.request_rate = request_rate
+        self._active: Dict[str, int] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "HostLimiter":
+        """
+        Build the limiter described by the host_* configuration keys.
+
+        Args:
+            config: Scan configuration
+
+        Returns:
+            Configured limiter
+        """
+        return cls(
+            max_active=config.get("host_active_limit", 1),
+            start_rate=config.get("host_start_rate"),
+            start_burst=config.get("host_start_burst", 1),
+            request_rate=config.get("host_request_rate"),
+        )
+
+    def try_acquire(self, target: str) -> bool:
+        """
+        Reserve a slot for an active plugin against a target's host.
+
+        Args:
+            target: Target the plugin would scan
+
+        Returns:
+            True if the plugin may start now; release() must follow
+        """
+        host = target_host(target)
+        with self._lock:
+            if self.max_active is not None and self._active.get(host, 0) >= self.max_active:
+                return False
+            if self.start_rate:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    bucket = self._buckets[host] = TokenBucket(self.start_rate, self.start_burst)
+                if not bucket.try_take():
+                    return False
+            self._active[host] = self._active.get(host, 0) + 1
+            return True
+
+    def release(self, target: str):
+        """Free the slot taken by try_acquire()."""
+        host = target_host(target)
+        with self._lock:
+            self._active[host] -= 1
+            if not self._active[host]:
+                del self._active[host]
+
+    def retry_after(self) -> Optional[float]:
+        """
+        Return seconds until a drained bucket has a token again.
+
+        Returns:
+            Shortest wait, or None if no host is waiting on its start rate
+        """
+        with self._lock:
+            # Full buckets are forgotten; they behave like new ones
+            for host in [host for host, bucket in self._buckets.items() if bucket.full]:
+                del self._buckets[host]
+            waits = [bucket.wait_time() for bucket in self._buckets.values() if bucket.tokens < 1]
+        return min(waits) if waits else None
+
+    def request_rate_hint(self) -> Optional[float]:
+        """Return the request rate each active plugin is asked to stay under."""
+        if not self.request_rate:
+            return None
+        return self.request_rate / (self.max_active or 1)
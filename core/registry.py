@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# registry.py
+# Manifest-based plugin discovery for KAST
+
+import importlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Type
+
+from core.plugin_base import PluginBase, ScanType
+
+DEFAULT_REGISTRY_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "kast", "registry.json")
+MANIFEST_NAME = "config.yml"
+
+
+class PluginManifest:
+    """
+    Static description of a plugin, read from plugins/<name>/config.yml.
+
+    A manifest carries everything needed to list a plugin, add its CLI
+    arguments and place it in the dependency graph, so the plugin module
+    is only imported when the plugin is actually scheduled. Manifest keys:
+
+        name: Plugin name (must match PluginBase.name)
+        description: One-line description
+        scan_type: passive or active
+        entry_point: "module.path:ClassName" of the PluginBase subclass
+        dependencies: Names of plugins that must complete first
+        arguments: CLI arguments, each a mapping with a "flags" list plus
+            keyword arguments for argparse's add_argument. Values given
+            on the command line land in the plugin's plugins.<name>
+            configuration section.
+        defaults: Default plugin configuration
+        resource_claims: Resources occupied while running, e.g.
+            {network_heavy: 1} or {exclusive: true}
+        concurrency_allowed: false to run with no other plugin at all
+        value: Relative worth of the plugin's findings, used to choose
+            plugins under a time budget (default 1)
+    """
+
+    def __init__(self, name: str, description: str, scan_type: ScanType, entry_point: str,
+                 dependencies: List[str] = None, arguments: List[Dict] = None,
+                 defaults: Dict[str, Any] = None, plugin_class: Type[PluginBase] = None,
+                 resource_claims: Dict[str, Any] = None, concurrency_allowed: bool = True,
+                 value: float = 1.0):
+        """
+        Initialize the manifest.
+
+        Args:
+            name: Plugin name
+            description: One-line description
+            scan_type: Whether the plugin is active or passive
+            entry_point: "module.path:ClassName" of the plugin class
+            dependencies: Names of plugins that must complete first
+            arguments: CLI argument specifications
+            defaults: Default plugin configuration
+            plugin_class: Already imported plugin class, if any
+            resource_claims: Resources occupied while running
+            concurrency_allowed: Whether other plugins may run at the same time
+            value: Relative worth of the plugin's findings
+        """
+        self.name = name
+        self.description = description
+        self.scan_type = scan_type
+        self.entry_point = entry_point
+        self.dependencies = dependencies or []
+        self.arguments = arguments or []
+        self.defaults = defaults or {}
+        self.resource_claims = resource_claims or {}
+        self.concurrency_allowed = concurrency_allowed
+        self.value = value
+        self._plugin_class = plugin_class
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "PluginManifest":
+        """
+        Build a manifest from parsed YAML or a cached registry entry.
+
+        Raises:
+            ValueError: If a required key is missing or invalid
+        """
+        missing = [key for key in ("name", "scan_type", "entry_point") if not data.get(key)]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        return cls(
+            name=data["name"],
+            description=data.get("description", ""),
+            scan_type=ScanType(data["scan_type"]),
+            entry_point=data["entry_point"],
+            dependencies=data.get("dependencies"),
+            arguments=data.get("arguments"),
+            defaults=data.get("defaults"),
+            resource_claims=data.get("resource_claims"),
+            concurrency_allowed=data.get("concurrency_allowed", True),
+            value=float(data.get("value", 1.0)),
+        )
+
+    @classmethod
+    def from_plugin(cls, plugin: PluginBase) -> "PluginManifest":
+        """
+        Describe an already instantiated plugin, for plugins passed as classes.
+
+        Args:
+            plugin: Plugin instance
+
+        Returns:
+            Manifest bound to the plugin's class
+        """
+        plugin_class = type(plugin)
+        return cls(
+            name=plugin.name,
+            description=plugin.description,
+            scan_type=plugin.scan_type,
+            entry_point=f"{plugin_class.__module__}:{plugin_class.__name__}",
+            dependencies=list(plugin.dependencies),
+            plugin_class=plugin_class,
+            resource_claims=dict(plugin.resource_claims),
+            concurrency_allowed=plugin.concurrency_allowed,
+            value=plugin.value,
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "scan_type": self.scan_type.value,
+            "entry_point": self.entry_point,
+            "dependencies": self.dependencies,
+            "arguments": self.arguments,
+            "defaults": self.defaults,
+            "resource_claims": self.resource_claims,
+            "concurrency_allowed": self.concurrency_allowed,
+            "value": self.value,
+        }
+
+    def load(self) -> Type[PluginBase]:
+        """
+        Import the plugin class named by the entry point.
+
+        Returns:
+            Plugin class
+
+        Raises:
+            ImportError: If the module or class cannot be imported
+        """
+        if self._plugin_class is None:
+            module_name, _, class_name = self.entry_point.partition(":")
+            module = importlib.import_module(module_name)
+            plugin_class = getattr(module, class_name, None)
+            if not (isinstance(plugin_class, type) and issubclass(plugin_class, PluginBase)):
+                raise ImportError(f"{self.entry_point} is not a PluginBase subclass")
+            self._plugin_class = plugin_class
+        return self._plugin_class
+
+    def create(self, target: str, output_dir: str, config: Dict = None) -> PluginBase:
+        """
+        Import the plugin if needed and instantiate it.
+
+        Args:
+            target: The target URL or domain to scan
+            output_dir: Directory where output files should be stored
+            config: Configuration, which takes precedence over the manifest defaults
+
+        Returns:
+            Plugin instance
+        """
+        return self.load()(target=target, output_dir=output_dir, config={**self.defaults, **(config or {})})
+
+
+class PluginRegistry:
+    """
+    Discovers plugins from their manifests without importing them.
+
+    Parsed manifests are cached as JSON keyed by manifest mtimes, so
+    startup only stats the plugin directories while nothing has changed.
+    """
+
+    def __init__(self, plugins_dir: Path, cache_path: str = None):
+        """
+        Initialize the registry.
+
+        Args:
+            plugins_dir: Directory containing one subdirectory per plugin
+            cache_path: Registry cache file (defaults to ~/.cache/kast/registry.json)
+        """
+        self.plugins_dir = Path(plugins_dir)
+        self.cache_path = cache_path or DEFAULT_REGISTRY_CACHE_PATH
+        self.logger = logging.getLogger("kast.registry")
+
+    def _manifest_paths(self) -> Dict[str, float]:
+        paths = {}
+        for plugin_path in sorted(self.plugins_dir.iterdir()):
+            manifest_path = plugin_path / MANIFEST_NAME
+            if plugin_path.is_dir() and manifest_path.exists():
+                paths[str(manifest_path)] = manifest_path.stat().st_mtime
+        return paths
+
+    def _load_cache(self, manifest_paths: Dict[str, float]) -> Optional[List[Dict]]:
+        try:
+            with open(self.cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        entry = cache.get(str(self.plugins_dir.resolve()))
+        if not entry or entry["mtimes"] != manifest_paths:
+            return None
+        return entry["manifests"]
+
+    def _save_cache(self, manifest_paths: Dict[str, float], manifests: List[Dict]):
+        directory = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            try:
+                with open(self.cache_path, "r") as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+            cache[str(self.plugins_dir.resolve())] = {"mtimes": manifest_paths, "manifests": manifests}
+
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".registry-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self.logger.warning(f"Could not write plugin registry cache {self.cache_path}: {e}")
+
+    def _parse_manifests(self, manifest_paths: Dict[str, float]) -> List[Dict]:
+        # Only needed when the cache is stale
+        import yaml
+
+        manifests = []
+        for manifest_path in manifest_paths:
+            with open(manifest_path, "r") as f:
+                data = yaml.safe_load(f)
+            if not isinstance(data, dict):
+                self.logger.error(f"Plugin manifest {manifest_path} is empty or not a mapping")
+                continue
+            manifests.append(data)
+        return manifests
+
+    def discover(self) -> List[PluginManifest]:
+        """
+        Read the manifests of all plugins.
+
+        Returns:
+            Manifests of the discovered plugins
+        """
+        manifest_paths = self._manifest_paths()
+        data = self._load_cache(manifest_paths)
+        if data is None:
+            data = self._parse_manifests(manifest_paths)
+            self._save_cache(manifest_paths, data)
+
+        manifests = []
+        for entry in data:
+            try:
+                manifests.append(PluginManifest.from_dict(entry))
+            except ValueError as e:
+                self.logger.error(f"Invalid plugin manifest {entry.get('name', entry)}: {e}")
+        return manifests
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# resources.py
+# Weighted semaphores for the resources plugins declare they use
+
+import logging
+import os
+import threading
+from typing import Dict, Optional
+
+EXCLUSIVE = "exclusive"
+DEFAULT_CAPACITIES = {
+    "cpu": os.cpu_count() or 1,
+    "network_heavy": 2,
+}
+
+
+def normalize_claims(claims: Optional[Dict], concurrency_allowed: bool = True) -> Dict[str, float]:
+    """
+    Turn a plugin's declared resource claims into weights.
+
+    Args:
+        claims: Mapping of resource name to amount, where "exclusive: true"
+            asks to run with no other plugin at all
+        concurrency_allowed: False is shorthand for an exclusive claim
+
+    Returns:
+        Mapping of resource name to weight, with exclusive as 1 if claimed
+    """
+    normalized = {}
+    for resource, amount in (claims or {}).items():
+        if resource == EXCLUSIVE:
+            if amount:
+                normalized[EXCLUSIVE] = 1
+        elif amount:
+            normalized[resource] = float(amount)
+    if not concurrency_allowed:
+        normalized[EXCLUSIVE] = 1
+    return normalized
+
+
+class ResourcePool:
+    """
+    Weighted semaphores over named resources such as cpu or network_heavy.
+
+    A plugin is admitted only when every resource it claims has enough
+    capacity left, so heavy plugins never run together while plugins
+    claiming nothing fill the remaining worker slots. Resources without a
+    configured capacity have a capacity of 1, and a claim larger than a
+    capacity takes the whole resource.
+
+    An exclusive plugin runs alone. Once one is waiting, no other plugin
+    is admitted until it has started, so it cannot be starved.
+    """
+
+    def __init__(self, capacities: Dict[str, float] = None):
+        """
+        Initialize the pool.
+
+        Args:
+            capacities: Capacity per resource, added to DEFAULT_CAPACITIES
+        """
+        self.capacities = {**DEFAULT_CAPACITIES, **(capacities or {})}
+        self.logger = logging.getLogger("kast.resources")
+        self._used: Dict[str, float] = {}
+        self._holders = 0
+        self._exclusive_running = False
+        self._exclusive_waiting = False
+        self._lock = threading.Lock()
+
+    def _weight(self, resource: str, amount: float) -> float:
+        return min(amount, self.capacities.get(resource, 1))
+
+    def try_acquire(self, claims: Dict[str, float]) -> bool:
+        """
+        Take the claimed resources if all of them are available.
+
+        Args:
+            claims: Normalized claims (see normalize_claims)
+
+        Returns:
+            True if the claims were granted; release() must follow
+        """
+        with self._lock:
+            if self._exclusive_running:
+                return False
+            if EXCLUSIVE in claims:
+                if self._holders:
+                    self._exclusive_waiting = True
+                    return False
+                self._exclusive_waiting = False
+                self._exclusive_running = True
+            else:
+                if self._exclusive_waiting:
+                    return False
+                for resource, amount in claims.items():
+                    capacity = self.capacities.get(resource, 1)
+                    if self._used.get(resource, 0) + self._weight(resource, amount) > capacity:
+                        return False
+
+            for resource, amount in claims.items():
+                if resource != EXCLUSIVE:
+                    self._used[resource] = self._used.get(resource, 0) + self._weight(resource, amount)
+            self._holders += 1
+            return True
+
+    def release(self, claims: Dict[str, float], started: bool = True):
+        """
+        Return resources granted by try_acquire().
+
+        Args:
+            claims: Claims passed to try_acquire()
+            started: False if the plugin was not started after all, e.g.
+                because a host limit held it back. An exclusive plugin then
+                stays first in line, so other plugins cannot starve it.
+        """
+        with self._lock:
+            for resource, amount in claims.items():
+                if resource != EXCLUSIVE:
+                    self._used[resource] -= self._weight(resource, amount)
+            if EXCLUSIVE in claims:
+                self._exclusive_running = False
+                if not started:
+                    self._exclusive_waiting = True
+            self._holders -= 1
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# result_cache.py
+# TTL cache of plugin results, so recent scans of a target are not repeated
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, Optional
+
+from core.artifacts import CorruptArtifact, result_artifacts, verify_artifacts
+from core.utils import normalize_target
+
+RESULT_CACHE_DIR_NAME = ".result_cache"  # Default location, inside the output directory
+RESULTS_NAME = "results.json"
+
+
+class ResultCache:
+    """
+    On-disk cache of completed plugin results.
+
+    Entries are keyed by the normalized target, plugin name, tool version
+    and a hash of the settings that change what the tool reports (see
+    PluginBase.cache_settings), and each holds the results document plus
+    its raw output artifact. The cache lives in the scan's output
+    directory unless result_cache_dir points elsewhere. Freshness is
+    decided per lookup with the plugin's TTL; evict() bounds the cache by
+    age and total size, dropping least recently used entries first.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = None, max_age: float = None):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Cache directory
+            max_bytes: Maximum total size of the cache, or None for no limit
+            max_age: Seconds after which entries are evicted, or None for no limit
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.logger = logging.getLogger("kast.result_cache")
+
+    @classmethod
+    def from_config(cls, config: Dict, output_dir: str = None) -> "ResultCache":
+        """
+        Build the cache described by the result_cache_* configuration keys.
+
+        Args:
+            config: Scan configuration
+            output_dir: Output directory of the scan; without
+                result_cache_dir the cache is kept in its .result_cache
+                subdirectory
+
+        Returns:
+            Configured cache
+
+        Raises:
+            ValueError: If neither result_cache_dir nor output_dir is given
+        """
+        directory = config.get("result_cache_dir")
+        if not directory:
+            if not output_dir:
+                raise ValueError("the result cache needs result_cache_dir or an output directory")
+            directory = os.path.join(os.path.abspath(output_dir), RESULT_CACHE_DIR_NAME)
+        return cls(
+            directory,
+            max_bytes=config.get("result_cache_max_bytes"),
+            max_age=config.get("result_cache_max_age")
+        )
+
+    @staticmethod
+    def key(target: str, plugin_name: str, tool_version: str, config: Dict) -> str:
+        """
+        Compute the cache key of a plugin run.
+
+        Args:
+            target: Target URL or domain
+            plugin_name: Plugin name
+            tool_version: Version of the underlying tool
+            config: Settings that change what the tool reports
+
+        Returns:
+            Hex digest identifying the run
+        """
+        config_hash = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+        raw = json.dumps([normalize_target(target), plugin_name, tool_version, config_hash])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key: str, ttl: float) -> Optional[Dict]:
+        """
+        Look up a fresh cache entry.
+
+        Args:
+            key: Cache key
+            ttl: Maximum age in seconds for the entry to count as a hit
+
+        Artifacts are read back and checked against their sha256, so a
+        damaged entry is dropped and counts as a miss.
+
+        Returns:
+            Cached results document with its artifact path made absolute,
+            or None on a miss
+        """
+        entry_dir = self._entry_dir(key)
+        results_path = os.path.join(entry_dir, RESULTS_NAME)
+        try:
+            if time.time() - os.path.getmtime(results_path) > ttl:
+                return None
+            with open(results_path, "r") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            verify_artifacts(result, entry_dir)
+        except CorruptArtifact as e:
+            self.logger.warning(f"Dropping cached result for {result.get('tool_name')}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        # Mark the entry as recently used for eviction
+        os.utime(entry_dir)
+        result["cache_dir"] = entry_dir
+        return result
+
+    def put(self, key: str, result: Dict, results_dir: str):
+        """
+        Store a completed result and its artifacts.
+
+        Args:
+            key: Cache key
+            result: Results document
+            results_dir: Directory the results and artifacts were written to
+        """
+        entry_dir = self._entry_dir(key)
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(entry_dir), prefix=".staging-")
+        try:
+            for artifact in result_artifacts(result):
+                shutil.copyfile(os.path.join(results_dir, artifact["path"]), os.path.join(staging, artifact["path"]))
+            with open(os.path.join(staging, RESULTS_NAME), "w") as f:
+                json.dump(result, f, indent=2)
+
+            # Swap the complete entry into place
+            if os.path.exists(entry_dir):
+                shutil.rmtree(entry_dir)
+            os.replace(staging, entry_dir)
+        except OSError as e:
+            self.logger.warning(f"Could not cache result for {result.get('tool_name')}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def evict(self):
+        """Remove entries older than max_age, then the least recently used ones above max_bytes."""
+        if not os.path.isdir(self.directory) or (self.max_age is None and self.max_bytes is None):
+            return
+
+        now = time.time()
+        entries = []
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.is_dir() or entry.name.startswith("."):
+                    continue
+                used = entry.stat().st_mtime
+                if self.max_age is not None and now - used > self.max_age:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    continue
+                size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+                entries.append((used, size, entry.path))
+
+        if self.max_bytes is None:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
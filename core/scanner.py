@@ -3,13 +3,31 @@
 # scanner.py
 # Core scanner orchestration logic for KAST (Kali Automated Scan Tool)
 
+import asyncio
+import heapq
+import itertools
+import json
 import os
 import importlib
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Type
+import statistics
+import time
+from concurrent.futures import CancelledError, Executor, Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
 
+from core.cancellation import CancellationToken
+from core.concurrency import AdaptiveConcurrency
+from core.history import RuntimeHistory, target_class
+from core.journal import ScanJournal
+from core.liveness import LivenessChecker
 from core.plugin_base import PluginBase, PluginStatus, ScanType
+from core.rate_limit import HostLimiter
+from core.registry import PluginManifest
+from core.resources import ResourcePool, normalize_claims
+from core.result_cache import ResultCache
+from core.scheduler import DAGScheduler, DependencyGraph, RoundRobinScheduler
+from core.utils import safe_target_name
 
 class ScanOrchestrator:
     """
@@ -22,81 +40,995 @@ class ScanOrchestrator:
     - Handle error scenarios
     """
     
-    def __init__(self, target: str, output_dir: str, config: Dict = None):
+    def __init__(self, target: Optional[str], output_dir: str,
+                 plugins: List[Union[PluginManifest, Type[PluginBase]]] = None,
+                 config: Dict = None, targets: Iterable[str] = None,
+                 journal: ScanJournal = None, metadata: Dict = None,
+                 result_cache: ResultCache = None, history: RuntimeHistory = None,
+                 target_count: int = None, cancel_token: CancellationToken = None,
+                 expected_runtimes: Dict[str, Dict[str, float]] = None,
+                 liveness: LivenessChecker = None, retry_failed: bool = False):
         """
         Initialize the scan orchestrator.
         
         Args:
             target: The target URL or domain to scan
             output_dir: Directory to store scan results
+            plugins: Plugin manifests (or plugin classes) to run
             config: Optional configuration dictionary
+            targets: Optional iterable of targets for batch mode. Each target
+                gets its own subdirectory of output_dir.
+            journal: Optional journal to record progress in. If it already
+                holds an earlier run, that run is resumed.
+            metadata: Extra information stored with the run's plan
+            result_cache: Optional cache of earlier results, used for
+                plugins with a cache_ttl
+            history: Optional runtime history. Plugins' runtimes are recorded
+                in it, and its estimates make longer plugins start first and
+                drive progress() estimates.
+            target_count: Number of targets in batch mode, if known, so
+                progress() can account for targets not yet started
+            cancel_token: Optional token carrying a scan-wide deadline; see cancel()
+            expected_runtimes: Optional expected seconds per target and plugin,
+                e.g. from a plan made by plan_scans(). Used instead of the
+                runtime history to order plugins and estimate progress.
+            liveness: Optional checker probing targets before their plugins
+                are created; unreachable targets are dropped or limited to
+                passive plugins, depending on its mode
+            retry_failed: When resuming, rerun plugins that failed, timed
+                out or were skipped in the earlier run instead of
+                reporting their earlier results
         """
         self.target = target
         self.output_dir = output_dir
         self.config = config or {}
         self.logger = logging.getLogger("kast.scanner")
+        self.plugins = plugins or []
+        self._manifests: Optional[Dict[str, PluginManifest]] = None
+        self.batch = targets is not None
+        self.targets = targets if self.batch else [target]
+        self.journal = journal
+        self.run_metadata = dict(metadata or {})
+        self.result_cache = result_cache
+        self.history = history
+        self.target_count = target_count
+        self.cancel_token = cancel_token or CancellationToken()
+        self.expected_runtimes = expected_runtimes
+        self.liveness = liveness
+        self.retry_failed = retry_failed
+        self._run: Optional[_ScanRun] = None
+    
+    def _target_output_dir(self, target: str) -> str:
+        """
+        Return the directory results for a target are written to.
+        
+        Args:
+            target: Target being scanned
+        
+        Returns:
+            Output directory path
+        """
+        if not self.batch:
+            return self.output_dir
+        return os.path.join(self.output_dir, safe_target_name(target))
+    
+    def _plugin_manifests(self) -> Dict[str, PluginManifest]:
+        """
+        Return the manifests of the plugins to run, keyed by plugin name.
+        
+        Plugins given as classes are instantiated once to read their
+        name and dependencies; manifests are used as-is, so their modules
+        are not imported until the plugin is scheduled.
+        
+        Returns:
+            Mapping of plugin name to manifest
+        """
+        if self._manifests is None:
+            manifests = {}
+            for plugin in self.plugins:
+                if not isinstance(plugin, PluginManifest):
+                    plugin = PluginManifest.from_plugin(
+                        plugin(target=self.target, output_dir=self.output_dir, config=self.config)
+                    )
+                manifests[plugin.name] = plugin
+            self._manifests = manifests
+        return self._manifests
+    
+    def _resolve_dependencies(self, manifests: List[PluginManifest]) -> DependencyGraph:
+        """
+        Build the dependency graph for a set of plugins.
+        
+        Args:
+            manifests: Manifests of the plugins to resolve
         
-        # Discover and load plugins
-        self.plugins = self._discover_plugins()
+        Returns:
+            Validated dependency graph keyed by plugin name
+        
+        Raises:
+            DependencyError: If a dependency is missing or the graph has a cycle
+        """
+        return DependencyGraph({manifest.name: manifest.dependencies for manifest in manifests})
     
-    def _resolve_dependencies(self, plugins: List[Type[PluginBase]]) -> List[Type[PluginBase]]:
+    def _start_run(self, per_target_limit: int = None) -> "_ScanRun":
         """
-        Resolve and order plugins based on their dependencies.
+        Create the scheduling state for one pass over the targets.
+        
+        Missing dependencies and cycles are rejected here, before any
+        plugin is started.
         
         Args:
-            plugins: List of plugin classes to resolve
+            per_target_limit: Maximum concurrent plugin executions per target
         
         Returns:
-            Ordered list of plugins to execute
+            Fresh scan run state
         """
-        # Placeholder for more complex dependency resolution
-        # For MVP, we'll sort plugins by scan type (passive first)
-        return sorted(
-            plugins, 
-            key=lambda p: 0 if p.scan_type == ScanType.PASSIVE else 1
+        manifests = self._plugin_manifests()
+        if self.result_cache:
+            self.result_cache.evict()
+        
+        run = _ScanRun(
+            iter(self.targets),
+            RoundRobinScheduler(per_target_limit=per_target_limit),
+            self._resolve_dependencies(list(manifests.values())),
+            tiebreak={
+                name: 0 if manifest.scan_type == ScanType.PASSIVE else 1
+                for name, manifest in manifests.items()
+            },
+            limiter=HostLimiter.from_config(self.config),
+            resources=ResourcePool(self.config.get("resource_capacities"))
         )
+        
+        if self.liveness and not self.journal:
+            run.pending_targets = self._live_targets(run, run.pending_targets)
+        
+        if self.journal:
+            state = self.journal.load()
+            if state.plan:
+                self.logger.info(
+                    f"Resuming run: {sum(len(plugins) for plugins in state.finished.values())} "
+                    f"plugin runs already finished, {len(state.running)} were interrupted"
+                )
+            run.prior = state.finished
+            if self.retry_failed:
+                run.prior = {
+                    target: {
+                        name: entry for name, entry in entries.items()
+                        if entry["status"] == PluginStatus.COMPLETED.value
+                    }
+                    for target, entries in state.finished.items()
+                }
+            run.journaled_targets = set(state.targets)
+            if self.liveness and self.liveness.mode != "skip":
+                run.unreachable = run.journaled_targets & state.unreachable
+            # Targets seen by the earlier run come first, then the rest of the list
+            resumed = state.targets if self.batch else [
+                target for target in self.targets if target in run.journaled_targets
+            ]
+            rest = (target for target in run.pending_targets if target not in run.journaled_targets)
+            run.pending_targets = itertools.chain(resumed, self._live_targets(run, rest) if self.liveness else rest)
+            self.journal.record(
+                "plan",
+                plugins=list(manifests),
+                target=self.target,
+                batch=self.batch,
+                liveness=self.liveness.describe() if self.liveness else None,
+                **self.run_metadata
+            )
+        self._run = run
+        return run
     
-    def run_scans(self, max_concurrent: int = 3) -> List[Dict]:
+    def _live_targets(self, run: "_ScanRun", targets: Iterator[str]) -> Iterator[str]:
         """
-        Execute all discovered plugins.
+        Probe targets ahead of admission and pass on the ones to scan.
+        
+        Every probe is journaled. Unreachable targets are dropped in skip
+        mode; in passive mode they are passed on and marked, so only their
+        passive plugins run. Targets journaled by an earlier run are not
+        probed again (see _start_run).
         
         Args:
-            max_concurrent: Maximum number of concurrent plugin executions
+            run: Scan run state
+            targets: Targets to probe
+        
+        Yields:
+            Targets to admit
+        """
+        for target, probe in self.liveness.check_stream(targets):
+            if self.journal:
+                self.journal.record("liveness", target=target, **probe)
+            if probe["alive"]:
+                run.liveness_counts["alive"] += 1
+                yield target
+                continue
+            run.liveness_counts["unreachable"] += 1
+            errors = ", ".join(f"{port}: {error}" for port, error in probe["errors"].items())
+            if self.liveness.mode == "skip":
+                self.logger.warning(f"Skipping unreachable target {target} ({errors})")
+                if self.target_count:
+                    # Keep progress() estimating over the targets that will run
+                    self.target_count -= 1
+                continue
+            self.logger.warning(f"Target {target} is unreachable ({errors}); running passive plugins only")
+            run.unreachable.add(target)
+            yield target
+    
+    def _log_liveness(self, run: "_ScanRun"):
+        if not self.liveness:
+            return
+        counts = run.liveness_counts
+        action = "skipped" if self.liveness.mode == "skip" else "scanned passively"
+        self.logger.info(
+            f"Liveness: {counts['alive']} targets reachable, {counts['unreachable']} unreachable ({action})"
+        )
+    
+    def _admit_targets(self, run: "_ScanRun", window: int):
+        """
+        Start scheduling pending targets until the window is full.
+        
+        Args:
+            run: Scan run state
+            window: Maximum number of targets with unfinished plugins
+        """
+        while not run.targets_exhausted and len(run.scheduler) < window:
+            target = next(run.pending_targets, None)
+            if target is None:
+                run.targets_exhausted = True
+                break
+            if target in run.seen_targets:
+                self.logger.warning(f"Skipping duplicate target {target}")
+                continue
+            graph = self._target_graph(run, target)
+            run.seen_targets.add(target)
+            if self.journal and target not in run.journaled_targets:
+                self.journal.record("target", target=target)
+            
+            plan = _TargetPlan(
+                target, self._target_output_dir(target), self._plugin_manifests(), self.config,
+                request_rate=run.limiter.request_rate_hint(),
+                timeouts=self._learned_timeouts(run, target)
+            )
+            prior = {
+                name: entry for name, entry in run.prior.get(target, {}).items()
+                if name in run.graph.dependencies
+            }
+            finished = {name: entry["status"] == PluginStatus.COMPLETED.value for name, entry in prior.items()}
+            unreachable = []
+            if target in run.unreachable:
+                # Active plugins count as failed, so their dependents are skipped too
+                run.unreachable.discard(target)
+                unreachable = [
+                    name for name, manifest in plan.manifests.items()
+                    if manifest.scan_type != ScanType.PASSIVE and name not in finished
+                ]
+                finished.update((name, False) for name in unreachable)
+            scheduler = DAGScheduler(graph, tiebreak=run.tiebreak, finished=finished)
+            
+            # Plugins finished by an earlier run are reported, not rerun
+            for name, entry in prior.items():
+                run.pending_results.append(self._restore_result(target, name, entry))
+            for name in unreachable:
+                run.pending_results.append(self._skip_plugin(plan, name, "Target unreachable"))
+            blocked_reason = (
+                "Target unreachable" if unreachable else "Dependency did not complete in an earlier run"
+            )
+            for name in scheduler.take_blocked():
+                run.pending_results.append(self._skip_plugin(plan, name, blocked_reason))
+            if self.history or self.expected_runtimes is not None:
+                for name in graph.dependencies:
+                    if name not in scheduler.finished:
+                        run.expected[(target, name)] = graph.weights[name]
+                        run.expected_total += graph.weights[name]
+            
+            run.scheduler.add(target, scheduler)
+            if target in run.scheduler:
+                run.plans[target] = plan
+    
+    def _target_graph(self, run: "_ScanRun", target: str) -> DependencyGraph:
+        """
+        Return the dependency graph weighted by expected runtimes against a target.
+        
+        Weights are median runtimes from the history for the target's class,
+        so each target starts the plugins heading its longest expected chain
+        first (longest processing time first), and short plugins fill the
+        gaps. Plugins without history get the median of the known runtimes.
+        
+        Args:
+            run: Scan run state
+            target: Target about to be scheduled
         
         Returns:
-            List of scan results
+            Weighted graph, or the unweighted one without history
         """
-        # Resolve plugin dependencies and order
-        ordered_plugins = self._resolve_dependencies(self.plugins)
+        if self.expected_runtimes is not None:
+            # Runtimes fixed by a plan, per target
+            expected = self.expected_runtimes.get(target, {})
+            run.has_estimates = run.has_estimates or bool(expected)
+            return DependencyGraph(
+                run.graph.dependencies, {name: expected.get(name, 1.0) for name in run.graph.dependencies}
+            )
+        if not self.history:
+            return run.graph
+        klass = target_class(target)
+        if klass not in run.graphs:
+            expected = {name: self.history.expected(name, target) for name in run.graph.dependencies}
+            known = [seconds for seconds in expected.values() if seconds is not None]
+            run.has_estimates = run.has_estimates or bool(known)
+            default = statistics.median(known) if known else 1.0
+            run.graphs[klass] = DependencyGraph(
+                run.graph.dependencies,
+                {name: default if seconds is None else seconds for name, seconds in expected.items()}
+            )
+        return run.graphs[klass]
+    
+    def _learned_timeouts(self, run: "_ScanRun", target: str) -> Dict[str, Dict]:
+        """
+        Return timeouts learned from runtime history for the plugins of a target.
         
-        # Results storage
-        scan_results = []
+        Only used when the adaptive_timeouts option is set. Each plugin
+        with at least adaptive_timeout_min_samples completed runs against
+        the target's class gets p95 x adaptive_timeout_factor, clamped to
+        [adaptive_timeout_min, adaptive_timeout_max]; others keep their
+        configured timeout.
         
-        # Concurrent execution
-        with ThreadPoolExecutor(max_workers=max_concurrent) as executor:
-            # Submit plugin execution tasks
-            future_to_plugin = {
-                executor.submit(
-                    self._execute_plugin, 
-                    plugin_class(
-                        target=self.target, 
-                        output_dir=self.output_dir, 
-                        config=self.config
+        Args:
+            run: Scan run state
+            target: Target about to be scheduled
+        
+        Returns:
+            Mapping of plugin name to learned timeout record
+        """
+        if not (self.history and self.config.get("adaptive_timeouts")):
+            return {}
+        klass = target_class(target)
+        if klass not in run.timeouts:
+            timeouts = {}
+            for name in run.graph.dependencies:
+                learned = self.history.learned_timeout(
+                    name, target,
+                    factor=self.config.get("adaptive_timeout_factor", 3.0),
+                    minimum=self.config.get("adaptive_timeout_min", 30),
+                    maximum=self.config.get("adaptive_timeout_max", 3600),
+                    min_samples=self.config.get("adaptive_timeout_min_samples", 5)
+                )
+                if learned:
+                    self.logger.info(
+                        f"Using learned timeout of {learned['seconds']}s for {name} against {klass} targets "
+                        f"(p95 {learned['p95_seconds']:.1f}s over {learned['samples']} runs)"
                     )
-                ): plugin_class for plugin_class in ordered_plugins
-            }
+                    timeouts[name] = learned
+            run.timeouts[klass] = timeouts
+        return run.timeouts[klass]
+    
+    def cancel(self, reason: str = "Scan cancelled"):
+        """
+        Stop the running scan.
+        
+        No further plugins are started, running tools have their process
+        groups terminated, and every unfinished plugin of the targets
+        being scanned is reported with the cancelled status. Safe to call
+        from another thread or a signal handler.
+        
+        Args:
+            reason: Why the scan is cancelled
+        """
+        self.cancel_token.cancel(reason)
+    
+    def _cancel_pending(self, run: "_ScanRun", running: Iterable[Future] = ()) -> List[Dict]:
+        """
+        Report every plugin not yet started as cancelled, once the scan is cancelled.
+        
+        Args:
+            run: Scan run state
+            running: Futures of submitted plugins; those an executor has not
+                started yet (e.g. still queued for a worker) are withdrawn
+        
+        Returns:
+            Results of the cancelled plugins (empty unless the scan is cancelled)
+        """
+        if not self.cancel_token.cancelled:
+            return []
+        for future in running:
+            future.cancel()
+        
+        results = []
+        for target, name in run.scheduler.cancel_pending():
+            run.expected.pop((target, name), None)
+            results.append(self._cancel_plugin(run.plans[target], name))
+        for target in [target for target in run.plans if target not in run.scheduler]:
+            del run.plans[target]
+        run.finished_count += len(results)
+        return results
+    
+    def _cancel_plugin(self, plan: "_TargetPlan", name: str) -> Dict:
+        """
+        Record a plugin as cancelled before it was started.
+        
+        Args:
+            plan: Plugins of the target being scanned
+            name: Plugin that will not run
+        
+        Returns:
+            Result of the cancelled plugin
+        """
+        try:
+            result = plan.plugin(name).cancel(self.cancel_token.reason)
+        except Exception as e:
+            result = self._load_error(plan.target, name, e)
+        plan.release(name)
+        self._journal_finished(plan, name, result)
+        return result
+    
+    def _log_cancelled(self, run: "_ScanRun"):
+        if not self.cancel_token.cancelled:
+            return
+        self.logger.warning(f"Scan stopped: {self.cancel_token.reason}")
+        if not run.targets_exhausted:
+            self.logger.warning("Targets not started before the scan stopped were left for a resumed run")
+    
+    def progress(self) -> Optional[Dict]:
+        """
+        Report the progress of the running scan.
+        
+        Returns:
+            Dict with finished and running plugin counts and, when the
+            runtime history allows it, eta_seconds; None if no scan runs
+        """
+        run = self._run
+        if run is None:
+            return None
+        progress = {"finished": run.finished_count, "running": len(run.started), "eta_seconds": None}
+        if not run.has_estimates or not run.seen_targets:
+            return progress
+        
+        now = time.monotonic()
+        remaining = sum(run.expected.values()) - sum(
+            min(now - started, run.expected.get(job, 0)) for job, started in run.started.items()
+        )
+        if self.batch and self.target_count:
+            # Targets not admitted yet are assumed to take as long as the average admitted one
+            unseen = max(0, self.target_count - len(run.seen_targets))
+            remaining += unseen * run.expected_total / len(run.seen_targets)
+        limit = run.concurrency.limit if run.concurrency else 1
+        progress["eta_seconds"] = max(0.0, remaining) / limit
+        return progress
+    
+    def _restore_result(self, target: str, name: str, entry: Dict) -> Dict:
+        """
+        Load the result of a plugin finished by an earlier run.
+        
+        Args:
+            target: Target the plugin ran against
+            name: Plugin name
+            entry: Journal entry for the plugin
+        
+        Returns:
+            The stored results document, or a minimal result if there is none
+        """
+        results_file = entry.get("results_file")
+        if results_file and os.path.exists(results_file):
+            with open(results_file, "r") as f:
+                result = json.load(f)
+        else:
+            result = {"plugin": name, "target": target, "status": entry["status"]}
+        result["resumed"] = True
+        return result
+    
+    def _next_job(self, run: "_ScanRun") -> Optional[Tuple[str, str]]:
+        """
+        Take the next plugin to start and journal that it is running.
+        
+        Args:
+            run: Scan run state
+        
+        Returns:
+            (target, plugin name) tuple, or None if nothing can start
+        """
+        job = run.scheduler.next_ready(lambda target, name: self._admit_job(run, target, name))
+        if job:
+            run.started[job] = time.monotonic()
+        if job and self.journal:
+            self.journal.record("running", target=job[0], plugin=job[1])
+        return job
+    
+    def _admit_job(self, run: "_ScanRun", target: str, name: str) -> bool:
+        """
+        Check resource claims and, for active plugins, the per-host limits
+        before a plugin is started.
+        
+        Args:
+            run: Scan run state
+            target: Target the plugin would scan
+            name: Plugin to start
+        
+        Returns:
+            True if the plugin may start now
+        """
+        claims = run.plans[target].claims(name)
+        if not run.resources.try_acquire(claims):
+            return False
+        if run.plans[target].manifests[name].scan_type != ScanType.PASSIVE:
+            if not run.limiter.try_acquire(target):
+                # An exclusive plugin keeps its turn, so others cannot starve it
+                run.resources.release(claims, started=False)
+                return False
+            run.host_slots.add((target, name))
+        run.resource_slots[(target, name)] = claims
+        return True
+    
+    def _throttle_delay(self, run: "_ScanRun") -> Optional[float]:
+        """Return how long to wait for a host's start rate, or None if no host is throttled."""
+        return run.limiter.retry_after()
+    
+    def _wake_delay(self, delay: Optional[float], concurrency: AdaptiveConcurrency) -> Optional[float]:
+        """Return how long to wait for running plugins before scheduling again."""
+        if concurrency.adaptive:
+            # Let the controller raise the limit even while nothing finishes
+            delay = concurrency.interval if delay is None else min(delay, concurrency.interval)
+        remaining = self.cancel_token.remaining()
+        if remaining is not None and not self.cancel_token.cancelled:
+            # Wake at the deadline to stop scheduling
+            delay = remaining if delay is None else min(delay, remaining)
+        return delay
+    
+    def _skip_plugin(self, plan: "_TargetPlan", name: str, reason: str) -> Dict:
+        """
+        Record a plugin as skipped because a dependency did not complete.
+        
+        Args:
+            plan: Plugins of the target being scanned
+            name: Plugin to skip
+            reason: Why the plugin is skipped
+        
+        Returns:
+            Result of the skipped plugin
+        """
+        try:
+            result = plan.plugin(name).skip(reason)
+        except Exception as e:
+            result = self._load_error(plan.target, name, e)
+        plan.release(name)
+        self._journal_finished(plan, name, result)
+        return result
+    
+    def _journal_finished(self, plan: "_TargetPlan", name: str, result: Dict):
+        if not self.journal:
+            return
+        results_file = os.path.join(plan.output_dir, f"{name}_results.json")
+        self.journal.record(
+            "finished",
+            target=plan.target,
+            plugin=name,
+            status=result.get("status"),
+            results_file=results_file if os.path.exists(results_file) else None
+        )
+    
+    def _finish_job(self, run: "_ScanRun", target: str, name: str, result: Dict) -> List[Dict]:
+        """
+        Record a finished plugin and skip anything that depended on it.
+        
+        Args:
+            run: Scan run state
+            target: Target the plugin ran against
+            name: Plugin that finished
+            result: Result returned by the plugin
+        
+        Returns:
+            The plugin's result followed by results of skipped dependents
+        """
+        plan = run.plans[target]
+        plan.release(name)
+        self._journal_finished(plan, name, result)
+        if (target, name) in run.host_slots:
+            run.host_slots.remove((target, name))
+            run.limiter.release(target)
+        if (target, name) in run.resource_slots:
+            run.resources.release(run.resource_slots.pop((target, name)))
+        
+        run.started.pop((target, name), None)
+        run.expected.pop((target, name), None)
+        self._record_runtime(name, target, result)
+        
+        results = [result]
+        succeeded = result.get("status") == PluginStatus.COMPLETED.value
+        for skipped in run.scheduler.mark_finished(target, name, succeeded):
+            run.expected.pop((target, skipped), None)
+            if self.cancel_token.cancelled:
+                results.append(self._cancel_plugin(plan, skipped))
+            else:
+                results.append(self._skip_plugin(plan, skipped, f"Dependency {name} did not complete"))
+        run.finished_count += len(results)
+        
+        # Release plugin instances once a target is finished
+        if target not in run.scheduler:
+            del run.plans[target]
+        return results
+    
+    def _record_runtime(self, name: str, target: str, result: Dict):
+        """Add a plugin's runtime to the history, unless it did not actually run."""
+        duration = result.get("duration_seconds")
+        if not self.history or duration is None or result.get("cached") or result.get("resumed"):
+            return
+        if result.get("status") == PluginStatus.CANCELLED.value:
+            # Cut short, so not representative of the plugin's runtime
+            return
+        self.history.record(name, target, duration, result.get("status"))
+    
+    def plan_scans(self, max_concurrent: int = 3, per_target_limit: int = None,
+                   concurrency: AdaptiveConcurrency = None) -> Dict:
+        """
+        Work out how a scan would run, without starting any tool.
+        
+        The scheduler is driven through a simulated run: plugins are
+        admitted exactly as run_scans would (dependencies, priorities,
+        resource claims and per-host limits), each taking its expected
+        runtime from the history. Host start rates are not simulated.
+        Without history the order and slots are still exact, but no times
+        are given. Every target is planned, so target streams are read in
+        full.
+        
+        Args:
+            max_concurrent: Maximum number of concurrent plugin executions
+            per_target_limit: Maximum concurrent plugin executions per target
+            concurrency: Optional controller whose current limit is used
+                as the number of slots; overrides max_concurrent
+        
+        Returns:
+            Plan with one job per plugin run (target, plugin, command, slot,
+            expected start and end, whether it is on its target's critical
+            path), the critical paths, and the inputs the plan was made
+            from, so a run can be started with them again (see main's
+            --execute-plan); such a run reschedules from the same inputs
+            rather than replaying the recorded jobs
+        """
+        slots = (concurrency or AdaptiveConcurrency.fixed(max_concurrent)).limit
+        # Nothing is recorded and no target is contacted
+        journal, self.journal = self.journal, None
+        liveness, self.liveness = self.liveness, None
+        try:
+            run = self._start_run(per_target_limit)
+        finally:
+            self.journal = journal
+            self.liveness = liveness
+        # Start spacing depends on wall-clock time, which is not simulated
+        run.limiter.start_rate = None
+        
+        free_slots = list(range(slots))
+        running = []  # Heap of (end, sequence, job index)
+        jobs: List[Dict] = []
+        critical_paths: Dict[str, List[str]] = {}
+        now = 0.0
+        while True:
+            self._admit_targets(run, slots * 2)
+            run.take_pending_results()
             
-            # Collect results as they complete
-            for future in as_completed(future_to_plugin):
-                plugin_class = future_to_plugin[future]
+            while free_slots:
+                job = run.scheduler.next_ready(lambda target, name: self._admit_job(run, target, name))
+                if job is None:
+                    break
+                target, name = job
+                graph = self._target_graph(run, target)
+                if target not in critical_paths:
+                    critical_paths[target] = graph.critical_path()
+                seconds = graph.weights.get(name)
                 try:
-                    result = future.result()
-                    scan_results.append(result)
+                    command = run.plans[target].plugin(name).planned_command()
                 except Exception as e:
-                    self.logger.error(f"Plugin {plugin_class.__name__} failed: {e}")
+                    self.logger.warning(f"Could not build the command of {name} for {target}: {e}")
+                    command = None
+                slot = heapq.heappop(free_slots)
+                jobs.append({
+                    "target": target,
+                    "plugin": name,
+                    "dependencies": run.graph.dependencies[name],
+                    "command": command,
+                    "slot": slot,
+                    "expected_seconds": seconds,
+                    "expected_start": now if seconds is not None else None,
+                    "expected_end": now + seconds if seconds is not None else None,
+                    "critical": name in critical_paths[target],
+                })
+                # Unknown runtimes count as one second, so the order stays exact
+                heapq.heappush(running, (now + (seconds or 1.0), len(jobs), len(jobs) - 1))
+            
+            if not running:
+                break
+            now, _, index = heapq.heappop(running)
+            job = jobs[index]
+            heapq.heappush(free_slots, job["slot"])
+            self._finish_job(run, job["target"], job["plugin"], {"status": PluginStatus.COMPLETED.value})
+        self._run = None
+        
+        timed = all(job["expected_seconds"] is not None for job in jobs)
+        return {
+            "version": 1,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "target": self.target,
+            "targets": list(critical_paths) if self.batch else None,
+            "output_dir": self.output_dir,
+            "config": self.config,
+            "plugins": list(run.graph.dependencies),
+            "dependencies": run.graph.dependencies,
+            "max_concurrent": slots,
+            "per_target_limit": per_target_limit,
+            "estimated_seconds": max((job["expected_end"] for job in jobs), default=0.0) if timed else None,
+            "critical_paths": critical_paths,
+            "jobs": jobs,
+        }
+    
+    def run_scans(self, max_concurrent: int = 3, per_target_limit: int = None,
+                  on_result: Callable[[Dict], None] = None, executor: Executor = None,
+                  concurrency: AdaptiveConcurrency = None) -> List[Dict]:
+        """
+        Execute all plugins against every target, honoring plugin dependencies.
+        
+        Collects the results of iter_scans into a list; see iter_scans
+        for how plugins are scheduled.
+        
+        Args:
+            max_concurrent: Maximum number of concurrent plugin executions
+            per_target_limit: Maximum concurrent plugin executions per target
+            on_result: Optional callback invoked with each result as it is produced
+            executor: Optional shared executor to run plugins on instead of
+                a pool created for this call, e.g. a WorkQueueExecutor
+                handing the plugins to queue worker processes. Plugins are
+                submitted as PluginJob callables.
+            concurrency: Optional controller adjusting the number of
+                concurrent plugins; overrides max_concurrent
+        
+        Returns:
+            List of scan results
+        """
+        scan_results = []
+        for result in self.iter_scans(max_concurrent, per_target_limit, executor, concurrency):
+            scan_results.append(result)
+            if on_result:
+                on_result(result)
+        return scan_results
+    
+    def iter_scans(self, max_concurrent: int = 3, per_target_limit: int = None,
+                   executor: Executor = None, concurrency: AdaptiveConcurrency = None) -> Iterator[Dict]:
+        """
+        Execute all plugins against every target, yielding each result as it is produced.
+        
+        A plugin is started as soon as every plugin it depends on has
+        completed, so independent branches of the graph run in parallel.
+        Plugins on the longest dependency chain are started first, with
+        passive plugins ahead of active ones on ties. In batch mode all
+        targets share one worker pool and are served round-robin; only a
+        window of targets is instantiated at a time so target lists can be
+        streamed. Results are not kept once yielded, so memory use does
+        not grow with the number of targets.
+        
+        Plugins keep running while the consumer handles a result. Closing
+        the generator early stops scheduling and waits for running plugins.
         
+        Args:
+            max_concurrent: Maximum number of concurrent plugin executions
+            per_target_limit: Maximum concurrent plugin executions per target
+            executor: Optional shared executor to run plugins on instead of
+                a pool created for this call
+            concurrency: Optional controller adjusting the number of
+                concurrent plugins; overrides max_concurrent
+        
+        Yields:
+            Scan results, in completion order
+        """
+        run = self._start_run(per_target_limit)
+        concurrency = concurrency or AdaptiveConcurrency.fixed(max_concurrent)
+        run.concurrency = concurrency
+        
+        pool = nullcontext(executor) if executor else ThreadPoolExecutor(max_workers=concurrency.maximum)
+        with pool as executor:
+            running = {}
+            
+            while True:
+                cancelled = self.cancel_token.cancelled
+                if not cancelled:
+                    # Keep enough targets active that dependency waits on one
+                    # target never leave worker slots idle
+                    self._admit_targets(run, concurrency.limit * 2)
+                yield from run.take_pending_results()
+                yield from self._cancel_pending(run, running)
+                
+                # Fill free worker slots with ready plugins
+                while not cancelled and len(running) < concurrency.limit:
+                    job = self._next_job(run)
+                    if job is None:
+                        break
+                    target, name = job
+                    running[self._submit_job(executor, run.plans[target], name)] = job
+                
+                concurrency.update(saturated=len(running) >= concurrency.limit)
+                delay = None if cancelled else self._throttle_delay(run)
+                if not running:
+                    if delay is None:
+                        break
+                    # Only plugins held back by a host's start rate are left
+                    self.cancel_token.wait(delay)
+                    continue
+                
+                finished, _ = wait(running, timeout=self._wake_delay(delay, concurrency), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    target, name = running.pop(future)
+                    try:
+                        result = future.result()
+                    except CancelledError:
+                        # Withdrawn before it started, by _cancel_pending
+                        result = {"plugin": name, "target": target, "status": PluginStatus.CANCELLED.value,
+                                  "error": self.cancel_token.reason}
+                    except Exception as e:
+                        self.logger.error(f"Plugin {name} failed against {target}: {e}")
+                        result = {"plugin": name, "target": target, "status": "Failed", "error": str(e)}
+                    concurrency.record(result)
+                    yield from self._finish_job(run, target, name, result)
+        
+        self._log_liveness(run)
+        self._log_cancelled(run)
+    
+    async def run_scans_async(self, max_concurrent: int = 3, per_target_limit: int = None,
+                              on_result: Callable[[Dict], None] = None,
+                              concurrency: AdaptiveConcurrency = None) -> List[Dict]:
+        """
+        Execute all plugins on the running event loop.
+        
+        Collects the results of aiter_scans into a list.
+        
+        Args:
+            max_concurrent: Maximum number of concurrent plugin executions
+            per_target_limit: Maximum concurrent plugin executions per target
+            on_result: Optional callback invoked with each result as it is produced
+            concurrency: Optional controller adjusting the number of
+                concurrent plugins; overrides max_concurrent
+        
+        Returns:
+            List of scan results
+        """
+        scan_results = []
+        async for result in self.aiter_scans(max_concurrent, per_target_limit, concurrency):
+            scan_results.append(result)
+            if on_result:
+                on_result(result)
         return scan_results
     
+    async def aiter_scans(self, max_concurrent: int = 3, per_target_limit: int = None,
+                          concurrency: AdaptiveConcurrency = None) -> AsyncIterator[Dict]:
+        """
+        Execute all plugins on the running event loop, yielding each result as it is produced.
+        
+        Scheduling matches iter_scans, but each plugin runs as an asyncio
+        task driving its tool through asyncio.create_subprocess_exec, so
+        large values of max_concurrent do not need a thread per tool.
+        Cancelling the consumer, or closing the iterator early, cancels
+        and kills every running tool.
+        
+        Args:
+            max_concurrent: Maximum number of concurrent plugin executions
+            per_target_limit: Maximum concurrent plugin executions per target
+            concurrency: Optional controller adjusting the number of
+                concurrent plugins; overrides max_concurrent
+        
+        Yields:
+            Scan results, in completion order
+        """
+        run = self._start_run(per_target_limit)
+        concurrency = concurrency or AdaptiveConcurrency.fixed(max_concurrent)
+        run.concurrency = concurrency
+        running = {}
+        
+        try:
+            while True:
+                cancelled = self.cancel_token.cancelled
+                if not cancelled:
+                    self._admit_targets(run, concurrency.limit * 2)
+                for result in run.take_pending_results() + self._cancel_pending(run):
+                    yield result
+                
+                while not cancelled and len(running) < concurrency.limit:
+                    job = self._next_job(run)
+                    if job is None:
+                        break
+                    target, name = job
+                    task = asyncio.ensure_future(self._execute_job_async(run.plans[target], name))
+                    running[task] = job
+                
+                concurrency.update(saturated=len(running) >= concurrency.limit)
+                delay = None if cancelled else self._throttle_delay(run)
+                if not running:
+                    if delay is None:
+                        break
+                    await asyncio.sleep(self._wake_delay(delay, concurrency))
+                    continue
+                
+                finished, _ = await asyncio.wait(
+                    running, timeout=self._wake_delay(delay, concurrency), return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    target, name = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        self.logger.error(f"Plugin {name} failed against {target}: {e}")
+                        result = {"plugin": name, "target": target, "status": "Failed", "error": str(e)}
+                    concurrency.record(result)
+                    for finished_result in self._finish_job(run, target, name, result):
+                        yield finished_result
+            self._log_liveness(run)
+            self._log_cancelled(run)
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+    
+    def run_plugin(self, name: str) -> Dict:
+        """
+        Execute a single plugin against the target, ignoring its dependencies.
+        
+        Used by queue workers, whose orchestrator has already scheduled
+        the plugin.
+        
+        Args:
+            name: Plugin to run
+        
+        Returns:
+            Plugin execution results
+        """
+        plan = _TargetPlan(self.target, self.output_dir, self._plugin_manifests(), self.config)
+        return self._execute_job(plan, name)
+    
+    def _submit_job(self, executor: Executor, plan: "_TargetPlan", name: str) -> Future:
+        """
+        Start a scheduled plugin on an executor.
+        
+        Args:
+            executor: Thread pool or work queue backend
+            plan: Plugins of the target being scanned
+            name: Plugin to run
+        
+        Returns:
+            Future resolved with the plugin's result
+        """
+        if name in plan.load_errors:
+            # Nothing to run; no executor or worker needs to load it again
+            future = Future()
+            future.set_result(self._load_error(plan.target, name, plan.load_errors[name]))
+            return future
+        return executor.submit(PluginJob(self, plan, name))
+    
+    def _execute_job(self, plan: "_TargetPlan", name: str) -> Dict:
+        """
+        Instantiate a scheduled plugin and execute it.
+        
+        Args:
+            plan: Plugins of the target being scanned
+            name: Plugin to run
+        
+        Returns:
+            Plugin execution results
+        """
+        try:
+            plugin_instance = plan.plugin(name)
+        except Exception as e:
+            return self._load_error(plan.target, name, e)
+        return self._execute_plugin(plugin_instance)
+    
+    async def _execute_job_async(self, plan: "_TargetPlan", name: str) -> Dict:
+        """
+        Instantiate a scheduled plugin and execute it on the event loop.
+        
+        Args:
+            plan: Plugins of the target being scanned
+            name: Plugin to run
+        
+        Returns:
+            Plugin execution results
+        """
+        try:
+            plugin_instance = plan.plugin(name)
+        except Exception as e:
+            return self._load_error(plan.target, name, e)
+        return await self._execute_plugin_async(plugin_instance)
+    
     def _execute_plugin(self, plugin_instance: PluginBase) -> Dict:
         """
         Execute a single plugin with error handling.
@@ -110,20 +1042,246 @@ class ScanOrchestrator:
         try:
             # Check if plugin should run based on its run-if logic
             if not plugin_instance.run_if():
-                self.logger.info(f"Plugin {plugin_instance.name} did not meet run conditions")
-                return {
-                    "plugin": plugin_instance.name,
-                    "status": "Not Run",
-                    "reason": "Run conditions not met"
-                }
+                return self._not_run(plugin_instance)
+            
+            cached = self._cached_result(plugin_instance)
+            if cached:
+                return cached
             
             # Run the plugin
-            return plugin_instance.run()
+            plugin_instance.cancel_token = self.cancel_token
+            result = plugin_instance.run()
+            self._cache_result(plugin_instance, result)
+            return result
         
         except Exception as e:
-            self.logger.error(f"Error in plugin {plugin_instance.name}: {e}")
-            return {
-                "plugin": plugin_instance.name,
-                "status": "Failed",
-                "error": str(e)
-            }
\ No newline at end of file
+            return self._plugin_error(plugin_instance, e)
+    
+    async def _execute_plugin_async(self, plugin_instance: PluginBase) -> Dict:
+        """
+        Execute a single plugin on the event loop with error handling.
+        
+        Args:
+            plugin_instance: Instantiated plugin to run
+        
+        Returns:
+            Plugin execution results
+        """
+        try:
+            if not plugin_instance.run_if():
+                return self._not_run(plugin_instance)
+            
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(None, self._cached_result, plugin_instance)
+            if cached:
+                return cached
+            
+            plugin_instance.cancel_token = self.cancel_token
+            result = await plugin_instance.run_async()
+            await loop.run_in_executor(None, self._cache_result, plugin_instance, result)
+            return result
+        
+        except Exception as e:
+            return self._plugin_error(plugin_instance, e)
+    
+    def _cache_key(self, plugin_instance: PluginBase) -> Optional[str]:
+        if not self.result_cache or plugin_instance.cache_ttl <= 0:
+            return None
+        return ResultCache.key(
+            plugin_instance.target, plugin_instance.name, plugin_instance.version, plugin_instance.cache_settings()
+        )
+    
+    def _cached_result(self, plugin_instance: PluginBase) -> Optional[Dict]:
+        """
+        Return a fresh cached result for a plugin, if caching is enabled for it.
+        
+        Args:
+            plugin_instance: Plugin about to run
+        
+        Returns:
+            Cached results marked cached, or None on a miss
+        """
+        key = self._cache_key(plugin_instance)
+        if not key:
+            return None
+        cached = self.result_cache.get(key, plugin_instance.cache_ttl)
+        if not cached:
+            return None
+        self.logger.info(f"Using cached result of {plugin_instance.name} for {plugin_instance.target}")
+        return plugin_instance.use_cached_results(cached)
+    
+    def _cache_result(self, plugin_instance: PluginBase, result: Dict):
+        key = self._cache_key(plugin_instance)
+        if key and result.get("status") == PluginStatus.COMPLETED.value:
+            self.result_cache.put(key, result, plugin_instance.output_dir)
+    
+    def _not_run(self, plugin_instance: PluginBase) -> Dict:
+        self.logger.info(f"Plugin {plugin_instance.name} did not meet run conditions")
+        return {
+            "plugin": plugin_instance.name,
+            "target": plugin_instance.target,
+            "status": "Not Run",
+            "reason": "Run conditions not met"
+        }
+    
+    def _plugin_error(self, plugin_instance: PluginBase, error: Exception) -> Dict:
+        self.logger.error(f"Error in plugin {plugin_instance.name}: {error}")
+        return {
+            "plugin": plugin_instance.name,
+            "target": plugin_instance.target,
+            "status": "Failed",
+            "error": str(error)
+        }
+    
+    def _load_error(self, target: str, name: str, error: Exception) -> Dict:
+        self.logger.error(f"Could not load plugin {name}: {error}")
+        return {
+            "plugin": name,
+            "target": target,
+            "status": "Failed",
+            "error": f"Could not load plugin: {error}"
+        }
+
+
+class PluginJob:
+    """
+    One scheduled plugin run, as submitted to an executor.
+    
+    Calling the job runs the plugin in the calling process, which is what
+    thread pools do. Executors that run plugins elsewhere, such as
+    WorkQueueExecutor, call work_item() instead for a self-contained,
+    JSON-serialisable description of the run.
+    """
+    
+    def __init__(self, orchestrator: ScanOrchestrator, plan: "_TargetPlan", name: str):
+        self.orchestrator = orchestrator
+        self.plan = plan
+        self.name = name
+    
+    def __call__(self) -> Dict:
+        return self.orchestrator._execute_job(self.plan, self.name)
+    
+    def work_item(self) -> Dict:
+        """
+        Describe the run for another process.
+        
+        Returns:
+            Dict with target, plugin, output_dir, config and use_cache keys;
+            config carries the scan deadline and result cache location
+        """
+        orchestrator = self.orchestrator
+        config = self.plan.plugin_config(self.name)
+        if orchestrator.cancel_token.expires_at is not None:
+            # Workers stop the tool at the scan deadline too
+            config = {**config, "scan_deadline": orchestrator.cancel_token.expires_at}
+        if orchestrator.result_cache:
+            # Workers open the same cache, wherever they run from
+            config = {**config, "result_cache_dir": orchestrator.result_cache.directory}
+        return {
+            "target": self.plan.target,
+            "plugin": self.name,
+            "output_dir": self.plan.output_dir,
+            "config": config,
+            "use_cache": orchestrator.result_cache is not None,
+        }
+
+
+class _ScanRun:
+    """Scheduling state shared by the thread and asyncio engines."""
+    
+    def __init__(self, pending_targets: Iterator[str], scheduler: RoundRobinScheduler,
+                 graph: DependencyGraph, tiebreak: Dict[str, int], limiter: HostLimiter,
+                 resources: ResourcePool):
+        self.pending_targets = pending_targets
+        self.scheduler = scheduler
+        self.graph = graph
+        self.tiebreak = tiebreak
+        self.limiter = limiter
+        self.host_slots = set()  # (target, plugin) pairs holding a host limiter slot
+        self.resources = resources
+        self.resource_slots: Dict[Tuple[str, str], Dict[str, float]] = {}  # Claims held per (target, plugin)
+        self.graphs: Dict[str, DependencyGraph] = {}  # Runtime-weighted graphs by target class
+        self.timeouts: Dict[str, Dict[str, Dict]] = {}  # Learned timeouts by target class
+        self.concurrency: Optional[AdaptiveConcurrency] = None
+        self.started: Dict[Tuple[str, str], float] = {}
+        self.expected: Dict[Tuple[str, str], float] = {}  # Expected runtimes of unfinished plugins
+        self.expected_total = 0.0
+        self.has_estimates = False  # Whether the history knew any of the plugins
+        self.finished_count = 0
+        self.targets_exhausted = False
+        self.seen_targets = set()
+        self.plans: Dict[str, _TargetPlan] = {}
+        self.prior: Dict[str, Dict[str, Dict]] = {}
+        self.journaled_targets = set()
+        self.unreachable = set()  # Admitted targets that failed the liveness check (passive mode)
+        self.liveness_counts = {"alive": 0, "unreachable": 0}
+        self.pending_results: List[Dict] = []
+    
+    def take_pending_results(self) -> List[Dict]:
+        """Return results produced while admitting targets, e.g. from a resumed run."""
+        results, self.pending_results = self.pending_results, []
+        self.finished_count += len(results)
+        return results
+
+
+class _TargetPlan:
+    """Plugins of one target, instantiated only when they are scheduled."""
+    
+    logger = logging.getLogger("kast.scanner")
+    
+    def __init__(self, target: str, output_dir: str, manifests: Dict[str, PluginManifest], config: Dict,
+                 request_rate: float = None, timeouts: Dict[str, Dict] = None):
+        self.target = target
+        self.output_dir = output_dir
+        self.manifests = manifests
+        self.config = config
+        self.request_rate = request_rate
+        self.timeouts = timeouts or {}
+        self.instances: Dict[str, PluginBase] = {}
+        self.load_errors: Dict[str, Exception] = {}  # Plugins that failed to load, reported instead of run
+        self._claims: Dict[str, Dict[str, float]] = {}
+    
+    def plugin_config(self, name: str) -> Dict:
+        """Return the configuration a plugin is created with, including its rate hint and learned timeout."""
+        config = self.config
+        if self.request_rate and self.manifests[name].scan_type == ScanType.ACTIVE:
+            config = {**config, "request_rate": self.request_rate}
+        if name in self.timeouts:
+            config = {**config, "learned_timeout": self.timeouts[name]}
+        return config
+    
+    def plugin(self, name: str) -> PluginBase:
+        """Return the plugin instance for this target, creating it on first use."""
+        if name in self.load_errors:
+            raise self.load_errors[name]
+        if name not in self.instances:
+            self.instances[name] = self.manifests[name].create(self.target, self.output_dir, self.plugin_config(name))
+        return self.instances[name]
+    
+    def claims(self, name: str) -> Dict[str, float]:
+        """
+        Return the normalized resource claims of a plugin.
+        
+        The plugin's own resource_claims (which include the
+        plugins.<name>.resource_claims setting) override the manifest's,
+        and concurrency_allowed set to False on either makes the claim
+        exclusive. A plugin that cannot be loaded keeps its manifest's
+        claims; its load error is recorded and becomes its result instead
+        of a run.
+        """
+        if name not in self._claims:
+            manifest = self.manifests[name]
+            claims, concurrency_allowed = dict(manifest.resource_claims), manifest.concurrency_allowed
+            try:
+                plugin = self.plugin(name)
+                claims.update(plugin.resource_claims)
+                concurrency_allowed = concurrency_allowed and plugin.concurrency_allowed
+            except Exception as e:
+                self.logger.warning(f"Could not load plugin {name} to read its resource claims: {e}")
+                self.load_errors[name] = e
+            self._claims[name] = normalize_claims(claims, concurrency_allowed)
+        return self._claims[name]
+    
+    def release(self, name: str):
+        """Drop a finished plugin instance."""
+        self.instances.pop(name, None)
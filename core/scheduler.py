@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# scheduler.py
+# Dependency graph scheduling for KAST plugins
+
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class DependencyError(ValueError):
+    """Raised when plugin dependencies cannot be satisfied."""
+
+
+class DependencyCycleError(DependencyError):
+    """Raised when plugin dependencies form a cycle."""
+
+
+class DependencyGraph:
+    """
+    Directed acyclic graph of plugins keyed by plugin name.
+
+    Edges point from a plugin to the plugins that depend on it. The graph
+    is validated on construction, so an unknown dependency or a cycle is
+    rejected before any tool is started.
+    """
+
+    def __init__(self, dependencies: Dict[str, List[str]], weights: Dict[str, float] = None):
+        """
+        Build and validate the graph.
+
+        Args:
+            dependencies: Mapping of plugin name to the names it depends on
+            weights: Optional expected cost of each plugin (defaults to 1.0)
+
+        Raises:
+            DependencyError: If a plugin depends on a plugin not in the graph
+            DependencyCycleError: If the dependencies contain a cycle
+        """
+        self.dependencies = {name: list(deps) for name, deps in dependencies.items()}
+        self.weights = weights or {}
+        self.dependents: Dict[str, List[str]] = {name: [] for name in self.dependencies}
+
+        for name, deps in self.dependencies.items():
+            for dep in deps:
+                if dep not in self.dependencies:
+                    raise DependencyError(f"Plugin {name} depends on unknown plugin {dep}")
+                self.dependents[dep].append(name)
+
+        self.order = self._topological_order()
+        self.priorities = self._critical_path_lengths()
+
+    def __len__(self) -> int:
+        return len(self.dependencies)
+
+    def _topological_order(self) -> List[str]:
+        """
+        Order plugins so that every plugin follows its dependencies.
+
+        Returns:
+            Plugin names in topological order
+        """
+        remaining = {name: len(deps) for name, deps in self.dependencies.items()}
+        queue = sorted(name for name, count in remaining.items() if count == 0)
+        order = []
+
+        while queue:
+            name = queue.pop(0)
+            order.append(name)
+            for dependent in self.dependents[name]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    queue.append(dependent)
+
+        if len(order) != len(self.dependencies):
+            cyclic = sorted(name for name, count in remaining.items() if count > 0)
+            raise DependencyCycleError(f"Dependency cycle between plugins: {', '.join(cyclic)}")
+
+        return order
+
+    def _critical_path_lengths(self) -> Dict[str, float]:
+        """
+        Compute the longest weighted path from each plugin to a sink.
+
+        Returns:
+            Mapping of plugin name to its critical path length
+        """
+        lengths: Dict[str, float] = {}
+        for name in reversed(self.order):
+            tail = max((lengths[dependent] for dependent in self.dependents[name]), default=0.0)
+            lengths[name] = self.weights.get(name, 1.0) + tail
+        return lengths
+
+    def critical_path(self) -> List[str]:
+        """
+        Return the chain of plugins that bounds the total scan time.
+
+        Returns:
+            Plugin names along the critical path, in execution order
+        """
+        roots = [name for name in self.order if not self.dependencies[name]]
+        if not roots:
+            return []
+
+        path = [max(roots, key=lambda name: self.priorities[name])]
+        while self.dependents[path[-1]]:
+            path.append(max(self.dependents[path[-1]], key=lambda name: self.priorities[name]))
+        return path
+
+
+class DAGScheduler:
+    """
+    Tracks which plugins of a DependencyGraph are ready, running or finished.
+
+    A plugin becomes ready as soon as all of its dependencies have completed.
+    Ready plugins are handed out longest critical path first. When a plugin
+    does not complete, everything downstream of it is skipped.
+    """
+
+    def __init__(self, graph: DependencyGraph, tiebreak: Dict[str, int] = None,
+                 finished: Dict[str, bool] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            graph: Validated dependency graph
+            tiebreak: Optional secondary sort key per plugin (lower runs first)
+            finished: Plugins already finished in an earlier run, mapped to
+                whether they succeeded. Plugins downstream of an earlier
+                failure are skipped; see take_blocked.
+        """
+        self.graph = graph
+        self.tiebreak = tiebreak or {}
+        self.running = set()
+        self.finished: Dict[str, bool] = dict(finished or {})
+        self._remaining = {
+            name: sum(1 for dep in deps if not self.finished.get(dep))
+            for name, deps in graph.dependencies.items()
+        }
+        self._ready: List = []
+        self._blocked: List[str] = []
+
+        for name in graph.order:
+            if name in self.finished:
+                continue
+            # Topological order means failures propagate through this loop
+            if any(self.finished.get(dep) is False for dep in graph.dependencies[name]):
+                self.finished[name] = False
+                self._blocked.append(name)
+            elif self._remaining[name] == 0:
+                self._push(name)
+
+    def _push(self, name: str):
+        heapq.heappush(self._ready, (-self.graph.priorities[name], self.tiebreak.get(name, 0), name))
+
+    @property
+    def done(self) -> bool:
+        """Return True once every plugin has finished or been skipped."""
+        return len(self.finished) == len(self.graph)
+
+    def has_ready(self) -> bool:
+        """Return True if a plugin is waiting to be started."""
+        return bool(self._ready)
+
+    def take_blocked(self) -> List[str]:
+        """
+        Return plugins skipped at construction because an earlier run's dependency failed.
+
+        Returns:
+            Plugin names, each returned only once
+        """
+        blocked, self._blocked = self._blocked, []
+        return blocked
+
+    def next_ready(self, admit: Callable[[str], bool] = None) -> Optional[str]:
+        """
+        Take the highest priority ready plugin and mark it running.
+
+        Args:
+            admit: Optional check a plugin must pass to be started now;
+                plugins it rejects stay ready for a later call
+
+        Returns:
+            Plugin name, or None if nothing is ready (or admitted)
+        """
+        name = None
+        rejected = []
+        while self._ready:
+            entry = heapq.heappop(self._ready)
+            if admit is None or admit(entry[2]):
+                name = entry[2]
+                break
+            rejected.append(entry)
+        for entry in rejected:
+            heapq.heappush(self._ready, entry)
+
+        if name is not None:
+            self.running.add(name)
+        return name
+
+    def mark_finished(self, name: str, succeeded: bool) -> List[str]:
+        """
+        Record that a plugin finished and release its dependents.
+
+        Args:
+            name: Plugin that finished
+            succeeded: Whether the plugin completed successfully
+
+        Returns:
+            Names of downstream plugins skipped because of this failure
+        """
+        self.running.discard(name)
+        self.finished[name] = succeeded
+
+        if succeeded:
+            for dependent in self.graph.dependents[name]:
+                self._remaining[dependent] -= 1
+                # Dependents already given up on stay finished
+                if self._remaining[dependent] == 0 and dependent not in self.finished:
+                    self._push(dependent)
+            return []
+
+        # Skip everything reachable from the failed plugin
+        skipped = []
+        pending = list(self.graph.dependents[name])
+        while pending:
+            dependent = pending.pop()
+            if dependent in self.finished:
+                continue
+            self.finished[dependent] = False
+            skipped.append(dependent)
+            pending.extend(self.graph.dependents[dependent])
+        return skipped
+
+    def cancel_pending(self) -> List[str]:
+        """
+        Give up on every plugin that has not been started.
+
+        Running plugins are left to finish and be reported through
+        mark_finished.
+
+        Returns:
+            Names of the plugins given up on
+        """
+        cancelled = [
+            name for name in self.graph.order
+            if name not in self.finished and name not in self.running
+        ]
+        for name in cancelled:
+            self.finished[name] = False
+        self._ready = []
+        return cancelled
+
+
+class RoundRobinScheduler:
+    """
+    Hands out ready plugins from several per-target DAGSchedulers in turn.
+
+    Targets are visited round-robin so one slow host cannot starve the
+    others, and an optional per-target limit caps how many plugins may run
+    against the same target at once. Targets are dropped once their graph
+    is finished.
+    """
+
+    def __init__(self, per_target_limit: int = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            per_target_limit: Maximum running plugins per target (None for no limit)
+        """
+        self.per_target_limit = per_target_limit
+        self.schedulers: Dict[str, DAGScheduler] = {}
+        self._targets: List[str] = []
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def __contains__(self, target: str) -> bool:
+        return target in self.schedulers
+
+    @property
+    def done(self) -> bool:
+        """Return True once every added target has finished."""
+        return not self._targets
+
+    def add(self, target: str, scheduler: DAGScheduler):
+        """
+        Start scheduling plugins for a target.
+
+        Args:
+            target: Target the scheduler belongs to
+            scheduler: Scheduler for the target's plugin graph
+        """
+        if scheduler.done:
+            return
+        self.schedulers[target] = scheduler
+        self._targets.append(target)
+
+    def next_ready(self, admit: Callable[[str, str], bool] = None) -> Optional[Tuple[str, str]]:
+        """
+        Take the next ready plugin, visiting targets round-robin.
+
+        Args:
+            admit: Optional check a (target, plugin name) pair must pass
+                to be started now, e.g. a per-host rate limit
+
+        Returns:
+            (target, plugin name) tuple, or None if nothing can start
+        """
+        for _ in range(len(self._targets)):
+            self._cursor %= len(self._targets)
+            target = self._targets[self._cursor]
+            self._cursor += 1
+
+            scheduler = self.schedulers[target]
+            if self.per_target_limit and len(scheduler.running) >= self.per_target_limit:
+                continue
+            if not scheduler.has_ready():
+                continue
+            name = scheduler.next_ready(None if admit is None else lambda name: admit(target, name))
+            if name is not None:
+                return target, name
+        return None
+
+    def mark_finished(self, target: str, name: str, succeeded: bool) -> List[str]:
+        """
+        Record that a plugin finished for a target.
+
+        Args:
+            target: Target the plugin ran against
+            name: Plugin that finished
+            succeeded: Whether the plugin completed successfully
+
+        Returns:
+            Names of downstream plugins skipped because of this failure
+        """
+        scheduler = self.schedulers[target]
+        skipped = scheduler.mark_finished(name, succeeded)
+
+        if scheduler.done:
+            index = self._targets.index(target)
+            del self._targets[index]
+            del self.schedulers[target]
+            if index < self._cursor:
+                self._cursor -= 1
+        return skipped
+
+    def cancel_pending(self) -> List[Tuple[str, str]]:
+        """
+        Give up on every plugin not yet started, for all targets.
+
+        Targets without running plugins are dropped.
+
+        Returns:
+            (target, plugin name) pairs given up on
+        """
+        cancelled = []
+        for target in list(self._targets):
+            scheduler = self.schedulers[target]
+            cancelled.extend((target, name) for name in scheduler.cancel_pending())
+            if scheduler.done:
+                self._targets.remove(target)
+                del self.schedulers[target]
+        self._cursor = 0
+        return cancelled
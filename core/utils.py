@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# utils.py
+# Shared helpers for KAST
+
+import hashlib
+import os
+import re
+import sys
+from typing import Iterable, Iterator, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def read_targets(path: str) -> Iterator[str]:
+    """
+    Stream targets from a target list file, one per line.
+
+    Blank lines and lines starting with '#' are ignored.
+
+    Args:
+        path: Path of the target list, or '-' to read from stdin
+
+    Yields:
+        Target URLs or domains
+    """
+    handle = sys.stdin if path == "-" else open(path, "r")
+    try:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parse a shard specification of the form "i/N".
+
+    Args:
+        spec: Shard number i (1 to N) and shard count N
+
+    Returns:
+        Tuple of shard number and shard count
+
+    Raises:
+        ValueError: If the specification is malformed or out of range
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*/\s*(\d+)\s*", spec)
+    if not match:
+        raise ValueError(f"shard must look like i/N, got {spec!r}")
+    index, count = int(match.group(1)), int(match.group(2))
+    if not 1 <= index <= count:
+        raise ValueError(f"shard number must be between 1 and {count}, got {index}")
+    return index, count
+
+
+def parse_duration(spec: str) -> float:
+    """
+    Parse a duration such as "90", "45s", "10m" or "1h30m".
+
+    Args:
+        spec: Number of seconds, or numbers suffixed with h, m or s
+
+    Returns:
+        Duration in seconds
+
+    Raises:
+        ValueError: If the duration is malformed or not positive
+    """
+    spec = spec.strip().lower()
+    if re.fullmatch(r"\d+(\.\d+)?", spec):
+        seconds = float(spec)
+    else:
+        parts = re.findall(r"(\d+(?:\.\d+)?)([hms])", spec)
+        if not parts or "".join(number + unit for number, unit in parts) != spec:
+            raise ValueError(f"duration must look like 90, 45s, 10m or 1h30m, got {spec!r}")
+        seconds = sum(float(number) * {"h": 3600, "m": 60, "s": 1}[unit] for number, unit in parts)
+    if seconds <= 0:
+        raise ValueError(f"duration must be positive, got {spec!r}")
+    return seconds
+
+
+def shard_targets(targets: Iterable[str], index: int, count: int) -> Iterator[str]:
+    """
+    Stream the targets belonging to one shard of a target list.
+
+    Targets are assigned by a hash of their normalized form, so every
+    node computes the same split regardless of list order and spelling.
+
+    Args:
+        targets: Full target list
+        index: Shard number, from 1 to count
+        count: Number of shards
+
+    Yields:
+        Targets of the shard
+    """
+    for target in targets:
+        digest = hashlib.sha256(normalize_target(target).encode()).digest()
+        if int.from_bytes(digest[:8], "big") % count == index - 1:
+            yield target
+
+
+def safe_target_name(target: str) -> str:
+    """
+    Turn a target into a name usable as a directory.
+
+    The scheme and port stay in the readable part, and a short hash of
+    the exact target string is appended, so every distinct target gets
+    its own directory (e.g. http://a.com and https://a.com, or spellings
+    that only differ in characters replaced here).
+
+    Args:
+        target: Target URL or domain
+
+    Returns:
+        Filesystem-safe name derived from the target
+    """
+    name = re.sub(r"^([a-zA-Z][a-zA-Z0-9+.-]*)://", r"\1_", target.strip()).rstrip("/")
+    name = re.sub(r"[^A-Za-z0-9._-]", "_", name).strip(".") or "target"
+    digest = hashlib.sha256(target.encode()).hexdigest()[:8]
+    return f"{name}-{digest}"
+
+
+def read_tail(path: str, max_bytes: int) -> Tuple[str, bool]:
+    """
+    Read at most the last max_bytes of a file.
+
+    Args:
+        path: File to read
+        max_bytes: Maximum number of bytes to return
+
+    Returns:
+        Tuple of the decoded tail and whether the file was longer than max_bytes
+    """
+    try:
+        with open(path, "rb") as handle:
+            size = handle.seek(0, os.SEEK_END)
+            handle.seek(max(0, size - max_bytes))
+            return handle.read().decode(errors="replace"), size > max_bytes
+    except FileNotFoundError:
+        return "", False
+
+
+def target_host(target: str) -> str:
+    """
+    Return the host part of a target, used to group targets on one host.
+
+    Args:
+        target: Target URL or domain
+
+    Returns:
+        Lowercased host name or address, without port
+    """
+    target = target.strip()
+    if "://" in target:
+        return (urlsplit(target).hostname or "").lower()
+    host = target.split("/", 1)[0]
+    if host.startswith("["):
+        return host[1:].split("]", 1)[0].lower()
+    if host.count(":") == 1:
+        host = host.split(":", 1)[0]
+    return host.lower()
+
+
+def normalize_target(target: str) -> str:
+    """
+    Normalize a target so equivalent spellings compare equal.
+
+    Lowercases the scheme and host, drops default ports and trailing
+    slashes. Bare hosts are left without a scheme.
+
+    Args:
+        target: Target URL or domain
+
+    Returns:
+        Normalized target
+    """
+    target = target.strip()
+    if "://" not in target:
+        return target.lower().rstrip("/")
+
+    parts = urlsplit(target)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port and DEFAULT_PORTS.get(scheme) != parts.port:
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/")
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{scheme}://{host}{path}{query}"
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# work_queue.py
+# SQLite-backed queue of plugin runs shared by worker processes on one host
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import Executor, Future, InvalidStateError
+from typing import Dict, List, Optional
+
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    target TEXT NOT NULL,
+    plugin TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    config TEXT NOT NULL,
+    use_cache INTEGER NOT NULL DEFAULT 1,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_state ON items (state, id);
+"""
+
+
+def worker_id() -> str:
+    """Return an identifier for this worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkItem:
+    """One plugin run claimed from the queue."""
+
+    def __init__(self, row: sqlite3.Row):
+        self.id = row["id"]
+        self.target = row["target"]
+        self.plugin = row["plugin"]
+        self.output_dir = row["output_dir"]
+        self.config = json.loads(row["config"])
+        self.use_cache = bool(row["use_cache"])
+        self.attempts = row["attempts"]
+
+
+class WorkQueue:
+    """
+    Queue of target/plugin work items in a SQLite database.
+
+    Workers claim items with a lease that they renew with heartbeats
+    while the plugin runs. An item whose lease expires, because its
+    worker crashed or hung, is handed to the next worker that asks, up
+    to max_attempts claims; after that it is failed. Only the worker
+    holding the lease can complete an item.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        Initialize the queue, creating the database if needed.
+
+        Args:
+            path: SQLite database file
+            lease_seconds: Seconds a claim stays valid without a heartbeat
+            max_attempts: Claims allowed per item before it is failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.logger = logging.getLogger("kast.work_queue")
+        self._local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections cannot be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def put(self, target: str, plugin: str, output_dir: str, config: Dict, use_cache: bool = True) -> int:
+        """
+        Add a plugin run to the queue.
+
+        Args:
+            target: Target to scan
+            plugin: Plugin name
+            output_dir: Directory the plugin writes its results to
+            config: Configuration for the plugin
+            use_cache: Whether the worker may use the result cache
+
+        Returns:
+            Item id
+        """
+        cursor = self._connection().execute(
+            "INSERT INTO items (target, plugin, output_dir, config, use_cache, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (target, plugin, output_dir, json.dumps(config, default=str), int(use_cache), time.time())
+        )
+        return cursor.lastrowid
+
+    def claim(self, worker: str) -> Optional[WorkItem]:
+        """
+        Lease the oldest available item.
+
+        Args:
+            worker: Identifier of the claiming worker
+
+        Returns:
+            Claimed item, or None if nothing is available
+        """
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            # Items whose workers died too often are given up on
+            lost = connection.execute(
+                "SELECT id, worker, target, plugin FROM items "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, self.max_attempts)
+            ).fetchall()
+            for row in lost:
+                self.logger.warning(f"Giving up on work item {row['id']}; its lease expired {self.max_attempts} times")
+                connection.execute(
+                    "UPDATE items SET state = 'done', result = ? WHERE id = ?",
+                    (json.dumps({
+                        "plugin": row["plugin"],
+                        "target": row["target"],
+                        "status": "Failed",
+                        "error": f"Worker {row['worker']} stopped responding {self.max_attempts} times"
+                    }),
+                     row["id"])
+                )
+
+            row = connection.execute(
+                "SELECT * FROM items WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) "
+                "ORDER BY id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                connection.execute("COMMIT")
+                return None
+            if row["state"] == "leased":
+                self.logger.warning(f"Reclaiming work item {row['id']} from unresponsive worker {row['worker']}")
+            connection.execute(
+                "UPDATE items SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now + self.lease_seconds, row["id"])
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+        item = WorkItem(row)
+        item.attempts += 1
+        return item
+
+    def heartbeat(self, item_id: int, worker: str) -> bool:
+        """
+        Renew the lease on a claimed item.
+
+        Returns:
+            False if the worker no longer holds the lease
+        """
+        cursor = self._connection().execute(
+            "UPDATE items SET lease_expires = ? WHERE id = ? AND state = 'leased' AND worker = ?",
+            (time.time() + self.lease_seconds, item_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, item_id: int, worker: str, result: Dict) -> bool:
+        """
+        Store the result of a claimed item.
+
+        Returns:
+            False if the worker no longer holds the lease, in which case
+            the result is discarded
+        """
+        cursor = self._connection().execute(
+            "UPDATE items SET state = 'done', result = ? WHERE id = ? AND state = 'leased' AND worker = ?",
+            (json.dumps(result, default=str), item_id, worker)
+        )
+        return cursor.rowcount == 1
+
+    def release(self, item_id: int, worker: str):
+        """Return a claimed item to the queue without counting the attempt."""
+        self._connection().execute(
+            "UPDATE items SET state = 'pending', worker = NULL, lease_expires = NULL, attempts = attempts - 1 "
+            "WHERE id = ? AND state = 'leased' AND worker = ?",
+            (item_id, worker)
+        )
+
+    def collect(self, item_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Take the results of finished items, removing them from the queue.
+
+        Args:
+            item_ids: Items to check
+
+        Returns:
+            Mapping of item id to result for the items that are done
+        """
+        if not item_ids:
+            return {}
+        connection = self._connection()
+        placeholders = ",".join("?" * len(item_ids))
+        rows = connection.execute(
+            f"SELECT id, result FROM items WHERE state = 'done' AND id IN ({placeholders})", item_ids
+        ).fetchall()
+        if rows:
+            done = [row["id"] for row in rows]
+            connection.execute(f"DELETE FROM items WHERE id IN ({','.join('?' * len(done))})", done)
+        return {row["id"]: json.loads(row["result"]) for row in rows}
+
+    def cancel(self, item_ids: List[int]):
+        """Remove items from the queue; workers running them drop their results."""
+        if item_ids:
+            self._connection().execute(
+                f"DELETE FROM items WHERE id IN ({','.join('?' * len(item_ids))})", item_ids
+            )
+
+
+class WorkQueueExecutor(Executor):
+    """
+    Executor backend that runs plugins on queue workers.
+
+    submit() takes plugin jobs (see scanner.PluginJob): it puts the job's
+    work item on the queue and returns a Future that a poller thread
+    resolves once a worker has stored the result, so the orchestrator
+    can wait on it like on a thread pool future. Cancelling the future
+    withdraws the item; a worker running it loses its lease and stops
+    the tool. Shutting down cancels the items that have not finished.
+    """
+
+    def __init__(self, queue: WorkQueue, poll_interval: float = 0.5):
+        """
+        Initialize the executor.
+
+        Args:
+            queue: Queue that workers pull from
+            poll_interval: Seconds between checks for finished items
+        """
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        """
+        Queue a plugin job.
+
+        Args:
+            fn: Job with a work_item() method returning the keyword
+                arguments of submit_plugin; arbitrary callables cannot be
+                handed to another process
+
+        Returns:
+            Future resolved with the plugin's result
+
+        Raises:
+            TypeError: If fn is not a plugin job
+        """
+        work_item = getattr(fn, "work_item", None)
+        if work_item is None or args or kwargs:
+            raise TypeError("WorkQueueExecutor only runs plugin jobs with a work_item() method")
+        return self.submit_plugin(**work_item())
+
+    def submit_plugin(self, target: str, plugin: str, output_dir: str, config: Dict,
+                      use_cache: bool = True) -> Future:
+        """
+        Queue a plugin run.
+
+        Args:
+            target: Target to scan
+            plugin: Plugin name
+            output_dir: Directory the plugin writes its results to
+            config: Configuration for the plugin
+            use_cache: Whether the worker may use the result cache
+
+        Returns:
+            Future resolved with the plugin's result
+        """
+        future = Future()
+        item_id = self.queue.put(target, plugin, output_dir, config, use_cache)
+        with self._lock:
+            self._futures[item_id] = future
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll, name="kast-queue-poller", daemon=True)
+                self._poller.start()
+        future.add_done_callback(lambda done: self._withdraw(item_id, done))
+        return future
+
+    def _withdraw(self, item_id: int, future: Future):
+        """Remove the item of a cancelled future from the queue."""
+        if not future.cancelled():
+            return
+        with self._lock:
+            self._futures.pop(item_id, None)
+        self.queue.cancel([item_id])
+        # Wakes threads blocked in concurrent.futures.wait()
+        future.set_running_or_notify_cancel()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            with self._lock:
+                item_ids = list(self._futures)
+            try:
+                results = self.queue.collect(item_ids)
+            except sqlite3.Error as e:
+                self.logger.warning(f"Could not poll work queue: {e}")
+                continue
+            for item_id, result in results.items():
+                with self._lock:
+                    future = self._futures.pop(item_id, None)
+                # Withdrawn since collect(); nobody waits for the result
+                if future is None or future.cancelled():
+                    continue
+                try:
+                    future.set_result(result)
+                except InvalidStateError:
+                    # Cancelled between the check and here
+                    continue
+
+    @property
+    def logger(self) -> logging.Logger:
+        return self.queue.logger
+
+    def cancel_outstanding(self):
+        """
+        Withdraw every queued or running item and cancel its future.
+
+        Workers running a withdrawn item lose their lease and stop the tool.
+        """
+        with self._lock:
+            outstanding = list(self._futures.values())
+        for future in outstanding:
+            future.cancel()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._stop.set()
+        if self._poller is not None and wait:
+            self._poller.join()
+        self.cancel_outstanding()
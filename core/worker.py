@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# worker.py
+# Worker process that runs plugins pulled from a shared work queue
+
+import logging
+import threading
+import time
+from typing import List, Type, Union
+
+from core.cancellation import CancellationToken
+from core.plugin_base import PluginBase
+from core.registry import PluginManifest
+from core.result_cache import ResultCache
+from core.scanner import ScanOrchestrator
+from core.work_queue import WorkItem, WorkQueue, worker_id
+
+
+class QueueWorker:
+    """
+    Pulls plugin runs from a WorkQueue and executes them one at a time.
+
+    Scheduling stays with the orchestrator that filled the queue; a
+    worker only runs the plugins it is handed, renewing its lease while
+    each one runs. Run several worker processes to use more of a host.
+    """
+
+    def __init__(self, queue: WorkQueue, plugins: List[Union[PluginManifest, Type[PluginBase]]],
+                 poll_interval: float = 1.0, idle_exit: float = None):
+        """
+        Initialize the worker.
+
+        Args:
+            queue: Queue to pull work from
+            plugins: Plugin manifests (or plugin classes) the worker can run
+            poll_interval: Seconds to wait before asking an empty queue again
+            idle_exit: Exit after the queue has been empty this many seconds,
+                or None to run until interrupted
+        """
+        self.queue = queue
+        self.plugins = plugins
+        self.poll_interval = poll_interval
+        self.idle_exit = idle_exit
+        self.id = worker_id()
+        self.logger = logging.getLogger("kast.worker")
+
+    def run(self) -> int:
+        """
+        Process work items until idle_exit elapses with nothing to do.
+
+        Returns:
+            Number of items processed
+        """
+        processed = 0
+        idle_since = time.monotonic()
+        while True:
+            item = self.queue.claim(self.id)
+            if item is None:
+                if self.idle_exit is not None and time.monotonic() - idle_since >= self.idle_exit:
+                    return processed
+                time.sleep(self.poll_interval)
+                continue
+
+            self.process(item)
+            processed += 1
+            idle_since = time.monotonic()
+
+    def process(self, item: WorkItem):
+        """
+        Run one claimed item and store its result.
+
+        Args:
+            item: Claimed work item
+        """
+        self.logger.info(f"Running {item.plugin} against {item.target} (attempt {item.attempts})")
+        config = dict(item.config)
+        deadline = config.pop("scan_deadline", None)
+        cancel_token = CancellationToken() if deadline is None else CancellationToken.until(deadline)
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(item, stop, cancel_token), daemon=True)
+        heartbeat.start()
+        try:
+            orchestrator = ScanOrchestrator(
+                target=item.target,
+                output_dir=item.output_dir,
+                plugins=self.plugins,
+                config=config,
+                result_cache=ResultCache.from_config(config) if item.use_cache else None,
+                cancel_token=cancel_token
+            )
+            result = orchestrator.run_plugin(item.plugin)
+        except BaseException:
+            # Interrupted: let another worker have the item right away
+            self.queue.release(item.id, self.id)
+            raise
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if not self.queue.complete(item.id, self.id, result):
+            self.logger.warning(f"Lost the lease on {item.plugin} against {item.target}; result discarded")
+
+    def _heartbeat(self, item: WorkItem, stop: threading.Event, cancel_token: CancellationToken):
+        while not stop.wait(self.queue.lease_seconds / 3):
+            if not self.queue.heartbeat(item.id, self.id):
+                # Withdrawn by the orchestrator or taken over by another worker
+                self.logger.warning(f"Lease on {item.plugin} against {item.target} was lost; stopping it")
+                cancel_token.cancel("Work item lease lost")
+                return
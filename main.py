@@ -3,12 +3,17 @@
 # main.py - Main entry point for KAST (Kali Automated Scan Tool)
 
 import argparse
+import asyncio
 import importlib
+import json
 import logging
 import os
+import signal
+import subprocess
 import sys
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Type
+from typing import List, Dict, Optional, Tuple, Type
 
 import rich
 from rich.console import Console
@@ -20,7 +25,51 @@ from rich.table import Table
 
 from core.scanner import ScanOrchestrator
 from config.config import ConfigManager
-from core.plugin_base import PluginBase
+from core.cancellation import CancellationToken
+from core.concurrency import AdaptiveConcurrency
+from core.history import RuntimeHistory
+from core.daemon import KASTDaemon, cancel_scan, daemon_available, default_socket_path, submit_scan
+from core.journal import JOURNAL_NAME, ScanJournal, open_run_journal
+from core.liveness import LivenessChecker
+from core.registry import PluginManifest, PluginRegistry
+from core.result_cache import ResultCache
+from core.work_queue import DEFAULT_LEASE_SECONDS, WorkQueue, WorkQueueExecutor
+from core.worker import QueueWorker
+from core.merge import merge_runs
+from core.planner import BudgetPlan, expected_durations, plan_for_budget
+from core.scheduler import DependencyError, DependencyGraph
+from core.utils import parse_duration, parse_shard, read_targets, shard_targets
+
+DEFAULT_OUTPUT_DIR = './kast_output'
+
+def concurrency_setting(value: str):
+    """Parse --max-concurrent: a positive integer or 'auto'."""
+    if value == 'auto':
+        return value
+    try:
+        limit = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got {value!r}")
+    if limit < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return limit
+
+def duration_setting(value: str) -> float:
+    """Parse a duration option such as --deadline: seconds, or e.g. '10m' or '1h30m'."""
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def ports_setting(value: str) -> List[int]:
+    """Parse --liveness-ports: a comma-separated list of TCP ports."""
+    try:
+        ports = [int(port) for port in value.split(',') if port.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated port numbers, got {value!r}")
+    if not ports or any(not 0 < port < 65536 for port in ports):
+        raise argparse.ArgumentTypeError("ports must be between 1 and 65535")
+    return ports
 
 class KASTCLIApp:
     def __init__(self):
@@ -37,66 +86,159 @@ class KASTCLIApp:
         )
         self.logger = logging.getLogger("KAST")
 
-    def discover_plugins(self) -> List[Type[PluginBase]]:
+    def discover_plugins(self) -> List[PluginManifest]:
         """
-        Dynamically discover and load plugins from the plugins directory.
+        Discover plugins from their manifests in the plugins directory.
+        
+        Only the small config.yml manifests (or the cached registry) are
+        read; plugin modules are imported when a plugin is scheduled.
         
         Returns:
-            List of plugin classes
+            List of plugin manifests
         """
-        plugins = []
         plugins_dir = Path(__file__).parent / 'plugins'
         
         try:
-            for plugin_path in plugins_dir.iterdir():
-                if plugin_path.is_dir() and (plugin_path / '__init__.py').exists():
-                    module_name = f"plugins.{plugin_path.name}.plugin"
-                    try:
-                        module = importlib.import_module(module_name)
-                        for name, obj in module.__dict__.items():
-                            if (isinstance(obj, type) and 
-                                issubclass(obj, PluginBase) and 
-                                obj is not PluginBase):
-                                plugins.append(obj)
-                    except ImportError as e:
-                        self.logger.error(f"Could not import plugin {plugin_path.name}: {e}")
+            return PluginRegistry(plugins_dir).discover()
         except Exception as e:
             self.logger.error(f"Error discovering plugins: {e}")
-        
-        return plugins
+            return []
 
-    def setup_argument_parser(self, plugins: List[Type[PluginBase]]) -> argparse.ArgumentParser:
+    def setup_argument_parser(self, plugins: List[PluginManifest]) -> argparse.ArgumentParser:
         """
         Setup argument parser with dynamic plugin-specific arguments.
         
         Args:
-            plugins: List of discovered plugin classes
+            plugins: List of discovered plugin manifests
         
         Returns:
             Configured ArgumentParser
         """
-        parser = argparse.ArgumentParser(
-            description="KAST: Kali Automated Scan Tool",
-            formatter_class=argparse.RichHelpFormatter
-        )
+        parser = argparse.ArgumentParser(description="KAST: Kali Automated Scan Tool")
         
         # Core arguments
-        parser.add_argument('target', help='Target URL or domain to scan')
+        parser.add_argument('target', nargs='?', help='Target URL or domain to scan')
+        parser.add_argument('-T', '--targets-file',
+                            help="File with one target per line for batch scanning ('-' for stdin)")
+        parser.add_argument('--shard',
+                            metavar='I/N',
+                            help='Scan only shard I of N of the targets file, picked by a stable hash of each target')
         parser.add_argument('-o', '--output-dir', 
-                            default='./kast_output', 
-                            help='Directory to store scan results')
+                            help=f'Directory to store scan results (default {DEFAULT_OUTPUT_DIR}, or the '
+                                 f'directory recorded in an --execute-plan plan)')
+        parser.add_argument('--config',
+                            metavar='FILE',
+                            help='Configuration file overriding the defaults (default ~/.config/kast/config.yml)')
         parser.add_argument('--dry-run', 
                             action='store_true', 
                             help='Show what would be executed without running scans')
         parser.add_argument('--report-only', 
                             help='Generate report from previous scan results')
+        parser.add_argument('--cache-ttl',
+                            type=float,
+                            help='Reuse cached plugin results younger than this many seconds')
+        parser.add_argument('--no-cache',
+                            action='store_true',
+                            help='Neither read nor write the result cache')
+        parser.add_argument('--no-history',
+                            action='store_true',
+                            help='Neither record plugin runtimes nor use them to order plugins and estimate ETAs')
+        parser.add_argument('--adaptive-timeouts',
+                            action='store_true',
+                            help='Derive each plugin\'s timeout from its recorded runtimes (p95 x factor)')
+        parser.add_argument('--deadline',
+                            type=duration_setting,
+                            metavar='DURATION',
+                            help="Stop the whole scan after this long (e.g. 1800, 30m or 1h30m); plugins not "
+                                 "finished by then are terminated and reported as cancelled")
+        parser.add_argument('--time-budget',
+                            type=duration_setting,
+                            metavar='DURATION',
+                            help='Run only the most valuable plugins expected to finish within this time '
+                                 '(e.g. 10m), based on recorded runtimes and each plugin\'s value weight; '
+                                 'the scan is also stopped when the budget runs out, like --deadline')
+        parser.add_argument('--plan-file',
+                            metavar='FILE',
+                            help='With --dry-run, write the execution plan to this JSON file')
+        parser.add_argument('--execute-plan',
+                            metavar='FILE',
+                            help='Run a scan with the inputs of an execution plan written by --dry-run '
+                                 '--plan-file: its targets, plugins, configuration, concurrency and expected '
+                                 'runtimes. The scheduler makes the plan\'s choices again, so the order matches '
+                                 'the plan while tools take their expected time and adapts when they do not; '
+                                 'commands are rebuilt from the plugins')
+        parser.add_argument('--liveness',
+                            choices=['off', 'skip', 'passive'],
+                            help='Probe every target with a TCP connect before scanning it, and skip '
+                                 'unreachable targets or run only their passive plugins (default off)')
+        parser.add_argument('--liveness-timeout',
+                            type=float,
+                            metavar='SECONDS',
+                            help='Connect timeout of the liveness probe (default 2)')
+        parser.add_argument('--liveness-ports',
+                            type=ports_setting,
+                            metavar='PORTS',
+                            help='Ports probed for targets given without a scheme (default 443,80)')
+        parser.add_argument('--liveness-http',
+                            action='store_true',
+                            help='Require targets to answer an HTTP HEAD request, not just accept a connection')
+        parser.add_argument('--resume',
+                            metavar='RUN_DIR',
+                            help='Resume an interrupted scan from the journal in its output directory. '
+                                 'Plugins that were interrupted or never started are run; results of '
+                                 'plugins that failed or timed out are kept unless --retry-failed is given')
+        parser.add_argument('--retry-failed',
+                            action='store_true',
+                            help='With --resume, rerun plugins that failed, timed out or were skipped '
+                                 'in the earlier run')
+        parser.add_argument('--max-concurrent',
+                            type=concurrency_setting,
+                            default='auto',
+                            help="Maximum number of plugins running at once across all targets, or 'auto' "
+                                 "to adapt it to host load, memory and plugin failures")
+        parser.add_argument('--per-target-limit',
+                            type=int,
+                            help='Maximum number of plugins running at once against one target')
+        parser.add_argument('--host-active-limit',
+                            type=int,
+                            help='Maximum number of active plugins running at once against one host (default 1)')
+        parser.add_argument('--host-start-rate',
+                            type=float,
+                            help='Maximum active plugin starts per second against one host')
+        parser.add_argument('--host-request-rate',
+                            type=float,
+                            help='Requests per second per host, shared out to active plugins whose tools support a rate flag')
+        parser.add_argument('--engine',
+                            choices=['threads', 'asyncio'],
+                            default='threads',
+                            help='Execution engine used to run plugin tools')
+        parser.add_argument('--queue',
+                            metavar='DB',
+                            help='Run plugins on "kast worker" processes pulling from this SQLite work queue')
+        parser.add_argument('--workers',
+                            type=int,
+                            help='Start this many local worker processes on the work queue '
+                                 '(default queue: <output-dir>/queue.db); unless --max-concurrent '
+                                 'is given, one plugin is kept in flight per worker')
+        parser.add_argument('--daemon-socket',
+                            default=default_socket_path(),
+                            help='Socket of a running "kast serve" daemon to submit scans to')
+        parser.add_argument('--no-daemon',
+                            action='store_true',
+                            help='Run the scan in this process even if a daemon is running')
         
         # Plugin-specific arguments group
         plugin_group = parser.add_argument_group('Plugin Options')
-        for plugin_cls in plugins:
-            # If plugin has a class method to add CLI arguments, call it
-            if hasattr(plugin_cls, 'add_arguments'):
-                plugin_cls.add_arguments(plugin_group)
+        self.plugin_arguments = {}
+        for manifest in plugins:
+            # Arguments are declared in the manifest so the plugin isn't imported
+            for argument in manifest.arguments:
+                options = dict(argument)
+                flags = options.pop('flags')
+                default = options.pop('default', None)
+                # Left unset unless given, so configuration files still apply
+                action = plugin_group.add_argument(*flags, default=argparse.SUPPRESS, **options)
+                self.plugin_arguments.setdefault(manifest.name, []).append((action.dest, default))
         
         return parser
 
@@ -119,20 +261,180 @@ class KASTCLIApp:
         parser = self.setup_argument_parser(plugins)
         args = parser.parse_args()
 
-        # Create output directory
-        os.makedirs(args.output_dir, exist_ok=True)
+        # Pick up targets of an interrupted run from its journal
+        batch = bool(args.targets_file)
+        if args.retry_failed and not args.resume:
+            parser.error("--retry-failed requires --resume")
+        if args.resume:
+            args.output_dir = args.resume
+            plan = ScanJournal(os.path.join(args.resume, JOURNAL_NAME)).load().plan
+            if not plan:
+                parser.error(f"no scan journal found in {args.resume}")
+            args.target = args.target or plan.get('target')
+            if not args.targets_file and plan.get('targets_file') != '-':
+                # Targets read from stdin cannot be replayed; only journaled ones are resumed
+                args.targets_file = plan.get('targets_file')
+            args.shard = args.shard or plan.get('shard')
+            args.execute_plan = args.execute_plan or plan.get('execution_plan')
+            batch = batch or plan.get('batch', False)
+
+        # A plan fixes targets, plugins, configuration and order; nothing is planned again
+        execution_plan = None
+        if args.execute_plan:
+            if args.dry_run or args.time_budget or args.shard:
+                parser.error("--execute-plan cannot be combined with --dry-run, --time-budget or --shard")
+            try:
+                execution_plan = self.load_execution_plan(args.execute_plan, plugins)
+            except (OSError, ValueError) as e:
+                parser.error(f"cannot use plan {args.execute_plan}: {e}")
+            args.target = execution_plan['target']
+            args.targets_file = None
+            batch = execution_plan['targets'] is not None
+            args.max_concurrent = execution_plan['max_concurrent']
+            args.per_target_limit = execution_plan['per_target_limit']
+            args.output_dir = args.output_dir or execution_plan['output_dir']
+            plugins = [manifest for manifest in plugins if manifest.name in execution_plan['plugins']]
+
+        args.output_dir = args.output_dir or DEFAULT_OUTPUT_DIR
+        if not args.target and not batch:
+            parser.error("a target or --targets-file is required")
+
+        shard = None
+        if args.shard:
+            if not args.targets_file:
+                parser.error("--shard requires --targets-file")
+            try:
+                shard = parse_shard(args.shard)
+            except ValueError as e:
+                parser.error(str(e))
+
+        use_queue = bool(args.queue or args.workers)
+        if use_queue:
+            if args.engine != 'threads':
+                parser.error("--queue and --workers require the threads engine")
+            # Workers may run from another directory
+            args.output_dir = os.path.abspath(args.output_dir)
+        if args.workers:
+            # Each worker runs one plugin at a time, so keep one in flight per worker
+            if args.max_concurrent == 'auto':
+                args.max_concurrent = args.workers
+            elif args.max_concurrent < args.workers:
+                self.logger.warning(
+                    f"--max-concurrent {args.max_concurrent} leaves {args.workers - args.max_concurrent} "
+                    f"of the {args.workers} workers idle"
+                )
+
+        # Create output directory; a dry run leaves it untouched
+        if not args.dry_run:
+            os.makedirs(args.output_dir, exist_ok=True)
 
         # Initialize configuration
-        config_manager = ConfigManager(args)
+        if execution_plan:
+            config = execution_plan['config']
+        else:
+            try:
+                config = ConfigManager(args).get_config()
+            except (OSError, ValueError) as e:
+                parser.error(f"cannot read configuration: {e}")
+        if args.cache_ttl is not None:
+            config['cache_ttl'] = args.cache_ttl
+        if args.adaptive_timeouts:
+            config['adaptive_timeouts'] = True
+        for option in ('host_active_limit', 'host_start_rate', 'host_request_rate'):
+            if getattr(args, option) is not None:
+                config[option] = getattr(args, option)
+        if args.liveness:
+            liveness = {**config.get('liveness', {}), 'mode': args.liveness}
+            if args.liveness_timeout is not None:
+                liveness['timeout'] = args.liveness_timeout
+            if args.liveness_ports:
+                liveness['ports'] = args.liveness_ports
+            if args.liveness_http:
+                liveness['http'] = True
+            config['liveness'] = liveness
+
+        self.apply_plugin_arguments(args, config)
+
+        # Hand the scan to a warm daemon when one is running. Resumes and
+        # the asyncio engine always run locally.
+        if (not args.no_daemon and not args.resume and args.engine == 'threads' and not use_queue
+                and not args.time_budget and not args.dry_run and not execution_plan
+                and daemon_available(args.daemon_socket)):
+            self.run_with_daemon(args, config, batch)
+            return
+
+        result_cache = None if args.no_cache else ResultCache.from_config(config, args.output_dir)
+
+        history = None if args.no_history else RuntimeHistory(config.get('history_path'))
+
+        targets = None
+        target_count = None
+        if args.targets_file:
+            targets = read_targets(args.targets_file)
+            if shard:
+                targets = shard_targets(targets, *shard)
+            if args.targets_file != '-':
+                # A cheap streaming pass, so the ETA covers targets not started yet
+                counted = read_targets(args.targets_file)
+                target_count = sum(1 for _ in (shard_targets(counted, *shard) if shard else counted))
+        elif execution_plan and batch:
+            targets = execution_plan['targets']
+            target_count = len(targets)
+        elif batch:
+            targets = []
+
+        budget_plan = None
+        if args.time_budget:
+            try:
+                budget_plan = self.budget_plan(args, plugins, config, history, target_count)
+            except DependencyError as e:
+                self.logger.error(f"Cannot plan the scan: {e}")
+                return
+            if batch and target_count is None:
+                self.logger.warning(
+                    "The number of targets is not known ahead of the scan, so plugins were chosen as if "
+                    "there were one; the time budget is enforced as a deadline instead"
+                )
+            self.display_budget_plan(budget_plan)
+            plugins = [manifest for manifest in plugins if manifest.name in budget_plan.selected]
+
+        if args.dry_run:
+            self.dry_run(args, plugins, config, targets, history, budget_plan)
+            return
 
         # Initialize scanner orchestrator
         orchestrator = ScanOrchestrator(
             target=args.target,
             output_dir=args.output_dir,
             plugins=plugins,
-            config=config_manager.get_config()
+            config=config,
+            targets=targets,
+            journal=open_run_journal(args.output_dir, resume=bool(args.resume)),
+            result_cache=result_cache,
+            history=history,
+            target_count=target_count,
+            cancel_token=CancellationToken(timeout=self.scan_deadline(args)),
+            expected_runtimes=self.plan_runtimes(execution_plan) if execution_plan else None,
+            liveness=LivenessChecker.from_config(config),
+            retry_failed=args.retry_failed,
+            metadata={
+                'targets_file': os.path.abspath(args.targets_file)
+                if args.targets_file and args.targets_file != '-' else args.targets_file,
+                'shard': args.shard,
+                'time_budget': args.time_budget,
+                'execution_plan': os.path.abspath(args.execute_plan) if args.execute_plan else None
+            }
         )
 
+        # The first interrupt stops the scan cleanly: tools are terminated and
+        # unfinished plugins reported as cancelled. A second one aborts.
+        def interrupt(signum, frame):
+            if orchestrator.cancel_token.cancelled:
+                raise KeyboardInterrupt
+            self.console.print("[bold red]Stopping scan; interrupt again to abort.[/bold red]")
+            orchestrator.cancel("Interrupted by user")
+        previous_handlers = {sig: signal.signal(sig, interrupt) for sig in (signal.SIGINT, signal.SIGTERM)}
+
         # Perform scan
         with Progress(
             SpinnerColumn(),
@@ -141,41 +443,549 @@ class KASTCLIApp:
         ) as progress:
             scan_task = progress.add_task("[green]Running Scans...", total=100)
             
+            # Only summary rows are kept; full results are on disk
+            rows = []
+            
+            def show_result(result: Dict):
+                rows.append(self.summary_row(result))
+                self.logger.info(f"{result.get('tool_name') or result.get('plugin')} against {result.get('target')}: {result.get('status')}")
+                state = orchestrator.progress()
+                if state:
+                    progress.update(scan_task, description=self.progress_description(state))
+            
             try:
-                results = orchestrator.run_scans()
+                concurrency = AdaptiveConcurrency.from_setting(
+                    args.max_concurrent, maximum=config.get('max_concurrent_ceiling')
+                )
+                if args.engine == 'asyncio':
+                    async def consume():
+                        async for result in orchestrator.aiter_scans(
+                            per_target_limit=args.per_target_limit,
+                            concurrency=concurrency
+                        ):
+                            show_result(result)
+                    
+                    asyncio.run(consume())
+                else:
+                    with self.scan_executor(args) as executor:
+                        for result in orchestrator.iter_scans(
+                            per_target_limit=args.per_target_limit,
+                            executor=executor,
+                            concurrency=concurrency
+                        ):
+                            show_result(result)
                 progress.update(scan_task, completed=100)
                 
                 # Display results summary
-                self.display_results_summary(results)
+                self.display_results_summary(rows)
                 
             except Exception as e:
                 self.logger.error(f"Scan failed: {e}")
+            finally:
+                for sig, handler in previous_handlers.items():
+                    signal.signal(sig, handler)
+
+    def scan_deadline(self, args: argparse.Namespace) -> Optional[float]:
+        """
+        Return the seconds after which the scan is stopped.
+        
+        A time budget is a hard limit too: the plugin selection rests on
+        expected runtimes, and on a guessed target count when targets are
+        streamed from stdin, so it alone cannot keep the scan within it.
+        
+        Args:
+            args: Parsed command line arguments
+        
+        Returns:
+            The tighter of --deadline and --time-budget, or None
+        """
+        limits = [limit for limit in (args.deadline, args.time_budget) if limit]
+        return min(limits) if limits else None
+    
+    def budget_plan(self, args: argparse.Namespace, plugins: List[PluginManifest], config: Dict,
+                    history: RuntimeHistory, target_count: int) -> BudgetPlan:
+        """
+        Choose the plugins to run under --time-budget (all of them without one).
+        
+        Args:
+            args: Parsed command line arguments
+            plugins: Discovered plugin manifests
+            config: Scan configuration
+            history: Runtime history, or None
+            target_count: Number of targets in batch mode, if known
+        
+        Returns:
+            Budget plan
+        
+        Raises:
+            DependencyError: If a dependency is missing or the graph has a cycle
+        """
+        graph = DependencyGraph({manifest.name: manifest.dependencies for manifest in plugins})
+        durations = expected_durations(
+            list(graph.dependencies), history, target=args.target, default=config.get('timeout', 300)
+        )
+        values = {
+            manifest.name: float(config.get('plugins', {}).get(manifest.name, {}).get('value', manifest.value))
+            for manifest in plugins
+        }
+        # The starting limit, so an adaptive limit is not counted on before it grows
+        slots = AdaptiveConcurrency.from_setting(args.max_concurrent, maximum=config.get('max_concurrent_ceiling')).limit
+        return plan_for_budget(graph, durations, values, args.time_budget, slots=slots, targets=target_count or 1)
+
+    def dry_run(self, args: argparse.Namespace, plugins: List[PluginManifest], config: Dict,
+                targets, history: RuntimeHistory, budget_plan: BudgetPlan = None):
+        """
+        Show the execution plan of a scan without running any tool.
+        
+        Args:
+            args: Parsed command line arguments
+            plugins: Plugin manifests to plan
+            config: Scan configuration
+            targets: Batch targets, or None for a single target
+            history: Runtime history for expected times, or None
+            budget_plan: Plan chosen under --time-budget, if any
+        """
+        orchestrator = ScanOrchestrator(
+            target=args.target,
+            output_dir=args.output_dir,
+            plugins=plugins,
+            config=config,
+            targets=targets,
+            history=history
+        )
+        try:
+            plan = orchestrator.plan_scans(
+                per_target_limit=args.per_target_limit,
+                concurrency=AdaptiveConcurrency.from_setting(
+                    args.max_concurrent, maximum=config.get('max_concurrent_ceiling')
+                )
+            )
+        except DependencyError as e:
+            self.logger.error(f"Cannot plan the scan: {e}")
+            return
+        if budget_plan:
+            plan['budget'] = budget_plan.to_dict()
+        self.display_execution_plan(plan)
+        
+        if args.plan_file:
+            with open(args.plan_file, 'w') as f:
+                json.dump(plan, f, indent=2, default=str)
+            self.console.print(f"Plan written to {args.plan_file}; run it with --execute-plan {args.plan_file}")
+
+    @staticmethod
+    def load_execution_plan(path: str, plugins: List[PluginManifest]) -> Dict:
+        """
+        Read a plan written by --dry-run --plan-file.
+        
+        Args:
+            path: Plan file
+            plugins: Discovered plugin manifests
+        
+        Returns:
+            The plan
+        
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If it is not a plan, or names plugins that are not installed
+        """
+        with open(path, 'r') as f:
+            plan = json.load(f)
+        if not isinstance(plan, dict) or plan.get('version') != 1 or 'jobs' not in plan:
+            raise ValueError("not a KAST execution plan")
+        missing = set(plan['plugins']) - {manifest.name for manifest in plugins}
+        if missing:
+            raise ValueError(f"plugins not installed here: {', '.join(sorted(missing))}")
+        return plan
 
-    def display_results_summary(self, results: List[Dict]):
+    @staticmethod
+    def plan_runtimes(plan: Dict) -> Dict[str, Dict[str, float]]:
+        """
+        Return the expected runtime of each plugin per target recorded in a plan.
+        
+        With the plan's other inputs, these give the scheduler the same
+        priorities it planned with; the recorded jobs, slots and commands
+        themselves are for display only.
+        """
+        runtimes: Dict[str, Dict[str, float]] = {}
+        for job in plan['jobs']:
+            if job['expected_seconds'] is not None:
+                runtimes.setdefault(job['target'], {})[job['plugin']] = job['expected_seconds']
+        return runtimes
+
+    def display_execution_plan(self, plan: Dict):
+        """
+        Display an execution plan made by ScanOrchestrator.plan_scans().
+        
+        Args:
+            plan: Execution plan
+        """
+        table = Table(title="Execution Plan")
+        table.add_column("Slot", justify="right")
+        table.add_column("Target", style="blue")
+        table.add_column("Plugin", style="cyan")
+        table.add_column("After")
+        table.add_column("Start (s)", justify="right")
+        table.add_column("End (s)", justify="right")
+        table.add_column("Command")
+        
+        for job in plan['jobs']:
+            timed = job['expected_start'] is not None
+            table.add_row(
+                str(job['slot']),
+                job['target'],
+                job['plugin'],
+                ', '.join(job['dependencies']) or '-',
+                f"{job['expected_start']:.1f}" if timed else '?',
+                f"{job['expected_end']:.1f}" if timed else '?',
+                ' '.join(job['command']) if job['command'] else '[red]unavailable[/red]',
+                # Jobs on their target's critical path bound the scan time
+                style='bold red' if job['critical'] else None
+            )
+        self.console.print(table)
+        
+        for target, path in plan['critical_paths'].items():
+            self.console.print(f"Critical path for {target}: [bold red]{' -> '.join(path)}[/bold red]")
+        if plan['estimated_seconds'] is not None:
+            self.console.print(
+                f"Estimated time {plan['estimated_seconds']:.1f}s on {plan['max_concurrent']} slots"
+            )
+        else:
+            self.console.print("No runtime history for these plugins; order and slots shown without times")
+
+    def display_budget_plan(self, plan: BudgetPlan):
+        """
+        Display the plugins a budget plan runs and drops.
+        
+        Args:
+            plan: Plan returned by budget_plan()
+        """
+        table = Table(title="Scan Plan")
+        table.add_column("#", justify="right")
+        table.add_column("Plugin", style="cyan")
+        table.add_column("Expected (s)", justify="right")
+        table.add_column("Value", justify="right")
+        table.add_column("Decision", style="magenta")
+        for position, name in enumerate(plan.selected, 1):
+            table.add_row(str(position), name, f"{plan.durations[name]:.1f}", f"{plan.values[name]:g}", "run")
+        for name, reason in plan.dropped.items():
+            table.add_row("", name, f"{plan.durations[name]:.1f}", f"{plan.values[name]:g}", f"dropped: {reason}")
+        self.console.print(table)
+        
+        summary = f"Estimated time {plan.estimated_seconds:.0f}s, covering {plan.coverage:.0%} of plugin value"
+        if plan.budget is not None:
+            summary = f"Time budget {plan.budget:.0f}s. " + summary
+        if not plan.optimal:
+            summary += " (search cut short; plan may not be optimal)"
+        self.console.print(summary)
+
+    @staticmethod
+    def progress_description(state: Dict) -> str:
+        """
+        Describe scan progress for the progress bar.
+        
+        Args:
+            state: Progress reported by ScanOrchestrator.progress()
+        
+        Returns:
+            Progress line with an ETA when one is known
+        """
+        description = f"[green]{state['finished']} plugin runs finished, {state['running']} running"
+        if state['eta_seconds'] is not None:
+            minutes, seconds = divmod(int(state['eta_seconds']), 60)
+            description += f" - ETA {minutes}:{seconds:02d}"
+        return description
+
+    @contextmanager
+    def scan_executor(self, args: argparse.Namespace):
+        """
+        Provide the executor plugins run on: a work queue if requested,
+        otherwise None for the orchestrator's own thread pool.
+        
+        Args:
+            args: Parsed command line arguments
+        """
+        if not (args.queue or args.workers):
+            yield None
+            return
+        
+        queue_path = os.path.abspath(args.queue or os.path.join(args.output_dir, 'queue.db'))
+        workers = [
+            subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker', '--queue', queue_path])
+            for _ in range(args.workers or 0)
+        ]
+        if workers:
+            self.logger.info(f"Started {len(workers)} workers on {queue_path}")
+        else:
+            self.logger.info(f"Queueing plugins on {queue_path}; start workers with: kast worker --queue {queue_path}")
+        try:
+            with WorkQueueExecutor(WorkQueue(queue_path)) as executor:
+                yield executor
+        finally:
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.wait()
+
+    def apply_plugin_arguments(self, args: argparse.Namespace, config: Dict):
+        """
+        Copy plugin options into each plugin's plugins.<name> configuration section.
+        
+        An option given on the command line overrides the configuration
+        files; a default declared with the option only fills a setting
+        they leave unset.
+        
+        Args:
+            args: Parsed command line arguments
+            config: Scan configuration, updated in place
+        """
+        for name, arguments in self.plugin_arguments.items():
+            section = dict((config.get('plugins') or {}).get(name) or {})
+            for dest, default in arguments:
+                if hasattr(args, dest):
+                    section[dest] = getattr(args, dest)
+                elif default is not None:
+                    section.setdefault(dest, default)
+            if section:
+                config['plugins'] = {**(config.get('plugins') or {}), name: section}
+
+    def run_with_daemon(self, args: argparse.Namespace, config: Dict, batch: bool):
+        """
+        Run a scan on the daemon and show its results as they arrive.
+        
+        Args:
+            args: Parsed command line arguments
+            config: Scan configuration
+            batch: Whether targets come from a targets file
+        """
+        request = {
+            'output_dir': os.path.abspath(args.output_dir),
+            'target': args.target,
+            'config': config,
+            'max_concurrent': args.max_concurrent,
+            'per_target_limit': args.per_target_limit,
+            'no_cache': args.no_cache,
+            'no_history': args.no_history,
+            'shard': args.shard,
+            'deadline': args.deadline,
+        }
+        if args.targets_file == '-':
+            # The daemon cannot read our stdin
+            request['targets'] = list(read_targets('-'))
+        elif batch:
+            request['targets_file'] = os.path.abspath(args.targets_file)
+        
+        # As for a local scan, the first interrupt cancels the job on the
+        # daemon, which then reports unfinished plugins as cancelled; a
+        # second one aborts, and the daemon cancels the job it loses
+        job = {}
+        def interrupt(signum, frame):
+            if 'cancelled' in job or 'id' not in job:
+                raise KeyboardInterrupt
+            self.console.print("[bold red]Stopping scan; interrupt again to abort.[/bold red]")
+            job['cancelled'] = True
+            try:
+                cancel_scan(job['id'], args.daemon_socket)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Could not cancel job {job['id']}: {e}")
+                raise KeyboardInterrupt
+        previous_handlers = {sig: signal.signal(sig, interrupt) for sig in (signal.SIGINT, signal.SIGTERM)}
+        
+        rows = []
+        try:
+            with Progress(
+                SpinnerColumn(),
+                TextColumn("[progress.description]{task.description}"),
+                console=self.console
+            ) as progress:
+                scan_task = progress.add_task("[green]Submitting scan to daemon...", total=100)
+                for event in submit_scan(request, args.daemon_socket):
+                    if event['event'] == 'queued':
+                        job['id'] = event['job']
+                        progress.update(scan_task, description=f"[green]Job {event['job']} queued at position {event['position']}...")
+                    elif event['event'] == 'result':
+                        result = event['result']
+                        rows.append(self.summary_row(result))
+                        progress.update(scan_task, description=f"[green]{len(rows)} plugin results received")
+                        self.logger.info(f"{result.get('tool_name') or result.get('plugin')} against {result.get('target')}: {result.get('status')}")
+                    elif event['event'] == 'error':
+                        self.logger.error(f"Scan failed: {event['error']}")
+                        return
+        finally:
+            for sig, handler in previous_handlers.items():
+                signal.signal(sig, handler)
+        
+        self.display_results_summary(rows)
+
+    def serve(self, argv: List[str]):
+        """
+        Run the KAST daemon until interrupted.
+        
+        Args:
+            argv: Arguments following "serve"
+        """
+        parser = argparse.ArgumentParser(
+            prog="kast serve",
+            description="Keep plugins and workers warm and accept scan jobs over a Unix socket"
+        )
+        parser.add_argument('--socket',
+                            default=default_socket_path(),
+                            help='Unix socket to listen on')
+        parser.add_argument('--max-concurrent',
+                            type=int,
+                            default=8,
+                            help='Maximum number of plugins running at once across all jobs')
+        parser.add_argument('--workers',
+                            type=int,
+                            default=2,
+                            help='Maximum number of scan jobs running at once')
+        args = parser.parse_args(argv)
+        
+        plugins = self.discover_plugins()
+        self.logger.info(f"Discovered {len(plugins)} plugins")
+        
+        daemon = KASTDaemon(plugins, args.socket, max_concurrent=args.max_concurrent, workers=args.workers,
+                            history=RuntimeHistory())
+        try:
+            daemon.serve_forever()
+        except RuntimeError as e:
+            parser.error(str(e))
+        except KeyboardInterrupt:
+            self.logger.info("KAST daemon stopped")
+
+    def work(self, argv: List[str]):
+        """
+        Run a queue worker until interrupted or idle.
+        
+        Args:
+            argv: Arguments following "worker"
+        """
+        parser = argparse.ArgumentParser(
+            prog="kast worker",
+            description="Run plugins pulled from a shared SQLite work queue"
+        )
+        parser.add_argument('--queue',
+                            metavar='DB',
+                            required=True,
+                            help='Work queue database')
+        parser.add_argument('--lease',
+                            type=float,
+                            default=DEFAULT_LEASE_SECONDS,
+                            help='Seconds a claimed plugin run stays leased without a heartbeat')
+        parser.add_argument('--idle-exit',
+                            type=float,
+                            help='Exit after the queue has been empty for this many seconds')
+        args = parser.parse_args(argv)
+        
+        plugins = self.discover_plugins()
+        
+        # Terminating a worker interrupts its plugin, which kills the tool
+        def interrupt(signum, frame):
+            raise KeyboardInterrupt
+        signal.signal(signal.SIGTERM, interrupt)
+        
+        worker = QueueWorker(WorkQueue(args.queue, lease_seconds=args.lease), plugins, idle_exit=args.idle_exit)
+        try:
+            processed = worker.run()
+            self.logger.info(f"Worker idle, exiting after {processed} plugin runs")
+        except KeyboardInterrupt:
+            self.logger.info("Worker stopped")
+
+    def merge(self, argv: List[str]):
+        """
+        Merge the output directories of sharded runs.
+        
+        Args:
+            argv: Arguments following "merge"
+        """
+        parser = argparse.ArgumentParser(
+            prog="kast merge",
+            description="Combine the output directories of several runs (e.g. --shard runs) into one"
+        )
+        parser.add_argument('run_dirs', nargs='+', metavar='RUN_DIR', help='Output directory of a run')
+        parser.add_argument('-o', '--output-dir', required=True, help='Directory to write the merged results to')
+        parser.add_argument('--copy', action='store_true', help='Copy result files instead of hard linking them')
+        parser.add_argument('--no-verify',
+                            action='store_true',
+                            help='Do not read back raw output artifacts to check their sha256')
+        args = parser.parse_args(argv)
+        
+        for run_dir in args.run_dirs:
+            if not os.path.isdir(run_dir):
+                parser.error(f"{run_dir} is not a directory")
+        
+        stats = merge_runs(args.run_dirs, args.output_dir, copy=args.copy, verify=not args.no_verify)
+        
+        table = Table(title=f"Merged into {args.output_dir}")
+        table.add_column("Runs", justify="right")
+        table.add_column("Target dirs", justify="right")
+        table.add_column("Files", justify="right")
+        table.add_column("Conflicts", justify="right")
+        table.add_column("Corrupt artifacts", justify="right")
+        table.add_column("Journal events", justify="right")
+        table.add_row(*(str(stats[key]) for key in ("runs", "targets", "files", "conflicts", "corrupt", "journal_events")))
+        self.console.print(table)
+
+    @staticmethod
+    def summary_row(result: Dict) -> Tuple[str, ...]:
+        """
+        Reduce a scan result to its row in the results summary.
+        
+        Args:
+            result: Scan result
+        
+        Returns:
+            Target, plugin, status, findings count, CPU, peak RSS and disk I/O
+        """
+        resources = result.get('resources')
+        if resources:
+            cpu = f"{resources['cpu_user_seconds'] + resources['cpu_system_seconds']:.1f}"
+            rss = f"{resources['max_rss_kb'] / 1024:.1f}"
+            disk_io = f"{(resources['block_read_bytes'] + resources['block_write_bytes']) / 2**20:.1f}"
+        else:
+            cpu = rss = disk_io = 'N/A'
+        
+        return (
+            result.get('target', 'N/A'),
+            result.get('tool_name', 'Unknown'),
+            result.get('status', 'N/A'),
+            str(len(result.get('findings', {}))),
+            cpu,
+            rss,
+            disk_io
+        )
+
+    def display_results_summary(self, rows: List[Tuple[str, ...]]):
         """
         Display a rich, formatted summary of scan results.
         
         Args:
-            results: List of scan results
+            rows: Summary rows of the scan results (see summary_row)
         """
         table = Table(title="Scan Results Summary")
+        table.add_column("Target", style="blue")
         table.add_column("Plugin", style="cyan")
         table.add_column("Status", style="magenta")
         table.add_column("Findings", style="green")
+        table.add_column("CPU (s)", justify="right")
+        table.add_column("Peak RSS (MB)", justify="right")
+        table.add_column("Disk I/O (MB)", justify="right")
         
-        for result in results:
-            table.add_row(
-                result.get('tool_name', 'Unknown'),
-                result.get('status', 'N/A'),
-                str(len(result.get('findings', {})))
-            )
+        for row in rows:
+            table.add_row(*row)
         
         self.console.print(table)
 
 def main():
     try:
         app = KASTCLIApp()
-        app.run()
+        if sys.argv[1:2] == ['serve']:
+            app.serve(sys.argv[2:])
+        elif sys.argv[1:2] == ['worker']:
+            app.work(sys.argv[2:])
+        elif sys.argv[1:2] == ['merge']:
+            app.merge(sys.argv[2:])
+        else:
+            app.run()
     except KeyboardInterrupt:
         rich.print("[bold red]Scan interrupted by user.[/bold red]")
         sys.exit(1)
@@ -3,8 +3,7 @@
 
 import json
 import os
-import subprocess
-from typing import Dict, List
+from typing import IO, Dict, List
 
 from core.plugin_base import PluginBase, ScanType, OutputMethod
 
@@ -25,15 +24,12 @@ class WafW00fPlugin(PluginBase):
     def output_method(self) -> OutputMethod:
         return OutputMethod.FILE
     
+    @property
+    def tool_binary(self) -> str:
+        return "wafw00f"
+    
     def check_dependencies(self) -> bool:
-        try:
-            subprocess.run(["wafw00f", "--version"], 
-                           capture_output=True, 
-                           text=True, 
-                           check=True)
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return self.probe_tool(self.tool_binary)["available"]
     
     def build_command(self) -> List[str]:
         # Prepare base command
@@ -52,12 +48,10 @@ class WafW00fPlugin(PluginBase):
         
         return cmd
     
-    def parse_output(self, raw_output: str) -> Dict:
+    def parse_output(self, raw_output: IO[str]) -> Dict:
         try:
             # Try to parse the JSON output
-            output_file = os.path.join(self.output_dir, f"{self.name}_raw_output.json")
-            with open(output_file, 'r') as f:
-                data = json.load(f)
+            data = json.load(raw_output)
             
             # Extract key findings
             findings = {
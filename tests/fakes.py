@@ -0,0 +1,60 @@
+"""Plugins running small shell commands, for exercising the orchestrator without real tools."""
+
+from typing import Dict, List
+
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+
+
+def make_plugin(name: str, dependencies: List[str] = (), command: List[str] = None,
+                scan_type: ScanType = ScanType.PASSIVE, fail: bool = False, sleep: float = 0.05):
+    """
+    Build a plugin class whose tool echoes its name.
+
+    Args:
+        name: Plugin name
+        dependencies: Plugins that must complete first
+        command: Command to run instead of the default echo
+        scan_type: Passive or active
+        fail: Make the tool exit non-zero and the parser raise
+        sleep: Seconds the default command takes
+    """
+    class FakePlugin(PluginBase):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.dependencies = list(dependencies)
+
+        @property
+        def name(self) -> str:
+            return name
+
+        @property
+        def description(self) -> str:
+            return f"Fake {name}"
+
+        @property
+        def scan_type(self) -> ScanType:
+            return scan_type
+
+        @property
+        def output_method(self) -> OutputMethod:
+            return OutputMethod.STDOUT
+
+        def check_dependencies(self) -> bool:
+            return True
+
+        def build_command(self) -> List[str]:
+            if command:
+                return list(command)
+            cmd = ["sh", "-c", f"echo {name} {self.target}; sleep {sleep}" + ("; exit 1" if fail else "")]
+            if self.config.get("verbose"):
+                cmd.append("-v")
+            return cmd
+
+        def parse_output(self, raw_output) -> Dict:
+            if fail:
+                raise RuntimeError(f"{name} failed")
+            return {"output": raw_output.read().strip()}
+
+    FakePlugin.__name__ = FakePlugin.__qualname__ = f"Fake_{name}"
+    return FakePlugin
+
@@ -0,0 +1,103 @@
+import gzip
+import hashlib
+import json
+import os
+
+import pytest
+
+from core import artifacts
+from core.artifacts import CorruptArtifact, open_raw_output, store_raw_output, verify_artifacts
+from core.merge import merge_runs
+from core.result_cache import ResultCache
+
+CONTENT = "line one\nline two ünïcode\n" * 1000
+
+
+@pytest.fixture(params=["gzip", "zstd"])
+def encoding(request, monkeypatch):
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    else:
+        monkeypatch.setattr(artifacts, "zstandard", None)
+    return request.param
+
+
+def store(tmp_path, content=CONTENT):
+    source = tmp_path / "raw.txt"
+    source.write_text(content)
+    return store_raw_output(str(source), str(tmp_path), "tool_raw_output")
+
+
+def test_round_trip(tmp_path, encoding):
+    record = store(tmp_path)
+    assert record["encoding"] == encoding
+    assert record["size"] == len(CONTENT.encode())
+    assert record["sha256"] == hashlib.sha256(CONTENT.encode()).hexdigest()
+    assert record["compressed_size"] < record["size"]
+    with open_raw_output(record, str(tmp_path)) as stream:
+        assert stream.read() == CONTENT
+    verify_artifacts({"raw_output": record}, str(tmp_path))
+
+
+def test_mismatched_content_fails_the_sha256_check(tmp_path, encoding):
+    record = store(tmp_path)
+    store(tmp_path, CONTENT.replace("one", "1ne"))
+    with pytest.raises(CorruptArtifact):
+        with open_raw_output(record, str(tmp_path)) as stream:
+            stream.read()
+
+
+def test_damaged_or_missing_artifact_is_reported(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "zstandard", None)
+    record = store(tmp_path)
+    path = tmp_path / record["path"]
+    path.write_bytes(path.read_bytes()[:-20])
+    with pytest.raises(CorruptArtifact):
+        verify_artifacts({"raw_output": record}, str(tmp_path))
+    path.unlink()
+    with pytest.raises(CorruptArtifact):
+        verify_artifacts({"raw_output": record}, str(tmp_path))
+
+
+def test_no_artifact_reads_empty(tmp_path):
+    assert open_raw_output(None, str(tmp_path)).read() == ""
+
+
+def write_result(results_dir, content=CONTENT):
+    os.makedirs(results_dir, exist_ok=True)
+    source = os.path.join(results_dir, "raw.txt")
+    with open(source, "w") as f:
+        f.write(content)
+    result = {"tool_name": "tool", "raw_output": store_raw_output(source, results_dir, "tool_raw_output")}
+    os.remove(source)
+    with open(os.path.join(results_dir, "tool_results.json"), "w") as f:
+        json.dump(result, f)
+    return result
+
+
+def corrupt(results_dir):
+    with gzip.open(os.path.join(results_dir, "tool_raw_output.gz"), "wb") as f:
+        f.write(b"something else")
+
+
+def test_cache_drops_a_corrupt_entry(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "zstandard", None)
+    cache = ResultCache(str(tmp_path / "cache"))
+    cache.put("key", write_result(str(tmp_path / "run")), str(tmp_path / "run"))
+    assert cache.get("key", 60) is not None
+
+    corrupt(os.path.join(cache.directory, "ke", "key"))
+    assert cache.get("key", 60) is None
+    assert not os.path.exists(os.path.join(cache.directory, "ke", "key"))
+
+
+def test_merge_counts_corrupt_artifacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(artifacts, "zstandard", None)
+    write_result(str(tmp_path / "one" / "a.com"))
+    write_result(str(tmp_path / "two" / "b.com"))
+    corrupt(str(tmp_path / "two" / "b.com"))
+
+    stats = merge_runs([str(tmp_path / "one"), str(tmp_path / "two")], str(tmp_path / "merged"))
+    assert stats["corrupt"] == 1
+    assert (tmp_path / "merged" / "b.com" / "tool_results.json").exists()
+    assert merge_runs([str(tmp_path / "two")], str(tmp_path / "unchecked"), verify=False)["corrupt"] == 0
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import pytest
+
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+from core.scanner import ScanOrchestrator
+
+
+class ShellPlugin(PluginBase):
+    """Runs a shell script; subclasses set the plugin name, dependencies and script."""
+
+    plugin_name = "shell"
+    requires: List[str] = []
+    script = "echo done"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependencies = list(self.requires)
+
+    @property
+    def name(self) -> str:
+        return self.plugin_name
+
+    @property
+    def description(self) -> str:
+        return "Shell script"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["sh", "-c", self.script.format(output_dir=self.output_dir)]
+
+    def parse_output(self, raw_output) -> Dict:
+        return {"output": raw_output.read().strip()}
+
+
+def sleeper(name, seconds, requires=()):
+    return type(name, (ShellPlugin,), {"plugin_name": name, "requires": list(requires),
+                                       "script": f"sleep {seconds}; echo {name}"})
+
+
+def span(result):
+    return datetime.fromisoformat(result["timestamp_start"]), datetime.fromisoformat(result["timestamp_end"])
+
+
+def test_independent_plugins_run_concurrently(tmp_path):
+    plugins = [sleeper(f"p{i}", 0.5) for i in range(3)]
+    orchestrator = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins)
+    started = time.monotonic()
+    results = asyncio.run(orchestrator.run_scans_async(max_concurrent=3))
+    assert time.monotonic() - started < 1.2
+    assert sorted((result["tool_name"], result["status"], result["findings"]["output"]) for result in results) == [
+        ("p0", "completed", "p0"), ("p1", "completed", "p1"), ("p2", "completed", "p2"),
+    ]
+
+
+def test_dependents_start_after_their_dependencies(tmp_path):
+    plugins = [sleeper("first", 0.2), sleeper("second", 0.1, requires=["first"])]
+    results = {result["tool_name"]: result
+               for result in asyncio.run(ScanOrchestrator("a.com", str(tmp_path), plugins=plugins).run_scans_async())}
+    assert span(results["second"])[0] >= span(results["first"])[1]
+
+
+def test_timeout_is_reported(tmp_path):
+    Slow = type("Slow", (ShellPlugin,), {"plugin_name": "slow", "script": "exec sleep 30"})
+    orchestrator = ScanOrchestrator("a.com", str(tmp_path), plugins=[Slow], config={"timeout": 0.3})
+    started = time.monotonic()
+    [result] = asyncio.run(orchestrator.run_scans_async())
+    assert result["status"] == "timeout"
+    assert time.monotonic() - started < 5
+
+
+def test_cancelling_the_scan_kills_running_tools(tmp_path):
+    pid_file = tmp_path / "pid"
+    Slow = type("Slow", (ShellPlugin,), {"plugin_name": "slow", "script": f"echo $$ > {pid_file}; exec sleep 30"})
+    orchestrator = ScanOrchestrator("a.com", str(tmp_path), plugins=[Slow])
+
+    async def scan():
+        await asyncio.wait_for(orchestrator.run_scans_async(), timeout=0.5)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scan())
+    pid = int(pid_file.read_text())
+    with pytest.raises(ProcessLookupError):
+        os.kill(pid, 0)
+
+
+class Probed(ShellPlugin):
+    """Records the threads its tool version is probed on."""
+
+    plugin_name = "probed"
+    probe_threads: List[threading.Thread] = []
+    installed = True
+
+    @property
+    def version(self) -> str:
+        self.probe_threads.append(threading.current_thread())
+        return "1.0"
+
+    def check_dependencies(self) -> bool:
+        return self.installed
+
+
+@pytest.mark.parametrize("installed", [True, False])
+def test_version_is_probed_off_the_event_loop(tmp_path, monkeypatch, installed):
+    monkeypatch.setattr(Probed, "probe_threads", [])
+    monkeypatch.setattr(Probed, "installed", installed)
+    result = asyncio.run(Probed("a.com", str(tmp_path)).run_async())
+    assert result["status"] == ("completed" if installed else "failed")
+    assert result["tool_version"] == "1.0"
+    assert Probed.probe_threads and threading.main_thread() not in Probed.probe_threads
@@ -0,0 +1,87 @@
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+import pytest
+
+from core.cancellation import CancellationToken
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+from core.scanner import ScanOrchestrator
+
+
+class ShellPlugin(PluginBase):
+    """Runs a shell script; subclasses set the plugin name, dependencies and script."""
+
+    plugin_name = "shell"
+    requires: List[str] = []
+    script = "echo done"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependencies = list(self.requires)
+
+    @property
+    def name(self) -> str:
+        return self.plugin_name
+
+    @property
+    def description(self) -> str:
+        return "Shell script"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["sh", "-c", self.script.format(output_dir=self.output_dir)]
+
+    def parse_output(self, raw_output) -> Dict:
+        return {"output": raw_output.read().strip()}
+
+
+def plugins(pid_file):
+    hang = type("hang", (ShellPlugin,), {"plugin_name": "hang", "script": f"echo $$ > {pid_file}; exec sleep 30"})
+    after = type("after", (ShellPlugin,), {"plugin_name": "after", "requires": ["hang"]})
+    return [hang, after]
+
+
+def check_cancelled(results, pid_file, started):
+    assert time.monotonic() - started < 5
+    assert {result.get("tool_name") or result.get("plugin"): result["status"] for result in results} == {
+        "hang": "cancelled", "after": "cancelled"
+    }
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+
+def test_deadline_cancels_running_and_pending_plugins(tmp_path):
+    pid_file = tmp_path / "pid"
+    orchestrator = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins(pid_file),
+                                    config={"kill_grace_period": 0.2}, cancel_token=CancellationToken(timeout=0.5))
+    started = time.monotonic()
+    check_cancelled(orchestrator.run_scans(), pid_file, started)
+
+
+def test_deadline_cancels_the_asyncio_engine(tmp_path):
+    pid_file = tmp_path / "pid"
+    orchestrator = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins(pid_file),
+                                    config={"kill_grace_period": 0.2}, cancel_token=CancellationToken(timeout=0.5))
+    started = time.monotonic()
+    check_cancelled(asyncio.run(orchestrator.run_scans_async()), pid_file, started)
+
+
+def test_token():
+    token = CancellationToken()
+    assert not token.cancelled and token.remaining() is None
+    token.cancel("stop")
+    assert token.cancelled and token.reason == "stop"
+    assert token.wait(0)
+    assert 0 < CancellationToken(timeout=30).remaining() <= 30
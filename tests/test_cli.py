@@ -0,0 +1,95 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from core.plugin_base import ScanType
+from core.registry import PluginManifest
+from main import KASTCLIApp
+from tests.fakes import make_plugin
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+@pytest.fixture
+def kast(tmp_path):
+    env = {**os.environ, "HOME": str(tmp_path / "home")}
+
+    def run(*args):
+        return subprocess.run([sys.executable, MAIN, *args], cwd=tmp_path, env=env, capture_output=True,
+                              text=True, timeout=120)
+    return run
+
+
+def test_help(kast):
+    for command in ([], ["serve"], ["worker"], ["merge"]):
+        assert kast(*command, "--help").returncode == 0
+
+
+def test_dry_run_writes_a_plan_and_nothing_else(kast, tmp_path):
+    result = kast("a.example", "-o", "out", "--dry-run", "--plan-file", "plan.json", "--no-daemon")
+    assert result.returncode == 0, result.stderr
+    plan = json.loads((tmp_path / "plan.json").read_text())
+    assert [job["plugin"] for job in plan["jobs"]] == ["wafw00f"]
+    assert not (tmp_path / "out").exists()
+
+    result = kast("--execute-plan", "plan.json", "--no-daemon")
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "out" / "wafw00f_results.json").exists()
+
+
+def test_batch_resume_and_merge(kast, tmp_path):
+    (tmp_path / "targets.txt").write_text("a.example\nb.example\n")
+    result = kast("-T", "targets.txt", "-o", "run", "--no-daemon")
+    assert result.returncode == 0, result.stderr
+    assert len(os.listdir(tmp_path / "run")) == 3  # Two target directories and the journal
+
+    result = kast("--resume", "run", "--no-daemon")
+    assert result.returncode == 0, result.stderr
+    with open(tmp_path / "run" / "journal.jsonl") as f:
+        events = [json.loads(line)["event"] for line in f]
+    # Every plugin finished in the first run, so the resume starts nothing
+    assert events.count("plan") == 2 and events.count("running") == 2
+
+    assert kast("merge", "run", "-o", "merged").returncode == 0
+    assert sorted(name for name in os.listdir(tmp_path / "merged") if name != "journal.jsonl") == sorted(
+        name for name in os.listdir(tmp_path / "run") if name != "journal.jsonl"
+    )
+
+
+def test_local_workers(kast, tmp_path):
+    result = kast("a.example", "-o", "out", "--workers", "2", "--no-daemon")
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "out" / "wafw00f_results.json").exists()
+    assert (tmp_path / "out" / "queue.db").exists()
+
+
+def test_bad_config_is_reported(kast, tmp_path):
+    (tmp_path / "bad.yml").write_text("- nope\n")
+    result = kast("a.example", "--config", "bad.yml", "--no-daemon")
+    assert result.returncode == 2 and "cannot read configuration" in result.stderr
+
+
+def test_plugin_options_reach_the_plugin_config(tmp_path):
+    manifest = PluginManifest(
+        "fake", "Fake", ScanType.PASSIVE, "tests.fakes:unused", plugin_class=make_plugin("fake"),
+        arguments=[
+            {"flags": ["--fake-level"], "dest": "level", "type": int},
+            {"flags": ["--fake-mode"], "default": "quick"},
+            {"flags": ["--fake-verbose"], "action": "store_true"},
+        ]
+    )
+    app = KASTCLIApp()
+    parser = app.setup_argument_parser([manifest])
+
+    config = {"plugins": {"fake": {"fake_mode": "thorough", "wordlist": "big"}}}
+    app.apply_plugin_arguments(parser.parse_args(["a.com", "--fake-level", "3"]), config)
+    assert config["plugins"]["fake"] == {"level": 3, "fake_mode": "thorough", "wordlist": "big"}
+    plugin = manifest.create("a.com", str(tmp_path), config)
+    assert plugin.config["level"] == 3
+
+    config = {}
+    app.apply_plugin_arguments(parser.parse_args(["a.com", "--fake-verbose"]), config)
+    assert config["plugins"]["fake"] == {"fake_mode": "quick", "fake_verbose": True}
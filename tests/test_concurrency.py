@@ -0,0 +1,64 @@
+import pytest
+
+from core import concurrency
+from core.concurrency import AdaptiveConcurrency
+
+
+@pytest.fixture
+def host(monkeypatch):
+    """Healthy host signals that tests can turn bad."""
+    signals = {"load": 0.2, "memory": 0.8}
+    monkeypatch.setattr(concurrency, "load_per_cpu", lambda: signals["load"])
+    monkeypatch.setattr(concurrency, "memory_available_fraction", lambda: signals["memory"])
+    return signals
+
+
+def test_from_setting():
+    assert AdaptiveConcurrency.from_setting("auto", maximum=16).adaptive
+    fixed = AdaptiveConcurrency.from_setting("5")
+    assert not fixed.adaptive and fixed.limit == 5
+    with pytest.raises(ValueError):
+        AdaptiveConcurrency.from_setting(0)
+
+
+def test_fixed_limit_never_changes(host):
+    controller = AdaptiveConcurrency.fixed(4)
+    host["load"] = 10
+    assert controller.update(saturated=True) == 4
+
+
+def test_grows_by_one_only_while_saturated_and_healthy(host):
+    controller = AdaptiveConcurrency(initial=2, maximum=3, interval=0)
+    assert controller.update(saturated=False) == 2
+    assert controller.update(saturated=True) == 3
+    assert controller.update(saturated=True) == 3
+
+
+def test_waits_an_interval_between_changes(host):
+    controller = AdaptiveConcurrency(initial=2, maximum=8, interval=60)
+    assert controller.update(saturated=True) == 2
+
+
+@pytest.mark.parametrize("signal, value", [("load", 3.0), ("memory", 0.05)])
+def test_halves_when_the_host_is_overloaded(host, signal, value):
+    controller = AdaptiveConcurrency(initial=8, minimum=3, maximum=16, interval=0)
+    host[signal] = value
+    assert controller.update(saturated=True) == 4
+    assert controller.update(saturated=True) == 3
+
+
+def test_halves_on_failures_and_judges_the_new_limit_afresh(host):
+    controller = AdaptiveConcurrency(initial=8, maximum=16, interval=0)
+    for status in ("failed", "timeout", "completed", "failed"):
+        controller.record({"status": status})
+    assert controller.update(saturated=True) == 4
+    assert controller.update(saturated=True) == 5
+
+
+def test_cached_and_skipped_results_do_not_count(host):
+    controller = AdaptiveConcurrency(initial=8, maximum=16, interval=0)
+    for _ in range(4):
+        controller.record({"status": "failed", "cached": True})
+        controller.record({"status": "skipped"})
+        controller.record({"status": "failed", "resumed": True})
+    assert controller.update(saturated=True) == 9
@@ -0,0 +1,36 @@
+import argparse
+
+import pytest
+
+from config.config import ConfigManager, merge_config
+
+
+def test_defaults_are_loaded():
+    config = ConfigManager(argparse.Namespace(config=None)).get_config()
+    assert config["timeout"] == 300
+    assert config["plugins"] == {}
+
+
+def test_user_file_overrides_defaults(tmp_path):
+    path = tmp_path / "kast.yml"
+    path.write_text("timeout: 60\nplugins:\n  wafw00f:\n    cache_ttl: 3600\n")
+    config = ConfigManager(argparse.Namespace(config=str(path))).get_config()
+    assert config["timeout"] == 60
+    assert config["niceness"] == 10
+    assert config["plugins"] == {"wafw00f": {"cache_ttl": 3600}}
+
+
+def test_invalid_user_file_is_rejected(tmp_path):
+    path = tmp_path / "kast.yml"
+    path.write_text("- not a mapping\n")
+    with pytest.raises(ValueError):
+        ConfigManager(argparse.Namespace(config=str(path))).get_config()
+    with pytest.raises(OSError):
+        ConfigManager(argparse.Namespace(config=str(tmp_path / "missing.yml"))).get_config()
+
+
+def test_merge_recurses_into_mappings_without_changing_its_inputs():
+    base = {"liveness": {"mode": "skip", "timeout": 2}, "ports": [80]}
+    merged = merge_config(base, {"liveness": {"timeout": 5}, "ports": [443]})
+    assert merged == {"liveness": {"mode": "skip", "timeout": 5}, "ports": [443]}
+    assert base == {"liveness": {"mode": "skip", "timeout": 2}, "ports": [80]}
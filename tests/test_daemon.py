@@ -0,0 +1,175 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from core.daemon import EVENT_QUEUE_SIZE, KASTDaemon, _connect, _send, cancel_scan, daemon_available, submit_scan
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+
+
+class EchoPlugin(PluginBase):
+    """Echoes the target."""
+
+    @property
+    def name(self) -> str:
+        return "echo"
+
+    @property
+    def description(self) -> str:
+        return "Echo"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["echo", self.target]
+
+    def parse_output(self, raw_output) -> Dict:
+        return {"output": raw_output.read().strip()}
+
+
+class HangPlugin(EchoPlugin):
+    """Runs until it is killed."""
+
+    @property
+    def name(self) -> str:
+        return "hang"
+
+    def build_command(self) -> List[str]:
+        return ["sh", "-c", f"touch {self.output_dir}/started; exec sleep 30"]
+
+
+def serve(plugins):
+    # Unix socket paths are short, so keep the socket out of pytest's tmp_path
+    socket_dir = tempfile.mkdtemp(prefix="kast-test-")
+    daemon = KASTDaemon(plugins, os.path.join(socket_dir, "kast.sock"), max_concurrent=2, workers=1)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not daemon_available(daemon.socket_path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    yield daemon
+    daemon.shutdown()
+    thread.join(5)
+    shutil.rmtree(socket_dir)
+
+
+@pytest.fixture
+def daemon():
+    yield from serve([EchoPlugin])
+
+
+@pytest.fixture
+def hanging_daemon():
+    yield from serve([HangPlugin])
+
+
+def request(socket_path, message):
+    with _connect(socket_path, 5) as sock, sock.makefile("rwb") as stream:
+        _send(stream, message)
+        return json.loads(stream.readline())
+
+
+def test_scan_streams_queued_results_and_done(daemon, tmp_path):
+    scan = {"output_dir": str(tmp_path), "target": "a.com", "config": {}, "no_cache": True}
+    events = list(submit_scan(scan, daemon.socket_path))
+    assert [event["event"] for event in events] == ["queued", "result", "done"]
+    assert events[0]["position"] == 1
+    assert events[1]["result"]["findings"] == {"output": "a.com"}
+    assert events[2]["results"] == 1
+    assert (tmp_path / "echo_results.json").exists()
+
+
+def test_batch_scan_runs_every_target(daemon, tmp_path):
+    scan = {"output_dir": str(tmp_path), "targets": ["a.com", "b.com"], "no_cache": True}
+    events = list(submit_scan(scan, daemon.socket_path))
+    results = [event["result"] for event in events if event["event"] == "result"]
+    assert sorted(result["findings"]["output"] for result in results) == ["a.com", "b.com"]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return condition()
+
+
+def start_hanging_scan(daemon, output_dir):
+    events = submit_scan({"output_dir": str(output_dir), "target": "a.com", "no_cache": True}, daemon.socket_path)
+    queued = next(events)
+    assert wait_for(lambda: (output_dir / "started").exists())
+    return queued["job"], events
+
+
+def test_cancel_op_reports_unfinished_plugins_as_cancelled(hanging_daemon, tmp_path):
+    started = time.monotonic()
+    job, events = start_hanging_scan(hanging_daemon, tmp_path)
+    assert cancel_scan(job, hanging_daemon.socket_path)
+    rest = list(events)
+    assert [event["event"] for event in rest] == ["result", "done"]
+    assert rest[0]["result"]["status"] == "cancelled"
+    assert time.monotonic() - started < 15
+    assert not cancel_scan(job, hanging_daemon.socket_path)
+
+
+def test_disconnecting_client_cancels_its_job(hanging_daemon, tmp_path):
+    job, events = start_hanging_scan(hanging_daemon, tmp_path)
+    assert hanging_daemon.status()["running"] == [job]
+    events.close()
+    assert wait_for(lambda: hanging_daemon.status()["running"] == [], timeout=10)
+
+
+def test_events_queue_is_bounded(daemon, tmp_path):
+    job = daemon.submit({"output_dir": str(tmp_path), "target": "a.com", "no_cache": True})
+    assert job.events.maxsize == EVENT_QUEUE_SIZE
+    job.cancel("test")
+    while job.events.get()["event"] not in ("done", "error"):
+        pass
+
+
+def test_status_and_unknown_ops(daemon):
+    assert request(daemon.socket_path, {"op": "status"}) == {
+        "event": "status", "pid": os.getpid(), "queued": [], "running": []
+    }
+    assert request(daemon.socket_path, {"op": "bogus"})["event"] == "error"
+
+
+def test_second_daemon_refuses_a_live_socket(daemon):
+    with pytest.raises(RuntimeError):
+        KASTDaemon([EchoPlugin], daemon.socket_path).serve_forever()
+
+
+def test_stale_socket_is_replaced():
+    socket_dir = tempfile.mkdtemp(prefix="kast-test-")
+    socket_path = os.path.join(socket_dir, "kast.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+    assert not daemon_available(socket_path)
+
+    daemon = KASTDaemon([EchoPlugin], socket_path, workers=1)
+    thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not daemon_available(socket_path) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert daemon_available(socket_path)
+    finally:
+        daemon.shutdown()
+        thread.join(5)
+        shutil.rmtree(socket_dir)
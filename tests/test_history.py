@@ -0,0 +1,153 @@
+from typing import Dict, List
+
+import pytest
+
+from core import history as history_module
+from core.concurrency import AdaptiveConcurrency
+from core.history import RuntimeHistory, target_class
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+from core.scanner import ScanOrchestrator
+
+
+class EchoPlugin(PluginBase):
+    """Echoes its name; subclasses set the plugin name."""
+
+    plugin_name = "echo"
+
+    @property
+    def name(self) -> str:
+        return self.plugin_name
+
+    @property
+    def description(self) -> str:
+        return "Echo"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["echo", self.name]
+
+    def parse_output(self, raw_output) -> Dict:
+        return {"output": raw_output.read().strip()}
+
+
+def echo(name):
+    return type(name, (EchoPlugin,), {"plugin_name": name})
+
+
+class Hang(EchoPlugin):
+    """Runs far longer than its history says it should."""
+
+    plugin_name = "hang"
+
+    def build_command(self) -> List[str]:
+        return ["sleep", "30"]
+
+
+@pytest.fixture
+def history(tmp_path):
+    return RuntimeHistory(str(tmp_path / "history.db"))
+
+
+def test_target_class():
+    assert target_class("https://example.com/login") == "https:domain"
+    assert target_class("http://10.0.0.1:8080") == "http:ip"
+    assert target_class("example.com") == "bare:domain"
+    assert target_class("[::1]:443") == "bare:ip"
+
+
+def test_expected_runtime_is_the_median_for_the_target_class(history):
+    for seconds in (1, 2, 30):
+        history.record("crawl", "https://a.com", seconds, "completed")
+    history.record("crawl", "10.0.0.1", 100, "completed")
+    assert history.expected("crawl", "https://b.com") == 2
+    assert history.expected("crawl", "10.0.0.2") == 100
+    assert history.expected("unknown", "a.com") is None
+
+
+def test_other_target_classes_are_the_fallback(history):
+    history.record("crawl", "https://a.com", 4, "completed")
+    assert history.expected("crawl", "ftp://a.com") == 4
+
+
+def test_new_runtimes_refresh_the_estimate(history):
+    history.record("crawl", "a.com", 1, "completed")
+    assert history.expected("crawl", "a.com") == 1
+    history.record("crawl", "a.com", 5, "completed")
+    assert history.expected("crawl", "a.com") == 3
+
+
+def test_only_recent_samples_are_kept(history, monkeypatch):
+    monkeypatch.setattr(history_module, "SAMPLES", 3)
+    for seconds in range(10):
+        history.record("crawl", "a.com", seconds, "completed" if seconds % 2 else "timeout")
+    assert history.durations("crawl", "a.com") == [9, 8, 7]
+    assert history.durations("crawl", statuses=("completed",)) == [9, 7]
+
+
+def test_longest_expected_plugin_starts_first(tmp_path, history):
+    # Without history the tie would go to "a_short"
+    history.record("z_long", "a.com", 60, "completed")
+    history.record("a_short", "a.com", 1, "completed")
+    orchestrator = ScanOrchestrator("a.com", str(tmp_path), plugins=[echo("a_short"), echo("z_long")],
+                                    history=history)
+    results = orchestrator.run_scans(concurrency=AdaptiveConcurrency.fixed(1))
+    assert [result["tool_name"] for result in results] == ["z_long", "a_short"]
+
+
+def test_progress_reports_an_eta_from_history(tmp_path, history):
+    for name in ("first", "second"):
+        history.record(name, "a.com", 20, "completed")
+    orchestrator = ScanOrchestrator("a.com", str(tmp_path), plugins=[echo("first"), echo("second")],
+                                    history=history)
+    progress = []
+    orchestrator.run_scans(concurrency=AdaptiveConcurrency.fixed(1),
+                           on_result=lambda result: progress.append(orchestrator.progress()))
+    assert progress[0]["finished"] == 1
+    assert 0 < progress[0]["eta_seconds"] <= 20
+    assert progress[-1]["finished"] == 2
+
+
+def test_runs_are_recorded(tmp_path, history):
+    ScanOrchestrator("a.com", str(tmp_path), plugins=[echo("recon")], history=history).run_scans()
+    assert len(history.durations("recon", "a.com", statuses=("completed",))) == 1
+
+
+def test_learned_timeout_is_p95_times_factor_within_bounds(history):
+    for seconds in range(1, 21):
+        history.record("crawl", "a.com", seconds, "completed")
+    history.record("crawl", "a.com", 500, "timeout")
+    assert history.learned_timeout("crawl", "a.com", factor=2, minimum=1, maximum=3600) == {
+        "seconds": 38, "p95_seconds": 19, "factor": 2, "samples": 20
+    }
+    assert history.learned_timeout("crawl", "a.com", factor=2, minimum=1, maximum=30)["seconds"] == 30
+    assert history.learned_timeout("crawl", "a.com", factor=2, minimum=60)["seconds"] == 60
+    assert history.learned_timeout("crawl", "a.com", min_samples=21) is None
+
+
+def test_learned_timeout_replaces_the_configured_one(tmp_path, history):
+    for _ in range(5):
+        history.record("hang", "a.com", 0.1, "completed")
+    config = {"timeout": 300, "kill_grace_period": 0.1, "adaptive_timeouts": True, "adaptive_timeout_min": 0.5}
+    [result] = ScanOrchestrator("a.com", str(tmp_path), plugins=[Hang], config=config, history=history).run_scans()
+    assert result["status"] == "timeout"
+    assert result["learned_timeout"]["seconds"] == 0.5
+    assert result["learned_timeout"]["samples"] == 5
+
+
+def test_timeouts_are_only_learned_when_enabled(tmp_path, history):
+    for _ in range(5):
+        history.record("recon", "a.com", 0.1, "completed")
+    config = {"adaptive_timeout_min": 0.5}
+    [result] = ScanOrchestrator("a.com", str(tmp_path), plugins=[echo("recon")], config=config,
+                                history=history).run_scans()
+    assert result["status"] == "completed" and "learned_timeout" not in result
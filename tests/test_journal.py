@@ -0,0 +1,119 @@
+import json
+from typing import Dict, List
+
+from core.journal import ScanJournal
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+from core.scanner import ScanOrchestrator
+
+
+class EchoPlugin(PluginBase):
+    """Echoes its name and target; subclasses set the plugin name and dependencies."""
+
+    plugin_name = "echo"
+    requires: List[str] = []
+    broken = False
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependencies = list(self.requires)
+
+    @property
+    def name(self) -> str:
+        return self.plugin_name
+
+    @property
+    def description(self) -> str:
+        return "Echo"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["echo", self.name, self.target]
+
+    def parse_output(self, raw_output) -> Dict:
+        if self.broken:
+            raise ValueError("unparseable output")
+        return {"output": raw_output.read().strip()}
+
+
+def echo(name, requires=(), broken=False):
+    return type(name, (EchoPlugin,), {"plugin_name": name, "requires": list(requires), "broken": broken})
+
+
+def test_load_replays_events_and_ignores_a_torn_line(tmp_path):
+    journal = ScanJournal(str(tmp_path / "journal.jsonl"))
+    journal.record("plan", plugins=["recon", "probe"])
+    journal.record("target", target="a.com")
+    journal.record("running", target="a.com", plugin="recon")
+    journal.record("finished", target="a.com", plugin="recon", status="completed", results_file="r.json")
+    journal.record("running", target="a.com", plugin="probe")
+    journal.close()
+    with open(journal.path, "a") as f:
+        f.write('{"event": "finished", "tar')
+
+    state = journal.load()
+    assert state.plan["plugins"] == ["recon", "probe"]
+    assert state.targets == ["a.com"]
+    assert state.finished == {"a.com": {"recon": {"status": "completed", "results_file": "r.json"}}}
+    assert state.running == {("a.com", "probe")}
+
+
+def test_resume_reruns_only_unfinished_plugins(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    journal = ScanJournal(journal_path)
+    journal.record("target", target="a.com")
+    journal.record("finished", target="a.com", plugin="recon", status="completed",
+                   results_file=str(tmp_path / "recon_results.json"))
+    (tmp_path / "recon_results.json").write_text(json.dumps(
+        {"tool_name": "recon", "target": "a.com", "status": "completed", "findings": {"output": "earlier"}}
+    ))
+    journal.close()
+
+    plugins = [echo("recon"), echo("probe", requires=["recon"])]
+    results = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins, journal=ScanJournal(journal_path)).run_scans()
+    by_name = {result["tool_name"]: result for result in results}
+    assert by_name["recon"]["findings"] == {"output": "earlier"}
+    assert by_name["probe"]["findings"] == {"output": "probe a.com"}
+
+
+def test_resume_keeps_failures_and_skips_their_dependents(tmp_path):
+    plugins = [echo("broken", broken=True), echo("after_broken", requires=["broken"])]
+    journal_path = str(tmp_path / "journal.jsonl")
+    first = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins, journal=ScanJournal(journal_path)).run_scans()
+    assert {result["tool_name"]: result["status"] for result in first}["broken"] == "failed"
+
+    second = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins, journal=ScanJournal(journal_path)).run_scans()
+    assert {result["tool_name"]: result["status"] for result in second} == {
+        result["tool_name"]: result["status"] for result in first
+    }
+    with open(journal_path) as f:
+        started = [json.loads(line) for line in f if '"running"' in line]
+    assert [event["plugin"] for event in started] == ["broken"]
+
+
+def test_retry_failed_reruns_failures_and_their_dependents(tmp_path):
+    journal_path = str(tmp_path / "journal.jsonl")
+    broken = [echo("ok"), echo("flaky", broken=True), echo("after_flaky", requires=["flaky"])]
+    first = ScanOrchestrator("a.com", str(tmp_path), plugins=broken, journal=ScanJournal(journal_path)).run_scans()
+    assert {result["tool_name"]: result["status"] for result in first} == {
+        "ok": "completed", "flaky": "failed", "after_flaky": "skipped"
+    }
+
+    fixed = [echo("ok"), echo("flaky"), echo("after_flaky", requires=["flaky"])]
+    second = ScanOrchestrator("a.com", str(tmp_path), plugins=fixed, journal=ScanJournal(journal_path),
+                              retry_failed=True).run_scans()
+    assert {result["tool_name"]: result["status"] for result in second} == {
+        "ok": "completed", "flaky": "completed", "after_flaky": "completed"
+    }
+    with open(journal_path) as f:
+        started = [json.loads(line)["plugin"] for line in f if '"running"' in line]
+    assert sorted(started) == ["after_flaky", "flaky", "flaky", "ok"]
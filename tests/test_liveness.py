@@ -0,0 +1,45 @@
+from core.journal import ScanJournal
+from core.liveness import LivenessChecker
+from core.plugin_base import ScanType
+from core.scanner import ScanOrchestrator
+from tests.fakes import make_plugin
+
+Passive = make_plugin("passive")
+Active = make_plugin("active", scan_type=ScanType.ACTIVE)
+TARGETS = ["a.com", "dead.com", "b.com"]
+
+
+class FakeChecker(LivenessChecker):
+    def __init__(self, mode):
+        super().__init__(mode=mode)
+        self.probed = []
+
+    async def probe(self, target):
+        self.probed.append(target)
+        if target.startswith("dead"):
+            return {"alive": False, "errors": {"80": "refused"}}
+        return {"alive": True, "port": 80}
+
+
+def scan(tmp_path, checker):
+    orchestrator = ScanOrchestrator(None, str(tmp_path / "out"), plugins=[Passive, Active], targets=TARGETS,
+                                    journal=ScanJournal(str(tmp_path / "journal.jsonl")),
+                                    liveness=checker, target_count=len(TARGETS))
+    return orchestrator, orchestrator.run_scans(max_concurrent=2)
+
+
+def test_skip_mode_drops_unreachable_targets(tmp_path):
+    orchestrator, results = scan(tmp_path, FakeChecker("skip"))
+    assert {result["target"] for result in results} == {"a.com", "b.com"}
+    assert orchestrator.target_count == 2
+
+
+def test_resume_does_not_probe_journaled_targets(tmp_path):
+    scan(tmp_path, FakeChecker("passive"))
+    checker = FakeChecker("passive")
+    _, results = scan(tmp_path, checker)
+    assert checker.probed == []
+    # The unreachable mark survives the resume
+    statuses = {result["tool_name"]: result["status"] for result in results if result["target"] == "dead.com"}
+    assert statuses["passive"] == "completed" and statuses["active"] != "completed"
+    assert len(results) == 6
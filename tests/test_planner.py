@@ -0,0 +1,53 @@
+from core.planner import estimate_makespan, plan_for_budget
+from core.scanner import ScanOrchestrator
+from core.scheduler import DependencyGraph
+from tests.fakes import make_plugin
+
+Recon = make_plugin("recon")
+Probe = make_plugin("probe", dependencies=["recon"])
+
+
+def test_plan_does_not_touch_the_output_tree(tmp_path):
+    output_dir = tmp_path / "out"
+    orchestrator = ScanOrchestrator(None, str(output_dir), plugins=[Recon, Probe], targets=["a.com", "b.com"])
+    plan = orchestrator.plan_scans(max_concurrent=2)
+    assert [(job["target"], job["plugin"]) for job in plan["jobs"]] == [
+        ("a.com", "recon"), ("b.com", "recon"), ("a.com", "probe"), ("b.com", "probe"),
+    ]
+    assert all(job["command"] for job in plan["jobs"])
+    assert not output_dir.exists()
+
+
+def test_budget_keeps_the_most_valuable_plugins_that_fit():
+    graph = DependencyGraph({"recon": [], "crawl": ["recon"], "fuzz": ["crawl"], "ports": ["recon"]})
+    durations = {"recon": 10, "crawl": 30, "fuzz": 100, "ports": 20}
+    values = {"recon": 1, "crawl": 2, "fuzz": 10, "ports": 3}
+    plan = plan_for_budget(graph, durations, values, budget=60)
+    assert sorted(plan.selected) == ["crawl", "ports", "recon"]
+    assert plan.dropped == {"fuzz": "Does not fit the time budget"}
+
+    # Two slots make room for the chain with the most valuable plugin
+    plan = plan_for_budget(graph, durations, values, budget=140, slots=2)
+    assert plan.selected[:3] == ["recon", "crawl", "fuzz"]
+    assert plan.dropped == {}
+
+
+def test_budget_drops_dependents_of_dropped_plugins():
+    graph = DependencyGraph({"recon": [], "probe": ["recon"]})
+    plan = plan_for_budget(graph, {"recon": 50, "probe": 1}, {"recon": 1, "probe": 5}, budget=10)
+    assert plan.selected == []
+    assert plan.dropped == {"recon": "Does not fit the time budget", "probe": "Depends on dropped plugin recon"}
+
+
+def test_budget_covers_every_target():
+    graph = DependencyGraph({"a": [], "b": []})
+    durations, values = {"a": 10, "b": 10}, {"a": 1, "b": 2}
+    assert sorted(plan_for_budget(graph, durations, values, budget=20).selected) == ["a", "b"]
+    assert plan_for_budget(graph, durations, values, budget=20, targets=2).selected == ["b"]
+
+
+def test_plan_without_budget_runs_everything_longest_first():
+    graph = DependencyGraph({"short": [], "long": []})
+    plan = plan_for_budget(graph, {"short": 1, "long": 5}, {"short": 1, "long": 1}, budget=None)
+    assert plan.selected == ["long", "short"]
+    assert estimate_makespan(graph, {"short": 1, "long": 5}, ["short", "long"], slots=2) == 5
@@ -0,0 +1,43 @@
+import asyncio
+import os
+
+import pytest
+
+from core.artifacts import open_raw_output
+from core.result_cache import ResultCache
+from tests.fakes import make_plugin
+
+Noisy = make_plugin("noisy", command=["sh", "-c", "echo found; echo warning >&2"])
+Quiet = make_plugin("quiet", command=["echo", "found"])
+
+
+def run(plugin, engine):
+    return asyncio.run(plugin.run_async()) if engine == "asyncio" else plugin.run()
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_spools_are_compressed_or_removed(tmp_path, engine):
+    result = run(Noisy(target="a.com", output_dir=str(tmp_path)), engine)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".log")]
+    assert list(result["logs"]) == ["stderr"]
+    with open_raw_output(result["logs"]["stderr"], str(tmp_path)) as stderr:
+        assert stderr.read() == "warning\n"
+    with open_raw_output(result["raw_output"], str(tmp_path)) as stdout:
+        assert stdout.read() == "found\n"
+
+
+def test_quiet_tool_keeps_no_logs(tmp_path):
+    result = Quiet(target="a.com", output_dir=str(tmp_path)).run()
+    assert "logs" not in result
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".log")]
+
+
+def test_cached_result_brings_its_logs(tmp_path):
+    first = Noisy(target="a.com", output_dir=str(tmp_path / "first"))
+    cache = ResultCache(str(tmp_path / "cache"))
+    cache.put("key", first.run(), first.output_dir)
+
+    second = Noisy(target="a.com", output_dir=str(tmp_path / "second"))
+    result = second.use_cached_results(cache.get("key", 60))
+    with open_raw_output(result["logs"]["stderr"], second.output_dir) as stderr:
+        assert stderr.read() == "warning\n"
@@ -0,0 +1,87 @@
+import os
+import threading
+
+from core.probe_cache import ProbeCache
+
+
+def install_tool(bin_dir, version, mtime=None):
+    """Write a fake tool that prints a version and counts its invocations."""
+    tool = bin_dir / "faketool"
+    tool.write_text(f"#!/bin/sh\necho x >> {bin_dir / 'calls'}\nsleep 0.1\necho 'faketool v{version}'\n")
+    tool.chmod(0o755)
+    if mtime is not None:
+        os.utime(tool, (mtime, mtime))
+    return tool
+
+
+def calls(bin_dir):
+    path = bin_dir / "calls"
+    return len(path.read_text().splitlines()) if path.exists() else 0
+
+
+def setup_path(tmp_path, monkeypatch):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    monkeypatch.setenv("PATH", f"{bin_dir}:{os.environ['PATH']}")
+    return bin_dir
+
+
+def test_probe_is_cached_on_disk(tmp_path, monkeypatch):
+    bin_dir = setup_path(tmp_path, monkeypatch)
+    install_tool(bin_dir, "1.2.3")
+    path = str(tmp_path / "probes.json")
+
+    entry = ProbeCache(path).probe("faketool")
+    assert entry["available"] and entry["version"] == "1.2.3"
+    assert entry["path"] == str(bin_dir / "faketool")
+    assert ProbeCache(path).probe("faketool")["version"] == "1.2.3"
+    assert calls(bin_dir) == 1
+
+
+def test_reinstalled_tool_is_probed_again(tmp_path, monkeypatch):
+    bin_dir = setup_path(tmp_path, monkeypatch)
+    install_tool(bin_dir, "1.0", mtime=1_000_000)
+    cache = ProbeCache(str(tmp_path / "probes.json"))
+    assert cache.probe("faketool")["version"] == "1.0"
+
+    install_tool(bin_dir, "2.0", mtime=2_000_000)
+    assert cache.probe("faketool")["version"] == "2.0"
+    assert calls(bin_dir) == 2
+
+
+def test_path_change_invalidates_probe(tmp_path, monkeypatch):
+    bin_dir = setup_path(tmp_path, monkeypatch)
+    install_tool(bin_dir, "1.0")
+    cache = ProbeCache(str(tmp_path / "probes.json"))
+    cache.probe("faketool")
+
+    monkeypatch.setenv("PATH", f"{tmp_path}:{os.environ['PATH']}")
+    cache.probe("faketool")
+    assert calls(bin_dir) == 2
+
+
+def test_expired_probe_is_refreshed(tmp_path, monkeypatch):
+    bin_dir = setup_path(tmp_path, monkeypatch)
+    install_tool(bin_dir, "1.0")
+    cache = ProbeCache(str(tmp_path / "probes.json"), ttl=0)
+    cache.probe("faketool")
+    cache.probe("faketool")
+    assert calls(bin_dir) == 2
+
+
+def test_missing_tool_is_unavailable(tmp_path, monkeypatch):
+    setup_path(tmp_path, monkeypatch)
+    entry = ProbeCache(str(tmp_path / "probes.json")).probe("no-such-tool-for-kast")
+    assert not entry["available"] and entry["path"] is None and entry["version"] is None
+
+
+def test_concurrent_lookups_share_one_probe(tmp_path, monkeypatch):
+    bin_dir = setup_path(tmp_path, monkeypatch)
+    install_tool(bin_dir, "1.0")
+    cache = ProbeCache(str(tmp_path / "probes.json"))
+    threads = [threading.Thread(target=cache.probe, args=("faketool",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls(bin_dir) == 1
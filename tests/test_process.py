@@ -0,0 +1,55 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from core.process import ProcessGroupSampler, limit_command, process_tree
+from tests.fakes import make_plugin
+
+BURN = "import time\nend = time.process_time() + 0.6\nwhile time.process_time() < end: pass\n"
+
+
+def test_process_tree_finds_descendants():
+    process = subprocess.Popen(["sh", "-c", "sleep 5 & sleep 5 & wait"], start_new_session=True)
+    try:
+        deadline = time.monotonic() + 5
+        while len(process_tree(process.pid)) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert process_tree(process.pid)[0] == process.pid
+        assert len(process_tree(process.pid)) == 3
+    finally:
+        os.killpg(process.pid, 9)
+        process.wait()
+
+
+def test_sampled_children_are_not_counted_twice():
+    # The child is sampled while it runs, then reaped by the shell
+    process = subprocess.Popen(["sh", "-c", f'"{sys.executable}" -c "$0"; sleep 0.3', BURN],
+                               start_new_session=True)
+    sampler = ProcessGroupSampler(process.pid)
+    while process.poll() is None:
+        sampler.sample()
+        time.sleep(0.05)
+    usage = sampler.usage()
+    cpu = usage["cpu_user_seconds"] + usage["cpu_system_seconds"]
+    assert 0.5 <= cpu < 1.0
+
+
+def test_limit_command_prefixes_nice_and_prlimit():
+    current = os.getpriority(os.PRIO_PROCESS, 0)
+    cmd = limit_command(["tool"], niceness=current + 5, rlimits={"open_files": 64})
+    assert cmd[:3] == ["nice", "-n", "5"]
+    assert cmd[3] == "prlimit" and cmd[4].startswith("--nofile=64:")
+    assert cmd[-1] == "tool"
+    assert limit_command(["tool"], niceness=current) == ["tool"]
+
+
+def test_tool_runs_with_niceness_and_limits(tmp_path):
+    Limits = make_plugin("limits", command=["sh", "-c", "nice; ulimit -n"])
+    config = {"niceness": os.getpriority(os.PRIO_PROCESS, 0) + 3, "rlimits": {"open_files": 50}}
+    expected = f"{config['niceness']}\n50"
+    plugin = Limits(target="a.com", output_dir=str(tmp_path), config=config)
+    assert plugin.run()["findings"]["output"] == expected
+    plugin = Limits(target="a.com", output_dir=str(tmp_path), config=config)
+    assert asyncio.run(plugin.run_async())["findings"]["output"] == expected
@@ -0,0 +1,47 @@
+import time
+
+from core.rate_limit import HostLimiter, TokenBucket
+
+
+def test_token_bucket_allows_a_burst_then_refills():
+    bucket = TokenBucket(rate=20, burst=2)
+    assert bucket.try_take() and bucket.try_take()
+    assert not bucket.try_take()
+    assert 0 < bucket.wait_time() <= 0.05
+    time.sleep(0.06)
+    assert bucket.try_take()
+
+
+def test_urls_on_one_host_share_the_active_limit():
+    limiter = HostLimiter(max_active=1)
+    assert limiter.try_acquire("https://a.com/login")
+    assert not limiter.try_acquire("a.com:8443")
+    assert limiter.try_acquire("b.com")
+    limiter.release("https://a.com/login")
+    assert limiter.try_acquire("http://A.com/")
+
+
+def test_unlimited_active_plugins():
+    limiter = HostLimiter(max_active=None)
+    assert all(limiter.try_acquire("a.com") for _ in range(10))
+
+
+def test_start_rate_spaces_out_starts():
+    limiter = HostLimiter(max_active=None, start_rate=20, start_burst=1)
+    assert limiter.retry_after() is None
+    assert limiter.try_acquire("a.com")
+    assert not limiter.try_acquire("a.com")
+    assert limiter.try_acquire("b.com")
+    assert 0 < limiter.retry_after() <= 0.05
+    time.sleep(0.06)
+    assert limiter.try_acquire("a.com")
+
+
+def test_request_rate_is_split_across_active_slots():
+    assert HostLimiter(max_active=2, request_rate=10).request_rate_hint() == 5
+    assert HostLimiter(request_rate=None).request_rate_hint() is None
+
+
+def test_from_config_defaults_to_one_active_plugin_per_host():
+    limiter = HostLimiter.from_config({})
+    assert (limiter.max_active, limiter.start_rate, limiter.request_rate) == (1, None, None)
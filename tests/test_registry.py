@@ -0,0 +1,93 @@
+import os
+import sys
+import textwrap
+
+import pytest
+
+from core.plugin_base import PluginBase, ScanType
+from core.registry import PluginRegistry
+
+MODULE = textwrap.dedent('''
+    from core.plugin_base import OutputMethod, PluginBase, ScanType
+
+    class LazyPlugin(PluginBase):
+        name = "lazy"
+        description = "Lazily imported"
+        scan_type = ScanType.PASSIVE
+        output_method = OutputMethod.STDOUT
+
+        def check_dependencies(self):
+            return True
+
+        def build_command(self):
+            return ["true"]
+
+        def parse_output(self, raw_output):
+            return {}
+''')
+
+
+def write_manifest(plugins_dir, name, description="Lazily imported", mtime=None, **extra):
+    plugin_dir = plugins_dir / name
+    plugin_dir.mkdir(exist_ok=True)
+    manifest = plugin_dir / "config.yml"
+    lines = [f"name: {name}", f"description: {description}", "scan_type: passive",
+             f"entry_point: kast_lazy_{name}:LazyPlugin"]
+    lines += [f"{key}: {value}" for key, value in extra.items()]
+    manifest.write_text("\n".join(lines) + "\n")
+    if mtime is not None:
+        os.utime(manifest, (mtime, mtime))
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    plugins_dir = tmp_path / "plugins"
+    plugins_dir.mkdir()
+    (tmp_path / "kast_lazy_lazy.py").write_text(MODULE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield PluginRegistry(plugins_dir, cache_path=str(tmp_path / "registry.json"))
+    sys.modules.pop("kast_lazy_lazy", None)
+
+
+def test_discovery_does_not_import_plugins(registry):
+    write_manifest(registry.plugins_dir, "lazy", dependencies="[other]")
+    [manifest] = registry.discover()
+    assert (manifest.name, manifest.scan_type, manifest.dependencies) == ("lazy", ScanType.PASSIVE, ["other"])
+    assert "kast_lazy_lazy" not in sys.modules
+
+    plugin_class = manifest.load()
+    assert issubclass(plugin_class, PluginBase)
+    assert "kast_lazy_lazy" in sys.modules
+
+
+def test_cached_manifests_are_used_while_mtimes_match(registry):
+    write_manifest(registry.plugins_dir, "lazy", description="First", mtime=1_000_000)
+    assert registry.discover()[0].description == "First"
+
+    write_manifest(registry.plugins_dir, "lazy", description="Second", mtime=1_000_000)
+    assert registry.discover()[0].description == "First"
+
+    write_manifest(registry.plugins_dir, "lazy", description="Third", mtime=2_000_000)
+    assert registry.discover()[0].description == "Third"
+
+
+def test_added_plugin_invalidates_cache(registry):
+    write_manifest(registry.plugins_dir, "lazy")
+    registry.discover()
+    write_manifest(registry.plugins_dir, "other")
+    assert sorted(manifest.name for manifest in registry.discover()) == ["lazy", "other"]
+
+
+def test_invalid_manifest_is_skipped(registry):
+    write_manifest(registry.plugins_dir, "lazy")
+    broken = registry.plugins_dir / "broken"
+    broken.mkdir()
+    (broken / "config.yml").write_text("name: broken\n")
+    assert [manifest.name for manifest in registry.discover()] == ["lazy"]
+
+
+def test_manifest_defaults_are_overridden_by_config(registry, tmp_path):
+    write_manifest(registry.plugins_dir, "lazy", defaults="{timeout: 10, retries: 2}")
+    [manifest] = registry.discover()
+    plugin = manifest.create("a.com", str(tmp_path), config={"timeout": 30})
+    assert plugin.config == {"timeout": 30, "retries": 2}
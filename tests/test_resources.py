@@ -0,0 +1,114 @@
+from datetime import datetime
+
+from core.plugin_base import ScanType
+from core.registry import PluginManifest
+from core.resources import EXCLUSIVE, ResourcePool, normalize_claims
+from core.scanner import ScanOrchestrator
+from tests.fakes import make_plugin
+
+
+def test_normalize_claims():
+    assert normalize_claims({"network_heavy": 2, "cpu": 0, EXCLUSIVE: False}) == {"network_heavy": 2.0}
+    assert normalize_claims({}, concurrency_allowed=False) == {EXCLUSIVE: 1}
+
+
+def test_weighted_claims_share_capacity():
+    pool = ResourcePool({"network_heavy": 2})
+    heavy = {"network_heavy": 2.0}
+    light = {"network_heavy": 1.0}
+    assert pool.try_acquire(heavy)
+    assert not pool.try_acquire(light)
+    assert pool.try_acquire({})
+    pool.release(heavy)
+    assert pool.try_acquire(light) and pool.try_acquire(light)
+    assert not pool.try_acquire(light)
+
+
+def test_claims_above_capacity_take_the_whole_resource():
+    pool = ResourcePool({"cpu": 2})
+    assert pool.try_acquire({"cpu": 8.0})
+    assert not pool.try_acquire({"cpu": 1.0})
+
+
+def test_exclusive_waits_for_holders_and_blocks_newcomers():
+    pool = ResourcePool()
+    exclusive = {EXCLUSIVE: 1}
+    assert pool.try_acquire({})
+    assert not pool.try_acquire(exclusive)
+    # Waiting exclusive plugin is not overtaken
+    assert not pool.try_acquire({})
+    pool.release({})
+    assert pool.try_acquire(exclusive)
+    assert not pool.try_acquire({})
+    pool.release(exclusive)
+    assert pool.try_acquire({})
+
+
+def test_exclusive_keeps_its_turn_when_not_started():
+    pool = ResourcePool()
+    exclusive = {EXCLUSIVE: 1}
+    assert pool.try_acquire(exclusive)
+    # E.g. a host limit held the plugin back after its claims were granted
+    pool.release(exclusive, started=False)
+    assert not pool.try_acquire({})
+    assert pool.try_acquire(exclusive)
+
+
+class Loner(make_plugin("loner", sleep=0.3)):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.concurrency_allowed = False
+
+
+class Heavy(make_plugin("heavy", sleep=0.3)):
+    @property
+    def resource_claims(self):
+        return {"network_heavy": 2}
+
+
+def intervals(results):
+    return {
+        result["tool_name"]: (datetime.fromisoformat(result["timestamp_start"]),
+                              datetime.fromisoformat(result["timestamp_end"]))
+        for result in results
+    }
+
+
+def overlaps(first, second):
+    return first[0] < second[1] and second[0] < first[1]
+
+
+def manifest_for(plugin_class, name):
+    # As discovered from YAML: the manifest itself declares no claims
+    return PluginManifest(name, "", ScanType.PASSIVE, f"{plugin_class.__module__}:{plugin_class.__name__}",
+                          plugin_class=plugin_class)
+
+
+def test_instance_concurrency_allowed_is_honoured(tmp_path):
+    plugins = [manifest_for(Loner, "loner"), manifest_for(make_plugin("a", sleep=0.3), "a"),
+               manifest_for(make_plugin("b", sleep=0.3), "b")]
+    results = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins).run_scans(max_concurrent=3)
+    spans = intervals(results)
+    assert not overlaps(spans["loner"], spans["a"]) and not overlaps(spans["loner"], spans["b"])
+    assert overlaps(spans["a"], spans["b"])
+
+
+def test_resource_claims_property_is_honoured(tmp_path):
+    Heavy2 = type("Heavy2", (Heavy,), {"name": property(lambda self: "heavy2")})
+    plugins = [manifest_for(Heavy, "heavy"), manifest_for(Heavy2, "heavy2"),
+               manifest_for(make_plugin("light", sleep=0.3), "light")]
+    results = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins,
+                               config={"resource_capacities": {"network_heavy": 2}}).run_scans(max_concurrent=3)
+    spans = intervals(results)
+    assert not overlaps(spans["heavy"], spans["heavy2"])
+    assert overlaps(spans["light"], spans["heavy"]) or overlaps(spans["light"], spans["heavy2"])
+
+
+def test_plugin_that_cannot_load_is_reported_through_the_load_error(tmp_path, caplog):
+    broken = PluginManifest("broken", "", ScanType.PASSIVE, "tests.no_such_module:Broken")
+    plugins = [broken, manifest_for(make_plugin("ok"), "ok")]
+    results = ScanOrchestrator("a.com", str(tmp_path), plugins=plugins).run_scans(max_concurrent=2)
+    failed = next(result for result in results if result.get("plugin") == "broken")
+    assert failed["status"] == "Failed" and failed["error"].startswith("Could not load plugin")
+    assert any(result.get("tool_name") == "ok" and result["status"] == "completed" for result in results)
+    assert "Could not load plugin broken to read its resource claims" in caplog.text
@@ -0,0 +1,75 @@
+import os
+import time
+
+from core.result_cache import RESULT_CACHE_DIR_NAME, ResultCache
+from core.scanner import ScanOrchestrator
+from tests.fakes import make_plugin
+
+Echo = make_plugin("echo")
+
+
+def cache_key(tmp_path, config, target="https://a.com"):
+    plugin = Echo(target=target, output_dir=str(tmp_path / "out"), config=config)
+    return ResultCache.key(plugin.target, plugin.name, plugin.version, plugin.cache_settings())
+
+
+def test_key_ignores_settings_that_do_not_change_findings(tmp_path):
+    base = cache_key(tmp_path, {})
+    assert cache_key(tmp_path, {"cache_ttl": 60}) == base
+    assert cache_key(tmp_path, {"liveness": {"mode": "skip"}, "host_active_limit": 2}) == base
+    assert cache_key(tmp_path, {"request_rate": 5, "learned_timeout": {"seconds": 9}}) == base
+    assert cache_key(tmp_path, {"plugins": {"other": {"verbose": True}}}) == base
+    assert cache_key(tmp_path, {"plugins": {"echo": {"cache_ttl": 60}}}) == base
+
+
+def test_key_follows_command_and_own_settings(tmp_path):
+    base = cache_key(tmp_path, {})
+    assert cache_key(tmp_path, {"verbose": True}) != base
+    assert cache_key(tmp_path, {"plugins": {"echo": {"wordlist": "big"}}}) != base
+    assert cache_key(tmp_path, {}, target="https://b.com") != base
+
+
+def test_key_uses_normalized_target(tmp_path):
+    assert cache_key(tmp_path, {}, "HTTPS://A.com:443/") == cache_key(tmp_path, {}, "https://a.com")
+
+
+def test_key_does_not_depend_on_output_directory(tmp_path):
+    first = Echo(target="a.com", output_dir=str(tmp_path / "one"))
+    second = Echo(target="a.com", output_dir=str(tmp_path / "two"))
+    assert first.cache_settings() == second.cache_settings()
+
+
+def test_default_location_is_inside_output_directory(tmp_path):
+    cache = ResultCache.from_config({}, str(tmp_path))
+    assert cache.directory == os.path.join(str(tmp_path), RESULT_CACHE_DIR_NAME)
+    assert ResultCache.from_config({"result_cache_dir": "/elsewhere"}, str(tmp_path)).directory == "/elsewhere"
+
+
+def test_cache_hit_skips_the_tool(tmp_path):
+    config = {"cache_ttl": 3600}
+    cache = ResultCache.from_config(config, str(tmp_path))
+    first = ScanOrchestrator("a.com", str(tmp_path), plugins=[Echo], config=config, result_cache=cache).run_scans()
+    assert first[0]["status"] == "completed" and not first[0].get("cached")
+
+    # A scan-wide setting changes; the cached result still applies
+    config = {"cache_ttl": 3600, "host_active_limit": 4}
+    second = ScanOrchestrator("a.com", str(tmp_path), plugins=[Echo], config=config, result_cache=cache).run_scans()
+    assert second[0]["cached"] is True
+    assert second[0]["findings"] == first[0]["findings"]
+
+
+def test_evict_by_age_and_size(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=None, max_age=60)
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    for key in ("aa1", "aa2", "bb3"):
+        cache.put(key, {"tool_name": "echo", "raw_output": None}, str(results_dir))
+    old = time.time() - 120
+    os.utime(cache._entry_dir("aa1"), (old, old))
+    cache.evict()
+    assert cache.get("aa1", ttl=10 ** 6) is None
+    assert cache.get("aa2", ttl=10 ** 6) is not None
+
+    cache.max_age, cache.max_bytes = None, 0
+    cache.evict()
+    assert cache.get("aa2", ttl=10 ** 6) is None and cache.get("bb3", ttl=10 ** 6) is None
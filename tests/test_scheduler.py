@@ -0,0 +1,131 @@
+import pytest
+
+from core.scheduler import (
+    DAGScheduler,
+    DependencyCycleError,
+    DependencyError,
+    DependencyGraph,
+    RoundRobinScheduler,
+)
+
+# recon -> (crawl -> fuzz), (ports); ports is cheap, crawl and fuzz are slow
+DEPENDENCIES = {"recon": [], "crawl": ["recon"], "fuzz": ["crawl"], "ports": ["recon"]}
+WEIGHTS = {"recon": 1, "crawl": 10, "fuzz": 20, "ports": 2}
+
+
+def drain(scheduler):
+    order = []
+    while True:
+        name = scheduler.next_ready()
+        if name is None:
+            return order
+        order.append(name)
+
+
+def test_graph_rejects_unknown_dependencies_and_cycles():
+    with pytest.raises(DependencyError):
+        DependencyGraph({"a": ["missing"]})
+    with pytest.raises(DependencyCycleError):
+        DependencyGraph({"a": ["b"], "b": ["c"], "c": ["a"], "d": []})
+
+
+def test_graph_topological_order_and_critical_path():
+    graph = DependencyGraph(DEPENDENCIES, WEIGHTS)
+    assert graph.order.index("recon") < graph.order.index("crawl") < graph.order.index("fuzz")
+    assert graph.priorities["recon"] == 31
+    assert graph.critical_path() == ["recon", "crawl", "fuzz"]
+
+
+def test_longest_critical_path_runs_first():
+    scheduler = DAGScheduler(DependencyGraph(DEPENDENCIES, WEIGHTS))
+    assert drain(scheduler) == ["recon"]
+    scheduler.mark_finished("recon", True)
+    assert drain(scheduler) == ["crawl", "ports"]
+
+
+def test_tiebreak_orders_equal_priorities():
+    graph = DependencyGraph({"active": [], "passive": []})
+    assert drain(DAGScheduler(graph, tiebreak={"active": 1, "passive": 0})) == ["passive", "active"]
+
+
+def test_failure_skips_everything_downstream():
+    scheduler = DAGScheduler(DependencyGraph(DEPENDENCIES, WEIGHTS))
+    scheduler.next_ready()
+    scheduler.mark_finished("recon", True)
+    drain(scheduler)
+    assert scheduler.mark_finished("crawl", False) == ["fuzz"]
+    assert not scheduler.done
+    scheduler.mark_finished("ports", True)
+    assert scheduler.done and scheduler.finished["fuzz"] is False
+
+
+def test_finished_plugins_are_not_handed_out_again():
+    scheduler = DAGScheduler(DependencyGraph({"a": [], "b": [], "c": ["a", "b"]}))
+    drain(scheduler)
+    # c gave up on, e.g. after a failure elsewhere, before its last dependency finished
+    scheduler.finished["c"] = False
+    scheduler.mark_finished("a", True)
+    scheduler.mark_finished("b", True)
+    assert drain(scheduler) == [] and scheduler.done
+
+
+def test_cancel_pending_leaves_running_plugins():
+    scheduler = DAGScheduler(DependencyGraph(DEPENDENCIES, WEIGHTS))
+    scheduler.next_ready()
+    assert sorted(scheduler.cancel_pending()) == ["crawl", "fuzz", "ports"]
+    assert not scheduler.done
+    scheduler.mark_finished("recon", True)
+    assert scheduler.done and not scheduler.has_ready()
+
+
+def test_round_robin_alternates_targets_and_honours_per_target_limit():
+    graph = DependencyGraph({"a": [], "b": [], "c": []})
+    scheduler = RoundRobinScheduler(per_target_limit=2)
+    scheduler.add("one", DAGScheduler(graph))
+    scheduler.add("two", DAGScheduler(graph))
+    order = [scheduler.next_ready() for _ in range(5)]
+    assert [target for target, _ in order[:4]] == ["one", "two", "one", "two"]
+    assert order[4] is None
+    scheduler.mark_finished("one", order[0][1], True)
+    assert scheduler.next_ready()[0] == "one"
+
+
+def test_round_robin_drops_finished_targets():
+    scheduler = RoundRobinScheduler()
+    scheduler.add("one", DAGScheduler(DependencyGraph({"a": []})))
+    assert "one" in scheduler and len(scheduler) == 1
+    target, name = scheduler.next_ready()
+    scheduler.mark_finished(target, name, True)
+    assert scheduler.done and len(scheduler) == 0 and "one" not in scheduler
+
+
+def test_plugins_finished_earlier_are_not_rerun():
+    scheduler = DAGScheduler(DependencyGraph(DEPENDENCIES, WEIGHTS), finished={"recon": True, "crawl": True})
+    assert drain(scheduler) == ["fuzz", "ports"]
+    assert scheduler.take_blocked() == []
+
+
+def test_plugins_downstream_of_an_earlier_failure_are_blocked():
+    scheduler = DAGScheduler(DependencyGraph(DEPENDENCIES, WEIGHTS), finished={"recon": True, "crawl": False})
+    assert drain(scheduler) == ["ports"]
+    assert scheduler.take_blocked() == ["fuzz"]
+    assert scheduler.take_blocked() == []
+    scheduler.mark_finished("ports", True)
+    assert scheduler.done and scheduler.finished["fuzz"] is False
+
+
+def test_plugins_rejected_by_admit_stay_ready():
+    scheduler = DAGScheduler(DependencyGraph({"active": [], "passive": []}, {"active": 2, "passive": 1}))
+    assert scheduler.next_ready(lambda name: name != "active") == "passive"
+    assert scheduler.next_ready(lambda name: False) is None
+    assert scheduler.next_ready() == "active"
+
+
+def test_round_robin_admit_moves_on_to_other_targets():
+    graph = DependencyGraph({"a": []})
+    scheduler = RoundRobinScheduler()
+    scheduler.add("one", DAGScheduler(graph))
+    scheduler.add("two", DAGScheduler(graph))
+    assert scheduler.next_ready(lambda target, name: target == "two") == ("two", "a")
+    assert scheduler.next_ready(lambda target, name: False) is None
+    assert scheduler.next_ready() == ("one", "a")
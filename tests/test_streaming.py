@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+from typing import Dict, List
+
+import pytest
+
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+from core.scanner import ScanOrchestrator
+
+
+class ShellPlugin(PluginBase):
+    """Runs a shell script; subclasses set the plugin name and script."""
+
+    plugin_name = "shell"
+    script = "echo done"
+
+    @property
+    def name(self) -> str:
+        return self.plugin_name
+
+    @property
+    def description(self) -> str:
+        return "Shell script"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["sh", "-c", self.script.format(output_dir=self.output_dir)]
+
+    def parse_output(self, raw_output) -> Dict:
+        return {"output": raw_output.read().strip()}
+
+
+def shell(name, script):
+    return type(name, (ShellPlugin,), {"plugin_name": name, "script": script})
+
+
+Fast = shell("fast", "echo fast")
+Slow = shell("slow", "exec sleep 1")
+
+
+def test_iter_scans_yields_results_as_plugins_finish(tmp_path):
+    started = time.monotonic()
+    results = ScanOrchestrator("a.com", str(tmp_path), plugins=[Slow, Fast]).iter_scans(max_concurrent=2)
+    first = next(results)
+    assert first["tool_name"] == "fast" and time.monotonic() - started < 0.8
+    assert [result["tool_name"] for result in results] == ["slow"]
+
+
+def test_iter_scans_reads_targets_lazily(tmp_path):
+    consumed = []
+
+    def targets():
+        for index in range(100):
+            consumed.append(index)
+            yield f"host{index}.example"
+
+    results = ScanOrchestrator(None, str(tmp_path), plugins=[Fast], targets=targets()).iter_scans(max_concurrent=1)
+    assert next(results)["target"] == "host0.example"
+    assert len(consumed) <= 4
+    results.close()
+    assert len(consumed) <= 4
+
+
+def test_aiter_scans_yields_results_as_plugins_finish(tmp_path):
+    async def scan():
+        started = time.monotonic()
+        order = []
+        async for result in ScanOrchestrator("a.com", str(tmp_path), plugins=[Slow, Fast]).aiter_scans(2):
+            order.append((result["tool_name"], time.monotonic() - started))
+        return order
+
+    (first, first_at), (second, _) = asyncio.run(scan())
+    assert (first, second) == ("fast", "slow") and first_at < 0.8
+
+
+def test_leaving_aiter_scans_early_kills_running_tools(tmp_path):
+    pid_file = tmp_path / "pid"
+    Hang = shell("hang", f"echo $$ > {pid_file}; exec sleep 30")
+    # Gives the hanging tool time to record its pid
+    Quick = shell("quick", "sleep 0.3; echo quick")
+
+    async def scan():
+        results = ScanOrchestrator("a.com", str(tmp_path), plugins=[Quick, Hang]).aiter_scans(2)
+        async for result in results:
+            assert result["tool_name"] == "quick"
+            break
+        await results.aclose()
+
+    started = time.monotonic()
+    asyncio.run(scan())
+    assert time.monotonic() - started < 10
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import subprocess
+import time
+from typing import Dict, List
+
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+from core import process as process_module
+from core.process import process_group_members, terminate_process_group, terminate_process_group_async
+
+# Ignores SIGTERM and keeps a forked helper in the tool's process group
+STUBBORN = "trap '' TERM; sleep 30 & wait"
+
+
+class StubbornTool(PluginBase):
+    """Runs a shell script that ignores SIGTERM."""
+
+    @property
+    def name(self) -> str:
+        return "stubborn"
+
+    @property
+    def description(self) -> str:
+        return "Ignores SIGTERM"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["sh", "-c", STUBBORN]
+
+    def parse_output(self, raw_output) -> Dict:
+        return {"output": raw_output.read().strip()}
+
+
+def start_group(script):
+    process = subprocess.Popen(["sh", "-c", script], start_new_session=True)
+    deadline = time.monotonic() + 5
+    while len(process_group_members(process.pid)) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return process
+
+
+def test_cooperative_group_is_not_killed():
+    process = start_group("sleep 30 & wait")
+    summary = terminate_process_group(process.pid, grace_period=5)
+    process.wait()
+    assert summary == {"processes_signalled": 2, "processes_killed": 0, "grace_period": 5}
+    assert process_group_members(process.pid) == []
+
+
+def test_group_ignoring_sigterm_is_killed_after_grace_period():
+    process = start_group(STUBBORN)
+    started = time.monotonic()
+    summary = terminate_process_group(process.pid, grace_period=0.3)
+    process.wait()
+    assert 0.3 <= time.monotonic() - started < 3
+    assert summary["processes_signalled"] == 2
+    assert summary["processes_killed"] == 2
+    assert process_group_members(process.pid) == []
+
+
+def test_escalation_scans_proc_once_in_both_versions(monkeypatch):
+    scans = []
+
+    def counting_members(pgid):
+        scans.append(pgid)
+        return process_group_members(pgid)
+    monkeypatch.setattr(process_module, "process_group_members", counting_members)
+
+    for terminate in (terminate_process_group, lambda *args: asyncio.run(terminate_process_group_async(*args))):
+        scans.clear()
+        process = start_group(STUBBORN)
+        summary = terminate(process.pid, 0.3)
+        process.wait()
+        assert summary["processes_killed"] == 2
+        assert scans == [process.pid]
+        assert process_group_members(process.pid) == []
+
+
+def check_timed_out(result, started):
+    assert result["status"] == "timeout"
+    assert result["termination"]["processes_killed"] >= 1
+    assert time.monotonic() - started < 5
+
+
+def test_timed_out_tool_group_is_killed(tmp_path):
+    config = {"timeout": 0.3, "kill_grace_period": 0.3}
+    started = time.monotonic()
+    check_timed_out(StubbornTool("a.com", str(tmp_path), config).run(), started)
+    started = time.monotonic()
+    check_timed_out(asyncio.run(StubbornTool("a.com", str(tmp_path), config).run_async()), started)
@@ -0,0 +1,50 @@
+import pytest
+
+from core.utils import normalize_target, parse_duration, parse_shard, safe_target_name, shard_targets, target_host
+
+
+def test_safe_target_name_keeps_scheme_and_port():
+    assert safe_target_name("https://a.com:8443/x").startswith("https_a.com_8443_x-")
+
+
+def test_safe_target_name_separates_distinct_targets():
+    targets = ["http://a.com", "https://a.com", "a.com", "http://a.com/", "a.com/x y", "a.com/x_y"]
+    assert len({safe_target_name(target) for target in targets}) == len(targets)
+
+
+def test_safe_target_name_is_stable_and_safe():
+    assert safe_target_name("http://a.com") == safe_target_name("http://a.com")
+    for target in ["../..", "", "a/../../etc"]:
+        name = safe_target_name(target)
+        assert "/" not in name and not name.startswith(".")
+
+
+def test_parse_shard():
+    assert parse_shard(" 2 / 5 ") == (2, 5)
+    for spec in ["0/3", "4/3", "a/b", "3"]:
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+def test_shards_partition_targets():
+    targets = [f"https://host{i}.example" for i in range(200)]
+    shards = [list(shard_targets(targets, index, 4)) for index in range(1, 5)]
+    assert sorted(sum(shards, [])) == sorted(targets)
+    assert all(shards)
+
+
+def test_parse_duration():
+    assert parse_duration("90") == 90
+    assert parse_duration("1h30m") == 5400
+    assert parse_duration("45s") == 45
+    for spec in ["", "0", "10x", "m10"]:
+        with pytest.raises(ValueError):
+            parse_duration(spec)
+
+
+def test_normalize_target_and_host():
+    assert normalize_target("HTTPS://A.com:443/path/") == "https://a.com/path"
+    assert normalize_target("http://a.com:8080") == "http://a.com:8080"
+    assert target_host("https://A.com:8443/x") == "a.com"
+    assert target_host("a.com:80/x") == "a.com"
+    assert target_host("[::1]:80") == "::1"
@@ -0,0 +1,154 @@
+import threading
+import time
+from typing import Dict, List
+
+import pytest
+
+from core.cancellation import CancellationToken
+from core.plugin_base import OutputMethod, PluginBase, ScanType
+from core.scanner import ScanOrchestrator
+from core.work_queue import WorkQueue, WorkQueueExecutor
+from core.worker import QueueWorker
+
+
+class EchoPlugin(PluginBase):
+    """Echoes its name and target; subclasses set the plugin name and dependencies."""
+
+    plugin_name = "echo"
+    requires: List[str] = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dependencies = list(self.requires)
+
+    @property
+    def name(self) -> str:
+        return self.plugin_name
+
+    @property
+    def description(self) -> str:
+        return "Echo"
+
+    @property
+    def scan_type(self) -> ScanType:
+        return ScanType.PASSIVE
+
+    @property
+    def output_method(self) -> OutputMethod:
+        return OutputMethod.STDOUT
+
+    def check_dependencies(self) -> bool:
+        return True
+
+    def build_command(self) -> List[str]:
+        return ["echo", self.name, self.target]
+
+    def parse_output(self, raw_output) -> Dict:
+        return {"output": raw_output.read().strip()}
+
+
+Recon = type("Recon", (EchoPlugin,), {"plugin_name": "recon"})
+Probe = type("Probe", (EchoPlugin,), {"plugin_name": "probe", "requires": ["recon"]})
+Slow = type("Slow", (EchoPlugin,), {"plugin_name": "slow", "build_command": lambda self: ["sleep", "30"]})
+
+
+def start_workers(queue, plugins, count):
+    workers = []
+    for index in range(count):
+        worker = QueueWorker(queue, plugins, poll_interval=0.05, idle_exit=1.0)
+        worker.id = f"test-worker-{index}"
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        workers.append(thread)
+    return workers
+
+
+def test_submit_rejects_plain_callables(tmp_path):
+    with WorkQueueExecutor(WorkQueue(str(tmp_path / "queue.db"))) as executor:
+        with pytest.raises(TypeError):
+            executor.submit(print, "not a plugin job")
+
+
+def test_scan_runs_on_queue_workers(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    plugins = [Recon, Probe]
+    workers = start_workers(queue, plugins, 2)
+    orchestrator = ScanOrchestrator(None, str(tmp_path / "out"), plugins=plugins, targets=["a.com", "b.com"])
+    with WorkQueueExecutor(queue, poll_interval=0.05) as executor:
+        results = orchestrator.run_scans(max_concurrent=2, executor=executor)
+    assert sorted((result["target"], result["tool_name"], result["findings"]["output"]) for result in results) == [
+        ("a.com", "probe", "probe a.com"), ("a.com", "recon", "recon a.com"),
+        ("b.com", "probe", "probe b.com"), ("b.com", "recon", "recon b.com"),
+    ]
+    for worker in workers:
+        worker.join(timeout=5)
+
+
+def test_expired_lease_is_reclaimed_and_stale_result_dropped(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease_seconds=0.1, max_attempts=2)
+    item_id = queue.put("a.com", "recon", str(tmp_path), {})
+    assert queue.claim("crashed").attempts == 1
+    time.sleep(0.2)
+    assert queue.claim("healthy").attempts == 2
+    assert not queue.complete(item_id, "crashed", {"status": "completed"})
+    assert queue.complete(item_id, "healthy", {"status": "completed"})
+    assert queue.collect([item_id]) == {item_id: {"status": "completed"}}
+
+
+def test_item_is_failed_after_max_attempts(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease_seconds=0.1, max_attempts=1)
+    item_id = queue.put("a.com", "recon", str(tmp_path), {})
+    queue.claim("crashed")
+    time.sleep(0.2)
+    assert queue.claim("next") is None
+    assert queue.collect([item_id])[item_id]["status"] == "Failed"
+
+
+def test_cancelled_future_withdraws_its_item(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    with WorkQueueExecutor(queue, poll_interval=0.05) as executor:
+        future = executor.submit_plugin("a.com", "recon", str(tmp_path), {})
+        assert future.cancel()
+        assert queue.claim("late-worker") is None
+
+
+def test_deadline_withdraws_queued_items(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    token = CancellationToken(timeout=0.5)
+    orchestrator = ScanOrchestrator(None, str(tmp_path / "out"), plugins=[Slow], targets=["a.com", "b.com"],
+                                    cancel_token=token)
+    started = time.monotonic()
+    # No workers: both items stay queued until the deadline withdraws them
+    with WorkQueueExecutor(queue, poll_interval=0.05) as executor:
+        results = orchestrator.run_scans(max_concurrent=2, executor=executor)
+    assert time.monotonic() - started < 5
+    assert [result["status"] for result in results] == ["cancelled", "cancelled"]
+    assert queue.claim("late-worker") is None
+
+
+def test_poller_survives_items_withdrawn_while_collecting(tmp_path):
+    queue = WorkQueue(str(tmp_path / "queue.db"))
+    collect = queue.collect
+    withdrawn = []
+
+    def collect_then_withdraw(item_ids):
+        # Finish every item, then cancel the first future before the poller takes its result
+        for item_id in item_ids:
+            queue.claim("racer")
+            queue.complete(item_id, "racer", {"status": "completed", "item": item_id})
+        results = collect(item_ids)
+        if results and not withdrawn:
+            withdrawn.append(first)
+            first.cancel()
+        return results
+
+    queue.collect = collect_then_withdraw
+    with WorkQueueExecutor(queue, poll_interval=0.05) as executor:
+        first = executor.submit_plugin("a.com", "recon", str(tmp_path), {})
+        deadline = time.monotonic() + 5
+        while not withdrawn and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert first.cancelled()
+        second = executor.submit_plugin("b.com", "recon", str(tmp_path), {})
+        assert second.result(timeout=5)["status"] == "completed"
+    assert withdrawn